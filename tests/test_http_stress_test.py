@@ -0,0 +1,331 @@
+import asyncio
+import importlib.util
+import io
+import json
+import math
+import pickle
+import queue
+import random
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+MODULE_PATH = ROOT_DIR / "tools" / "http_stress_test.py"
+
+spec = importlib.util.spec_from_file_location("http_stress_test", MODULE_PATH)
+if spec is None or spec.loader is None:
+    raise RuntimeError(f"无法加载模块: {MODULE_PATH}")
+
+http_stress_test = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = http_stress_test
+spec.loader.exec_module(http_stress_test)
+
+HTTPStressTester = http_stress_test.HTTPStressTester
+LatencyHistogram = http_stress_test.LatencyHistogram
+iter_schedule = http_stress_test.iter_schedule
+parse_rate = http_stress_test.parse_rate
+parse_stage = http_stress_test.parse_stage
+Scenario = http_stress_test.Scenario
+load_scenario = http_stress_test.load_scenario
+run_load_process = http_stress_test.run_load_process
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    seen = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        _SlowHandler.seen.append((self.command, self.path, self.headers.get("X-Token"), self.headers.get("X-User"), body))
+        self.do_GET()
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(0.05)
+        body = b"ok"
+        self.send_response(502 if self.path.startswith("/bad") else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        return
+
+
+def run_quietly(tester):
+    with redirect_stdout(io.StringIO()):
+        asyncio.run(tester.run_test())
+    return tester
+
+
+class HTTPStressTesterTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        host, port = cls.server.server_address
+        cls.base_url = f"http://{host}:{port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join(timeout=2)
+
+    def test_parse_rate_and_stage(self):
+        self.assertEqual(parse_rate("200"), 200)
+        self.assertEqual(parse_rate("200/s"), 200)
+        self.assertEqual(parse_rate("6000/m"), 100)
+        self.assertEqual(parse_stage("500/s:30s"), (500, 30))
+        self.assertEqual(parse_stage("60/m:2m"), (1, 120))
+
+    def test_schedule_constant_rate_and_linear_ramp(self):
+        self.assertEqual(len(list(iter_schedule(3, [(3, 1000 / 3)]))), 1000)
+        constant = list(iter_schedule(10, [(10, 1)]))
+        self.assertEqual([round(offset, 6) for offset in constant], [index / 10 for index in range(10)])
+
+        # 2 秒内从 0 升到 10/s，共 10 个请求，间隔逐渐变小；之后保持 10/s 1 秒。
+        ramp = list(iter_schedule(0, [(10, 2), (10, 1)]))
+        self.assertEqual(len(ramp), 20)
+        gaps = [later - earlier for earlier, later in zip(ramp, ramp[1:10])]
+        self.assertEqual(gaps, sorted(gaps, reverse=True))
+        self.assertAlmostEqual(ramp[10], 2.0)
+        self.assertAlmostEqual(ramp[-1], 2.9)
+
+    def test_latency_histogram_percentiles_merge_and_export(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(3, 1) for _ in range(20000)]
+        first, second = LatencyHistogram(), LatencyHistogram()
+        for index, value in enumerate(values):
+            (first if index % 2 else second).record(value)
+        first.merge(second)
+
+        exact = sorted(values)
+        for percent in (50, 95, 99, 99.9, 99.99):
+            expected = exact[math.ceil(round(len(exact) * percent / 100, 9)) - 1]
+            self.assertAlmostEqual(first.percentile(percent) / expected, 1, delta=0.002)
+        self.assertEqual(first.percentile(100), max(values))
+        self.assertAlmostEqual(first.mean, sum(values) / len(values))
+
+        # 样本很少时最近秩不越界：2 个值的 P99 是较大的那个。
+        small = LatencyHistogram()
+        small.record(10)
+        small.record(20)
+        self.assertAlmostEqual(small.percentile(50), 10, delta=0.01)
+        self.assertAlmostEqual(small.percentile(99), 20, delta=0.02)
+
+        restored = LatencyHistogram.from_dict(json.loads(json.dumps(first.to_dict())))
+        self.assertEqual(restored.buckets, first.buckets)
+        self.assertEqual(restored.percentiles(), first.percentiles())
+        with self.assertRaises(ValueError):
+            first.merge(LatencyHistogram(precision=0.01))
+
+    def test_closed_loop_uses_fixed_worker_pool(self):
+        tester = HTTPStressTester(f"{self.base_url}/fast", total_requests=30, concurrent=3, timeout=5)
+        send_request = tester.send_request
+        active = []
+        peak = []
+
+        async def tracked(session, index, scheduled_start=None):
+            active.append(index)
+            peak.append(len(active))
+            try:
+                await send_request(session, index, scheduled_start)
+            finally:
+                active.remove(index)
+
+        tester.send_request = tracked
+        run_quietly(tester)
+
+        self.assertEqual(tester.success_count, 30)
+        self.assertEqual(tester.completed, 30)
+        self.assertEqual(max(peak), 3)
+        # 未指定 --interval 时不按窗口统计，也不写时间序列文件。
+        self.assertEqual(tester.intervals, [])
+
+    def test_processes_split_load_and_merge_stats(self):
+        tester = HTTPStressTester(f"{self.base_url}/fast", total_requests=41, concurrent=6, timeout=5, processes=3)
+        self.assertEqual([tester.process_options(i)["total_requests"] for i in range(3)], [14, 14, 13])
+        self.assertEqual([tester.process_options(i)["concurrent"] for i in range(3)], [2, 2, 2])
+
+        run_quietly(tester)
+        self.assertEqual(tester.success_count, 41)
+        self.assertEqual(tester.latency.count, 41)
+        self.assertEqual(dict(tester.status_codes), {200: 41})
+
+        tester = HTTPStressTester(f"{self.base_url}/fast", total_requests=30, timeout=5, rate=60, processes=2)
+        options = [tester.process_options(i) for i in range(2)]
+        self.assertEqual([item["stages"] for item in options], [[(30, 0.5)], [(30, 0.5)]])
+        self.assertAlmostEqual(options[1]["schedule_phase"], 1 / 60)
+
+        run_quietly(tester)
+        self.assertEqual(tester.total_requests, 30)
+        self.assertEqual(tester.success_count, 30)
+
+    def test_open_loop_measures_latency_from_scheduled_start(self):
+        tester = run_quietly(HTTPStressTester(f"{self.base_url}/fast", total_requests=20, concurrent=10, timeout=5, rate=100))
+
+        self.assertTrue(tester.open_loop)
+        self.assertEqual(tester.success_count, 20)
+        # 测试服务器与压测在同一进程，偶尔抢占 GIL 导致个别请求略晚发出。
+        self.assertLessEqual(tester.missed_schedule, 2)
+        # 20 个请求按 100/s 发出，总耗时不短于计划时长。
+        self.assertGreaterEqual(tester.end_time - tester.start_time, 0.19)
+
+        # 只有 1 个连接、服务器每次 50ms，按 40/s 发压时请求在客户端排队，
+        # 从计划时间算起的响应时间随排队累积增长，而不是恒定在 50ms 左右。
+        tester = run_quietly(HTTPStressTester(f"{self.base_url}/slow", total_requests=12, concurrent=1, timeout=5, rate=40))
+        self.assertEqual(tester.success_count, 12)
+        self.assertGreater(tester.latency.max, 150)
+
+    def test_processes_never_exceed_total_concurrency(self):
+        tester = HTTPStressTester(f"{self.base_url}/fast", total_requests=40, concurrent=2, processes=8)
+
+        self.assertEqual(tester.processes, 2)
+        self.assertEqual(sum(tester.process_options(i)["concurrent"] for i in range(tester.processes)), 2)
+
+    def test_failed_process_cancels_window_collection(self):
+        tester = HTTPStressTester(f"{self.base_url}/slow", total_requests=40, concurrent=2, timeout=5, processes=2, interval=0.2)
+        process_options = tester.process_options
+
+        def broken_options(process_index):
+            options = process_options(process_index)
+            if process_index == 0:
+                options["unknown"] = True
+            return options
+
+        tester.process_options = broken_options
+        start = time.monotonic()
+        with self.assertRaises(TypeError):
+            run_quietly(tester)
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_load_process_reports_done_and_follows_shared_start(self):
+        window_queue = queue.Queue()
+        with self.assertRaises(TypeError):
+            run_load_process({"url": self.base_url, "unknown": 1}, time.time(), 3, window_queue)
+        self.assertEqual(window_queue.get_nowait(), {"worker": 3, "done": True})
+
+        # 进程比统一开始时间晚 0.3 秒才启动时，按计划本应早已发出的请求记为错过计划。
+        options = {"url": f"{self.base_url}/fast", "total_requests": 10, "concurrent": 10, "timeout": 5, "rate": 100}
+        with redirect_stdout(io.StringIO()):
+            stats = run_load_process(options, time.time() - 0.3)
+        self.assertGreaterEqual(stats["missed_schedule"], 9)
+        self.assertGreaterEqual(stats["max_schedule_lag"], 0.2)
+
+    def test_interval_windows_cover_run_and_write_timeseries(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            prefix = str(Path(tmpdir) / "series")
+            tester = run_quietly(HTTPStressTester(
+                f"{self.base_url}/bad", total_requests=30, concurrent=2, timeout=5,
+                rate=50, interval=0.2, timeseries_prefix=prefix,
+            ))
+
+            rows = [json.loads(line) for line in Path(f"{prefix}.ndjson").read_text(encoding="utf-8").splitlines()]
+            csv_lines = Path(f"{prefix}.csv").read_text(encoding="utf-8").splitlines()
+
+        # 30 个请求按 50/s 发出约 0.6 秒，每 0.2 秒一个窗口，窗口连续且合计等于总数。
+        self.assertEqual(rows, tester.intervals)
+        self.assertGreaterEqual(len(rows), 3)
+        self.assertEqual([row["elapsed_s"] for row in rows], [round(index * 0.2, 3) for index in range(len(rows))])
+        self.assertEqual(sum(row["requests"] for row in rows), 30)
+        self.assertEqual(sum(row["status_codes"].get("502", 0) for row in rows), 30)
+        self.assertTrue(all(row["failure"] == row["requests"] for row in rows))
+        self.assertEqual(len(csv_lines), len(rows) + 1)
+        self.assertTrue(csv_lines[0].startswith("time,elapsed_s,requests,rps"))
+
+    def test_interval_windows_merged_across_processes(self):
+        tester = run_quietly(HTTPStressTester(
+            f"{self.base_url}/fast", total_requests=40, timeout=5, rate=80, processes=2, interval=0.2,
+        ))
+
+        indexes = [round(row["elapsed_s"] / 0.2) for row in tester.intervals]
+        self.assertEqual(indexes, sorted(set(indexes)))
+        self.assertEqual(sum(row["requests"] for row in tester.intervals), 40)
+        self.assertEqual(sum(row["success"] for row in tester.intervals), tester.success_count)
+
+    def test_scenario_templates_render_and_select(self):
+        specs = [
+            {"name": "detail", "url": "/users/${user_id}?n=${index}", "weight": 3},
+            {"method": "post", "url": "/login", "headers": {"X-User": "${user_id}"},
+             "body": {"name": "${name}", "tags": ["a"]}, "weight": 1},
+        ]
+        rows = [{"user_id": "1", "name": 'Tom "T"'}, {"user_id": "2", "name": "李雷"}, {"user_id": "3", "name": "韩梅梅"}]
+        scenario = Scenario(specs, rows, "round-robin", base_url="http://api.test/")
+
+        detail, url, headers, body = scenario.build(0)
+        self.assertEqual((detail.name, url, headers, body), ("detail", "http://api.test/users/1?n=0", {}, None))
+        login, url, headers, body = scenario.build(1)
+        self.assertEqual((login.method, url), ("POST", "http://api.test/login"))
+        self.assertEqual(headers, {"X-User": "2", "Content-Type": "application/json"})
+        self.assertEqual(json.loads(body), {"name": "李雷", "tags": ["a"]})
+        # CSV 数据循环使用，变量值按 JSON 转义。
+        self.assertEqual(json.loads(scenario.build(3)[3])["name"], 'Tom "T"')
+
+        # 多进程各自按 offset/stride 取序号，不重复使用同一行数据；预编译的模板可随进程参数传递。
+        shard = pickle.loads(pickle.dumps(scenario.shard(1, 2)))
+        self.assertEqual([shard.build(index)[1] for index in range(2)],
+                         ["http://api.test/login", "http://api.test/login"])
+        self.assertEqual(json.loads(shard.build(0)[3])["name"], "李雷")
+
+        weighted = Scenario(specs, rows, "weighted", base_url="http://api.test", seed=1)
+        names = [weighted.select(index).name for index in range(4000)]
+        self.assertAlmostEqual(names.count("detail") / len(names), 0.75, delta=0.03)
+
+        with self.assertRaises(ValueError):
+            Scenario([{"url": "/users/${missing}"}], rows, base_url="http://api.test")
+        with self.assertRaises(ValueError):
+            Scenario([{"url": "/relative"}])
+
+    def test_scenario_escapes_url_values_and_rejects_header_newlines(self):
+        specs = [{"method": "POST", "url": "/fast?q=${q}&page=1"}]
+        scenario = Scenario(specs, [{"q": "a b&c=1"}], base_url=self.base_url)
+        self.assertEqual(scenario.build(0)[1], f"{self.base_url}/fast?q=a%20b%26c%3D1&page=1")
+
+        _SlowHandler.seen = []
+        run_quietly(HTTPStressTester(None, total_requests=1, concurrent=1, timeout=5, scenario=scenario))
+        self.assertEqual([item[1] for item in _SlowHandler.seen], ["/fast?q=a%20b%26c%3D1&page=1"])
+
+        header_specs = [{"url": "/fast", "headers": {"X-User": "${q}"}}]
+        with self.assertRaises(ValueError):
+            Scenario(header_specs, [{"q": "ok"}, {"q": "x\r\nX-Admin: 1"}], base_url=self.base_url)
+
+    def test_scenario_file_drives_requests(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            scenario_path = Path(tmpdir) / "scenario.jsonl"
+            scenario_path.write_text(
+                "# 读多写少\n"
+                '{"url": "/fast?user=${user_id}", "weight": 2}\n'
+                "\n"
+                '{"method": "POST", "url": "/fast", "headers": {"X-User": "${user_id}"}, "body": "id=${user_id}"}\n'
+                '{"url": "/bad", "weight": 0}\n',
+                encoding="utf-8",
+            )
+            data_path = Path(tmpdir) / "users.csv"
+            data_path.write_text("user_id\n7\n8\n9\n", encoding="utf-8")
+            scenario = load_scenario(str(scenario_path), str(data_path), "round-robin", self.base_url)
+
+        _SlowHandler.seen = []
+        tester = run_quietly(HTTPStressTester(
+            None, total_requests=6, concurrent=1, timeout=5, scenario=scenario,
+            headers={"X-Token": "secret", "X-User": "default"},
+        ))
+
+        self.assertEqual(tester.success_count, 6)
+        self.assertEqual(sorted(_SlowHandler.seen), [
+            ("POST", "/fast", "secret", "7", b"id=7"),
+            ("POST", "/fast", "secret", "8", b"id=8"),
+            ("POST", "/fast", "secret", "9", b"id=9"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
+import contextlib
 import importlib.util
+import io
+import json
+import socket
 import tempfile
 import threading
+import time
 import unittest
+from unittest import mock
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 import sys
@@ -18,17 +24,88 @@ link_checker = importlib.util.module_from_spec(spec)
 sys.modules[spec.name] = link_checker
 spec.loader.exec_module(link_checker)
 
+AdaptiveConcurrency = link_checker.AdaptiveConcurrency
+AsyncLinkChecker = link_checker.AsyncLinkChecker
+BloomDeduplicator = link_checker.BloomDeduplicator
+DnsCache = link_checker.DnsCache
+FingerprintDeduplicator = link_checker.FingerprintDeduplicator
+Http2LinkChecker = link_checker.Http2LinkChecker
+SpillQueue = link_checker.SpillQueue
+HostScheduler = link_checker.HostScheduler
+RetryPolicy = link_checker.RetryPolicy
+LinkCache = link_checker.LinkCache
 LinkChecker = link_checker.LinkChecker
+ColumnarReport = link_checker.ColumnarReport
+ColumnarReportWriter = link_checker.ColumnarReportWriter
+ResultSummary = link_checker.ResultSummary
+Crawler = link_checker.Crawler
+LinkExtractor = link_checker.LinkExtractor
+WorkQueue = link_checker.WorkQueue
+build_parser = link_checker.build_parser
+distributed_check = link_checker.distributed_check
+run_queue_worker = link_checker.run_queue_worker
+LatencyHistogram = link_checker.LatencyHistogram
+ProgressMonitor = link_checker.ProgressMonitor
 collect_urls = link_checker.collect_urls
 extract_urls_from_text = link_checker.extract_urls_from_text
+iter_urls_from_file = link_checker.iter_urls_from_file
 load_urls_from_file = link_checker.load_urls_from_file
+load_report_results = link_checker.load_report_results
 normalize_url = link_checker.normalize_url
 parse_status_spec = link_checker.parse_status_spec
+plan_incremental_check = link_checker.plan_incremental_check
+
+
+BIG_BODY_SIZE = 4 * 1024 * 1024
+SITE_PAGES = {
+    "/site": '<a href="/site/a#top">A</a> <a href=\'/bad\'>bad</a> <img src="logo.png"> <a href="mailto:x@y.z">mail</a>',
+    "/site/a": '<base href="/site/"><a href="b">B</a> <a href="/site">home</a>',
+    "/site/b": "<p>leaf</p>",
+    "/flaky-site": '<a href="/wiki/Foo_(bar)">wiki</a> <a href="/a/v1.">v1</a>',
+}
 
 
 class _LinkHandler(BaseHTTPRequestHandler):
+    throttled_hits = 0
+    track_hits = 0
+    landing_hits = 0
+    # /capped 同时处理超过 capacity 个请求时返回 503，模拟容量有限的服务器。
+    capped_capacity = 4
+    capped_active = 0
+    capped_rejected = 0
+    capped_lock = threading.Lock()
+    # /flaky-site 第一次 GET 返回 503，之后返回页面；HEAD 请求计数用于确认页面只请求一次。
+    flaky_site_gets = 0
+    site_heads = 0
+
     def do_HEAD(self):
-        if self.path == "/head-only":
+        if self.path in SITE_PAGES:
+            type(self).site_heads += 1
+
+        if self.path.startswith("/slow-head"):
+            time.sleep(0.3)
+            self.send_response(200)
+            self.end_headers()
+            return
+
+        if self.path.startswith("/capped"):
+            handler = type(self)
+            with handler.capped_lock:
+                handler.capped_active += 1
+                overloaded = handler.capped_active > handler.capped_capacity
+                if overloaded:
+                    handler.capped_rejected += 1
+            try:
+                if not overloaded:
+                    time.sleep(0.02)
+                self.send_response(503 if overloaded else 200)
+                self.end_headers()
+            finally:
+                with handler.capped_lock:
+                    handler.capped_active -= 1
+            return
+
+        if self.path in {"/head-only", "/big", "/empty"}:
             self.send_response(405)
             self.end_headers()
             return
@@ -39,15 +116,91 @@ class _LinkHandler(BaseHTTPRequestHandler):
             self.end_headers()
             return
 
+        if self.path.startswith("/track/"):
+            type(self).track_hits += 1
+            self.send_response(301)
+            self.send_header("Location", "/landing")
+            self.end_headers()
+            return
+
+        if self.path == "/landing":
+            type(self).landing_hits += 1
+            self.send_response(302)
+            self.send_header("Location", "/ok")
+            self.end_headers()
+            return
+
         if self.path == "/bad":
             self.send_response(404)
             self.end_headers()
             return
 
+        if self.path == "/throttled":
+            type(self).throttled_hits += 1
+            if type(self).throttled_hits == 1:
+                self.send_response(429)
+                self.send_header("Retry-After", "1")
+                self.end_headers()
+                return
+
+        if self.path == "/etag":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+            else:
+                self.send_response(200)
+                self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+
         self.send_response(200)
         self.end_headers()
 
     def do_GET(self):
+        if self.path == "/flaky-site":
+            type(self).flaky_site_gets += 1
+            if type(self).flaky_site_gets == 1:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        if self.path in SITE_PAGES:
+            body = SITE_PAGES[self.path].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.path == "/big":
+            if self.headers.get("Range") == "bytes=0-0":
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes 0-0/{BIG_BODY_SIZE}")
+                self.send_header("Content-Length", "1")
+                self.end_headers()
+                self.wfile.write(b"x")
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(BIG_BODY_SIZE))
+            self.end_headers()
+            try:
+                for _ in range(BIG_BODY_SIZE // 65536):
+                    self.wfile.write(b"x" * 65536)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+
+        if self.path == "/empty":
+            if self.headers.get("Range"):
+                self.send_response(416)
+                self.send_header("Content-Range", "bytes */0")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
         if self.path == "/redirect":
             self.send_response(302)
             self.send_header("Location", "/ok")
@@ -122,6 +275,23 @@ class LinkCheckerTests(unittest.TestCase):
                 ],
             )
 
+    def test_streaming_extraction_handles_chunk_boundaries(self):
+        lines = [f"page https://example.com/page/{n} see <a href=\"https://cdn.example.com/{n}.png\">" for n in range(50)]
+        lines.insert(10, "https://example.com/files/Illustrator CC 2017.iso")
+        lines.insert(20, "# https://example.com/commented")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "dump.html"
+            file_path.write_text("\n".join(lines), encoding="utf-8")
+            expected = load_urls_from_file(str(file_path))
+
+            for options in ({}, {"use_mmap": True}, {"workers": 2}):
+                urls = list(iter_urls_from_file(str(file_path), chunk_size=37, **options))
+                self.assertEqual(urls, expected)
+
+        self.assertEqual(len(expected), 101)
+        self.assertIn("https://example.com/files/Illustrator%20CC%202017.iso", expected)
+
     def test_normalize_url_quotes_spaces(self):
         self.assertEqual(
             normalize_url("https://example.com/file name.zip"),
@@ -141,6 +311,32 @@ class LinkCheckerTests(unittest.TestCase):
 
             self.assertEqual(urls, ["https://github.com", "https://example.com"])
 
+    def test_compact_deduplicators(self):
+        urls = [f"https://example.com/{n % 300}" for n in range(1000)]
+
+        fingerprints = FingerprintDeduplicator(capacity=8)
+        self.assertEqual(sum(fingerprints.add(url) for url in urls), 300)
+        self.assertEqual(len(fingerprints), 300)
+
+        bloom = BloomDeduplicator(capacity=300, error_rate=0.001)
+        first_pass = [bloom.add(url) for url in urls[:300]]
+        self.assertGreaterEqual(sum(first_pass), 299)
+        self.assertFalse(any(bloom.add(url) for url in urls[300:]))
+
+        urls_from_collect = collect_urls(urls, [], False, deduplicator=FingerprintDeduplicator())
+        self.assertEqual(urls_from_collect, urls[:300])
+
+    def test_spill_queue_keeps_order_across_memory_limit(self):
+        spill_queue = SpillQueue(memory_limit=3)
+        urls = [f"https://example.com/{n}" for n in range(10)]
+        for url in urls:
+            spill_queue.append(url)
+
+        self.assertEqual(len(spill_queue), 10)
+        self.assertEqual(list(spill_queue), urls)
+        self.assertEqual(list(spill_queue), urls)
+        spill_queue.close()
+
     def test_parse_status_spec(self):
         self.assertIn(200, parse_status_spec("200-399"))
         self.assertIn(302, parse_status_spec("2xx,301-399"))
@@ -166,7 +362,7 @@ class LinkCheckerTests(unittest.TestCase):
         self.assertTrue(results[3].ok)
         self.assertTrue(results[3].redirected)
         self.assertTrue(results[3].final_url.endswith("/ok"))
-        self.assertEqual(results[3].redirect_chain, [f"{self.base_url}/redirect", f"{self.base_url}/ok"])
+        self.assertEqual(results[3].redirect_chain, (f"{self.base_url}/redirect", f"{self.base_url}/ok"))
 
     def test_redirect_tracing_can_be_disabled(self):
         checker = LinkChecker(timeout=2, method="HEAD", trace_redirects=False)
@@ -175,8 +371,750 @@ class LinkCheckerTests(unittest.TestCase):
         self.assertTrue(result.ok)
         self.assertTrue(result.redirected)
         self.assertEqual(result.final_url, f"{self.base_url}/redirect")
-        self.assertEqual(result.redirect_chain, [])
+        self.assertEqual(result.redirect_chain, ())
+
+    def test_async_engine_matches_thread_engine(self):
+        urls = [
+            f"{self.base_url}/ok",
+            f"{self.base_url}/head-only",
+            f"{self.base_url}/bad",
+            f"{self.base_url}/redirect",
+        ]
+
+        checker = AsyncLinkChecker(timeout=2, method="HEAD", per_host_limit=2)
+        results = checker.check_urls(urls, concurrency=4)
+
+        self.assertEqual([result.index for result in results], [1, 2, 3, 4])
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[1].method_used, "GET")
+        self.assertTrue(results[1].ok)
+        self.assertEqual(results[2].status_code, 404)
+        self.assertFalse(results[2].ok)
+        self.assertTrue(results[3].redirected)
+        self.assertEqual(results[3].redirect_chain, (f"{self.base_url}/redirect", f"{self.base_url}/ok"))
+
+    def test_async_engine_excludes_connection_queue_from_timeout(self):
+        # 绕过 HostScheduler 直接提交，4 个检查在连接池排队等待同一主机的 1 个连接，
+        # 排队时间超过超时时间但不算超时，耗时也只计实际请求。
+        checker = AsyncLinkChecker(timeout=0.5, per_host_limit=1, retry_policy=RetryPolicy(max_retries=0))
+        with checker._open_executor(4) as submit:
+            futures = [submit(index, f"{self.base_url}/slow-head?n={index}") for index in range(1, 5)]
+            results = [future.result(timeout=10) for future in futures]
+
+        self.assertEqual([result.error for result in results], [None] * 4)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertLess(max(result.elapsed_ms for result in results), 600)
+
+    def test_async_engine_reports_connection_error(self):
+        checker = AsyncLinkChecker(timeout=2, retry_policy=RetryPolicy(max_retries=0))
+        result = checker.check_urls(["http://127.0.0.1:1/unreachable"], concurrency=1)[0]
+
+        self.assertFalse(result.ok)
+        self.assertEqual(result.error, "ConnectionError")
+
+    def test_iter_results_ordered_with_small_buffer(self):
+        urls = [f"{self.base_url}/ok?n={n}" for n in range(12)]
+
+        for checker in (LinkChecker(timeout=2), AsyncLinkChecker(timeout=2)):
+            results = list(checker.iter_results(iter(urls), concurrency=3, ordered=True, buffer_size=4))
+
+            self.assertEqual([result.index for result in results], list(range(1, 13)))
+            self.assertEqual([result.input_url for result in results], urls)
+
+    def test_iter_results_unordered_yields_every_url(self):
+        urls = [f"{self.base_url}/ok?n={n}" for n in range(10)]
+        results = list(LinkChecker(timeout=2).iter_results(urls, concurrency=4))
+
+        self.assertEqual(sorted(result.index for result in results), list(range(1, 11)))
+
+    def test_scheduler_lookahead_sees_past_a_busy_host(self):
+        other = ThreadingHTTPServer(("127.0.0.1", 0), _LinkHandler)
+        thread = threading.Thread(target=other.serve_forever, daemon=True)
+        thread.start()
+        try:
+            other_url = f"http://127.0.0.1:{other.server_address[1]}"
+            urls = [f"{self.base_url}/slow-head?n={n}" for n in range(6)] + [f"{other_url}/ok?n={n}" for n in range(6)]
+            checker = LinkChecker(timeout=2, method="HEAD", per_host_limit=1)
+            results = list(checker.iter_results(urls, concurrency=2, buffer_size=2))
+        finally:
+            other.shutdown()
+            other.server_close()
+            thread.join(timeout=2)
+
+        # 慢主机同时只能有一个请求，另一个名额应当在前几个慢请求期间就处理完另一主机的链接。
+        slow_done = [position for position, result in enumerate(results) if "slow-head" in result.input_url]
+        fast_done = [position for position, result in enumerate(results) if "slow-head" not in result.input_url]
+        self.assertEqual(len(results), 12)
+        self.assertLess(max(fast_done), slow_done[2])
+
+    def test_cache_skips_fresh_and_revalidates_stale_entries(self):
+        url = f"{self.base_url}/etag"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = LinkCache(str(Path(temp_dir) / "cache.db"), ttl=3600)
+            checker = LinkChecker(timeout=2, cache=cache)
+
+            first = checker.check_one(1, url)
+            self.assertFalse(first.cached)
+            self.assertEqual(cache.get(url).etag, '"v1"')
+
+            fresh = checker.check_one(1, url)
+            self.assertTrue(fresh.cached)
+            self.assertEqual(fresh.elapsed_ms, 0.0)
+
+            cache.ttl = 0
+            for revalidating_checker in (checker, AsyncLinkChecker(timeout=2, cache=cache)):
+                revalidated = revalidating_checker.check_urls([url], concurrency=1)[0]
+                self.assertTrue(revalidated.cached)
+                self.assertEqual(revalidated.status_code, 200)
+                self.assertTrue(revalidated.ok)
+            cache.close()
+
+    def test_cache_hits_follow_current_valid_status_and_stay_off_event_loop(self):
+        url = f"{self.base_url}/ok"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = LinkCache(str(Path(temp_dir) / "cache.db"), ttl=3600)
+            LinkChecker(timeout=2, cache=cache).check_one(1, url)
+
+            # 缓存的 200 在只认 204 的本次运行中无效。
+            strict = LinkChecker(timeout=2, cache=cache, valid_status_codes={204}).check_one(1, url)
+            self.assertTrue(strict.cached)
+            self.assertFalse(strict.ok)
+
+            threads = []
+            cache_get = cache.get
+
+            def tracked_get(key):
+                threads.append(threading.current_thread().name)
+                return cache_get(key)
+
+            cache.get = tracked_get
+            checker = AsyncLinkChecker(timeout=2, cache=cache, valid_status_codes={204})
+            results = checker.check_urls([url, f"{self.base_url}/etag"], concurrency=2)
+            self.assertEqual([(result.cached, result.ok) for result in results], [(True, False), (False, False)])
+            self.assertEqual(len(threads), 2)
+            self.assertNotIn("link-checker-loop", threads)
+            cache.close()
+
+    def test_cache_does_not_keep_invalid_results(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = LinkCache(str(Path(temp_dir) / "cache.db"))
+            LinkChecker(timeout=2, cache=cache).check_one(1, f"{self.base_url}/bad")
+
+            self.assertIsNone(cache.get(f"{self.base_url}/bad"))
+            cache.close()
+
+    def test_incremental_plan_from_previous_report(self):
+        checker = LinkChecker(timeout=2)
+        old_urls = [f"{self.base_url}/ok", f"{self.base_url}/bad"]
+        old_results = checker.check_urls(old_urls, concurrency=2)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_path = Path(temp_dir) / "report.json"
+            report_path.write_text(
+                json.dumps({"input_urls": old_urls, "results": [link_checker.asdict(result) for result in old_results]}),
+                encoding="utf-8",
+            )
+            previous = load_report_results(str(report_path))
+
+        new_urls = [f"{self.base_url}/redirect", f"{self.base_url}/bad", f"{self.base_url}/ok"]
+        plan = plan_incremental_check(new_urls, previous)
+
+        self.assertEqual(plan.urls, [f"{self.base_url}/redirect", f"{self.base_url}/bad"])
+        self.assertEqual(plan.positions, [1, 2])
+        self.assertEqual([(result.index, result.reused, result.cached) for result in plan.reused], [(3, True, False)])
+
+        checked = [plan.restore_index(result) for result in checker.check_urls(plan.urls, concurrency=2)]
+        self.assertEqual([result.index for result in checked], [1, 2])
+
+        strict_plan = plan_incremental_check(new_urls, previous, {204})
+        self.assertEqual(strict_plan.positions, [1, 2, 3])
+        self.assertEqual(strict_plan.reused, [])
+
+    def test_ordered_stream_merges_reused_results_in_input_order(self):
+        reused = link_checker.LinkResult(
+            index=1, input_url=f"{self.base_url}/ok", checked_url=f"{self.base_url}/ok", final_url=None,
+            status_code=200, status_text="OK", ok=True, redirected=False, redirect_chain=(),
+            method_used="HEAD", elapsed_ms=1.0,
+        )
+        urls = [f"{self.base_url}/bad", f"{self.base_url}/ok", f"{self.base_url}/ok?again"]
+        plan = plan_incremental_check(urls, {urls[1]: reused})
+        args = build_parser().parse_args(["--stream", "--ordered", "--retries", "0", "-t", "2"])
+        printed = []
+
+        with mock.patch.object(link_checker.ResultPrinter, "print_result", lambda result, verbose=False: printed.append(result)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = link_checker.stream_check(LinkChecker(timeout=2), urls, args, time.time(), plan=plan)
+
+        self.assertEqual([result.index for result in printed], [1, 2, 3])
+        self.assertEqual([result.reused for result in printed], [False, True, False])
+        self.assertEqual((summary.reused, summary.cached), (1, 0))
+
+    def test_host_scheduler_interleaves_hosts_and_limits_concurrency(self):
+        scheduler = HostScheduler(max_per_host=1)
+        for index, url in enumerate(
+            ["http://a.test/1", "http://a.test/2", "http://a.test/3", "http://b.test/1", "http://b.test/2"],
+            start=1,
+        ):
+            scheduler.add(index, url)
+
+        self.assertEqual(scheduler.pop_ready(), (1, "http://a.test/1"))
+        self.assertEqual(scheduler.pop_ready(), (4, "http://b.test/1"))
+        self.assertIsNone(scheduler.pop_ready())
+
+        scheduler.release("http://b.test/1")
+        self.assertEqual(scheduler.pop_ready(), (5, "http://b.test/2"))
+        scheduler.release("http://a.test/1", pause=60)
+        self.assertIsNone(scheduler.pop_ready())
+        self.assertGreater(scheduler.next_ready_in(), 50)
+        self.assertEqual(scheduler.queued, 2)
+
+    def test_retry_after_requeues_throttled_url(self):
+        _LinkHandler.throttled_hits = 0
+        results = LinkChecker(timeout=2).check_urls(
+            [f"{self.base_url}/throttled", f"{self.base_url}/ok"], concurrency=2
+        )
+
+        self.assertEqual(_LinkHandler.throttled_hits, 2)
+        self.assertTrue(results[0].ok)
+        self.assertIsNone(results[0].retry_after)
+        self.assertEqual(results[0].attempts, 2)
+        self.assertTrue(results[1].ok)
+        self.assertEqual(results[1].attempts, 1)
+
+    def test_retry_policy_backoff_and_budget(self):
+        policy = RetryPolicy(backoff_base=1, backoff_max=5, jitter=False, budget_ratio=0.1, budget_min=1)
+
+        self.assertEqual([policy.backoff(n) for n in (1, 2, 3, 4)], [1, 2, 4, 5])
+        self.assertEqual(policy.backoff(1, retry_after=3), 3)
+        self.assertTrue(policy.within_budget(retries=1, requests_sent=10))
+        self.assertFalse(policy.within_budget(retries=2, requests_sent=10))
+
+    def test_connection_errors_are_retried_with_attempt_count(self):
+        policy = RetryPolicy(max_retries=2, backoff_base=0.01)
+        result = LinkChecker(timeout=1, retry_policy=policy).check_urls(["http://127.0.0.1:1/down"], concurrency=1)[0]
+
+        self.assertEqual(result.error, "ConnectionError")
+        self.assertEqual(result.attempts, 3)
+
+    def test_scheduler_delayed_add_does_not_block_other_urls(self):
+        scheduler = HostScheduler()
+        scheduler.add(1, "http://a.test/retry", delay=60)
+        scheduler.add(2, "http://a.test/next")
+
+        self.assertEqual(scheduler.pop_ready(), (2, "http://a.test/next"))
+        self.assertIsNone(scheduler.pop_ready())
+        self.assertEqual(scheduler.queued, 1)
+
+    def test_dns_cache_reuses_lookups_and_caches_nxdomain(self):
+        calls = []
+
+        def fake_resolver(host, port, family=0, type=0, proto=0, flags=0):
+            calls.append(host)
+            if host == "missing.test":
+                raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 0))]
+
+        dns_cache = DnsCache(resolver=fake_resolver)
+        self.assertEqual(dns_cache.prefetch(["a.test", "a.test", "missing.test"]), (1, 1))
+
+        infos = dns_cache.getaddrinfo("a.test", 443, 0, socket.SOCK_STREAM)
+        self.assertEqual(infos[0][4], ("10.0.0.1", 443))
+        with self.assertRaises(socket.gaierror):
+            dns_cache.getaddrinfo("missing.test", 80, 0, socket.SOCK_STREAM)
+        self.assertEqual(sorted(calls), ["a.test", "missing.test"])
+
+        # 负缓存命中每次抛出新的异常对象，traceback 不会在线程间累积。
+        errors = []
+        for _ in range(2):
+            with self.assertRaises(socket.gaierror) as context:
+                dns_cache.lookup("missing.test")
+            errors.append(context.exception)
+        self.assertIsNot(errors[0], errors[1])
+        self.assertEqual(errors[1].errno, socket.EAI_NONAME)
+
+        # 域名不存在归为 DNSError，不重试，立即失败。
+        policy = RetryPolicy(max_retries=2, backoff_base=0.01)
+        for checker_class in (LinkChecker, AsyncLinkChecker):
+            checker = checker_class(timeout=2, dns_cache=dns_cache, retry_policy=policy)
+            result = checker.check_urls(["http://missing.test/page"], concurrency=1)[0]
+            self.assertEqual((result.error, result.attempts, result.ok), ("DNSError", 1, False))
+        self.assertEqual(sorted(calls), ["a.test", "missing.test"])
+
+    def test_checkers_resolve_through_dns_cache(self):
+        port = self.server.server_address[1]
+        real_getaddrinfo = socket.getaddrinfo
+        calls = []
+
+        def ipv4_resolver(host, port, family=0, type=0, proto=0, flags=0):
+            calls.append(host)
+            return real_getaddrinfo("127.0.0.1", port, socket.AF_INET, type, proto, flags)
+
+        dns_cache = DnsCache(resolver=ipv4_resolver)
+        urls = [f"http://links.test:{port}/ok", f"http://links.test:{port}/bad"]
+
+        for checker_class in (LinkChecker, AsyncLinkChecker):
+            results = checker_class(timeout=2, dns_cache=dns_cache).check_urls(urls, concurrency=2)
+            self.assertEqual([result.status_code for result in results], [200, 404])
+
+        self.assertEqual(calls, ["links.test"])
+        self.assertIs(socket.getaddrinfo, real_getaddrinfo)
+
+    def test_redirect_memo_reuses_known_hops(self):
+        urls = [f"{self.base_url}/track/{n}" for n in range(5)]
+
+        for checker_class in (LinkChecker, AsyncLinkChecker):
+            _LinkHandler.track_hits = 0
+            _LinkHandler.landing_hits = 0
+            checker = checker_class(timeout=2)
+            results = checker.check_urls(urls, concurrency=1)
+
+            self.assertEqual(_LinkHandler.track_hits, 5)
+            self.assertEqual(_LinkHandler.landing_hits, 1)
+            self.assertEqual(checker.redirect_memo.hits, 4)
+            for url, result in zip(urls, results):
+                self.assertTrue(result.ok)
+                self.assertEqual(result.redirect_chain, (url, f"{self.base_url}/landing", f"{self.base_url}/ok"))
+
+    def test_redirect_memo_can_be_disabled(self):
+        _LinkHandler.landing_hits = 0
+        checker = LinkChecker(timeout=2, memoize_redirects=False)
+        checker.check_urls([f"{self.base_url}/track/1", f"{self.base_url}/track/2"], concurrency=1)
+
+        self.assertIsNone(checker.redirect_memo)
+        self.assertEqual(_LinkHandler.landing_hits, 2)
+
+    def test_engines_report_protocol(self):
+        urls = [f"{self.base_url}/ok", f"{self.base_url}/redirect"]
+
+        for checker_class in (LinkChecker, AsyncLinkChecker):
+            results = checker_class(timeout=2).check_urls(urls, concurrency=2)
+            self.assertEqual([result.protocol for result in results], ["HTTP/1.0", "HTTP/1.0"])
+
+    @unittest.skipUnless(importlib.util.find_spec("h2"), "需要安装 httpx[http2]")
+    def test_http2_engine_falls_back_to_http1(self):
+        urls = [
+            f"{self.base_url}/ok",
+            f"{self.base_url}/head-only",
+            f"{self.base_url}/bad",
+            f"{self.base_url}/redirect",
+            "http://127.0.0.1:1/down",
+        ]
+        checker = Http2LinkChecker(timeout=2, retry_policy=RetryPolicy(max_retries=0))
+        results = checker.check_urls(urls, concurrency=2)
+
+        self.assertTrue(results[0].ok)
+        self.assertEqual(results[0].protocol, "HTTP/1.0")
+        self.assertEqual(results[1].method_used, "GET")
+        self.assertTrue(results[1].ok)
+        self.assertEqual(results[2].status_code, 404)
+        self.assertEqual(results[3].redirect_chain, (f"{self.base_url}/redirect", f"{self.base_url}/ok"))
+        self.assertEqual(results[4].error, "ConnectionError")
+
+        checker.close()
+        self.assertTrue(checker.client.is_closed)
+
+    def test_get_fallback_stops_reading_at_byte_cap(self):
+        checker_classes = [LinkChecker, AsyncLinkChecker]
+        if importlib.util.find_spec("h2"):
+            checker_classes.append(Http2LinkChecker)
+
+        for checker_class in checker_classes:
+            with self.subTest(engine=checker_class.__name__):
+                result = checker_class(timeout=5, max_body_bytes=1024).check_one(1, f"{self.base_url}/big")
+                self.assertTrue(result.ok)
+                self.assertEqual(result.method_used, "GET")
+                self.assertGreater(result.bytes_transferred, 0)
+                self.assertLess(result.bytes_transferred, BIG_BODY_SIZE // 16)
+
+        result = LinkChecker(timeout=5, max_body_bytes=0).check_one(1, f"{self.base_url}/big")
+        self.assertTrue(result.ok)
+        self.assertEqual(result.bytes_transferred, 0)
+
+    def test_range_probe_requests_first_byte_and_retries_on_416(self):
+        for checker_class in (LinkChecker, AsyncLinkChecker):
+            with self.subTest(engine=checker_class.__name__):
+                checker = checker_class(timeout=5, method="GET", range_probe=True)
+                big, empty = checker.check_urls([f"{self.base_url}/big", f"{self.base_url}/empty"], concurrency=2)
+
+                self.assertEqual(big.status_code, 206)
+                self.assertTrue(big.ok)
+                self.assertEqual(big.bytes_transferred, 1)
+                self.assertEqual(empty.status_code, 200)
+
+    def test_latency_histogram_percentiles_within_precision(self):
+        histogram = LatencyHistogram(precision=0.02)
+        for value in range(1, 10001):
+            histogram.record(float(value))
+
+        self.assertEqual(histogram.count, 10000)
+        for percent, expected in ((50, 5000), (95, 9500), (99, 9900)):
+            self.assertAlmostEqual(histogram.percentile(percent), expected, delta=expected * 0.02)
+        self.assertLessEqual(histogram.percentile(100), 10000)
+        self.assertIsNone(LatencyHistogram().percentile(50))
+
+    def test_scheduler_reports_host_queue_depths(self):
+        scheduler = HostScheduler(max_per_host=1)
+        for index, url in enumerate(["http://a.test/1", "http://a.test/2", "http://a.test/3", "http://b.test/1"], start=1):
+            scheduler.add(index, url)
+        scheduler.pop_ready()
+
+        self.assertEqual(scheduler.host_depths(), [("a.test", 2, 1), ("b.test", 1, 0)])
+        self.assertEqual(scheduler.host_depths(limit=1), [("a.test", 2, 1)])
+
+    def test_progress_monitor_exports_metrics(self):
+        urls = [f"{self.base_url}/ok", f"{self.base_url}/bad", "http://127.0.0.1:1/down"]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            prom_path = Path(temp_dir) / "metrics.prom"
+            json_path = Path(temp_dir) / "metrics.json"
+            for path in (prom_path, json_path):
+                monitor = ProgressMonitor(interval=0.1, metrics_path=str(path))
+                checker = LinkChecker(timeout=2, progress=monitor, retry_policy=RetryPolicy(max_retries=0))
+                checker.check_urls(urls, concurrency=2)
+
+            snapshot = json.loads(json_path.read_text(encoding="utf-8"))
+            self.assertEqual(snapshot["checks"], 3)
+            self.assertEqual((snapshot["valid"], snapshot["invalid"], snapshot["failed"]), (1, 1, 1))
+            self.assertEqual(snapshot["in_flight"], 0)
+            self.assertIsNotNone(snapshot["latency_ms"]["p99"])
+
+            prometheus = prom_path.read_text(encoding="utf-8")
+            self.assertIn("link_checker_checks_total 3", prometheus)
+            self.assertIn('link_checker_results_total{outcome="failed"} 1', prometheus)
+            self.assertIn('link_checker_latency_ms{quantile="0.95"}', prometheus)
+
+    def test_stream_clears_progress_line_before_each_result(self):
+        class Terminal(io.StringIO):
+            def isatty(self):
+                return True
+
+        terminal = Terminal()
+        monitor = ProgressMonitor(interval=0.1, stream=terminal)
+        checker = LinkChecker(timeout=2, method="HEAD", progress=monitor)
+        args = build_parser().parse_args(["--stream", "--retries", "0"])
+        lines_at_print = []
+
+        def print_result(result, verbose=False):
+            lines_at_print.append(terminal.getvalue().rsplit("\r", 1)[-1])
+
+        urls = [f"{self.base_url}/slow-head?n={n}" for n in range(3)]
+        with mock.patch.object(link_checker.ResultPrinter, "print_result", print_result):
+            with contextlib.redirect_stdout(io.StringIO()):
+                link_checker.stream_check(checker, urls, args, time.time())
+
+        self.assertIn("进度", terminal.getvalue())
+        self.assertEqual(lines_at_print, ["\033[K"] * 3)
+
+    def test_work_queue_shards_by_host_and_reclaims_expired_leases(self):
+        urls = ["http://a.test/1", "http://b.test/1", "http://a.test/2", "http://c.test/1"]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            work_queue = WorkQueue(str(Path(temp_dir) / "queue.db"))
+            self.assertEqual(work_queue.populate(urls, {"concurrency": 1}, shard_count=64), 4)
+            self.assertEqual(work_queue.shard_of(urls[0], 64), work_queue.shard_of(urls[2], 64))
+
+            shard = work_queue.claim_shard("w1", lease=60)
+            tasks = work_queue.shard_tasks(shard)
+            self.assertEqual(tasks, [(1, urls[0]), (3, urls[2])])
+
+            # 正常租约期内其他工作进程领到的是别的分片；租约过期后可以接手。
+            self.assertNotEqual(work_queue.claim_shard("w2", lease=60), shard)
+            with work_queue.conn:
+                work_queue.conn.execute("UPDATE shards SET lease_until = 0 WHERE shard = ?", (shard,))
+            claimed = [work_queue.claim_shard("w3", lease=60) for _ in range(3)]
+            self.assertIn(shard, claimed)
+            work_queue.close()
+
+    def test_queue_worker_checks_shards_and_merges_in_order(self):
+        urls = [f"{self.base_url}/ok", f"{self.base_url}/bad", "http://127.0.0.1:1/down"]
+        args = build_parser().parse_args(["--retries", "0", "-t", "2"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queue_path = str(Path(temp_dir) / "queue.db")
+            work_queue = WorkQueue(queue_path)
+            work_queue.populate(urls, vars(args), shard_count=8)
+
+            self.assertEqual(run_queue_worker(queue_path, "w1", poll_interval=0.1), 3)
+            self.assertTrue(work_queue.is_complete())
+            self.assertEqual(work_queue.progress(), (3, 3))
+
+            results = list(work_queue.iter_results())
+            self.assertEqual([result.index for result in results], [1, 2, 3])
+            self.assertEqual([result.status_code for result in results[:2]], [200, 404])
+            self.assertEqual(results[2].error, "ConnectionError")
+            work_queue.close()
+
+    def test_work_queue_refuses_reset_and_renews_lease_while_checking(self):
+        args = build_parser().parse_args(["--retries", "0", "-t", "2", "-c", "1"])
+        urls = [f"{self.base_url}/slow-head?n={index}" for index in range(4)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queue_path = str(Path(temp_dir) / "queue.db")
+            work_queue = WorkQueue(queue_path)
+            work_queue.populate(urls, vars(args), shard_count=8)
+            # 还有未完成的分片时不能被新的协调者清空。
+            with self.assertRaises(RuntimeError):
+                work_queue.populate(urls, vars(args), shard_count=8)
+
+            # 每个请求 0.3 秒，租约只有 0.3 秒，靠心跳续租，检查期间分片不会被其他进程接手。
+            worker = threading.Thread(target=run_queue_worker, args=(queue_path, "w1", 0.1, 0.3))
+            worker.start()
+            time.sleep(0.8)
+            self.assertIsNone(work_queue.claim_shard("w2", lease=0.3))
+            worker.join(timeout=10)
+            self.assertTrue(work_queue.is_complete())
+            work_queue.populate(urls[:1], vars(args), shard_count=8)
+            work_queue.close()
+
+    def test_remote_workers_join_through_queue_server(self):
+        urls = [f"{self.base_url}/ok", f"{self.base_url}/bad", "http://127.0.0.1:1/down", f"{self.base_url}/redirect"]
+        args = build_parser().parse_args(["--retries", "0", "-t", "2"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            queue_path = str(Path(temp_dir) / "queue.db")
+            work_queue = WorkQueue(queue_path)
+            work_queue.populate(urls, vars(args), shard_count=8)
+            server = link_checker.QueueServer(queue_path, token="secret")
+            server.start()
+            try:
+                # 令牌错误的工作进程被拒绝，不会领取任何分片。
+                with self.assertRaises(ValueError):
+                    run_queue_worker(server.url, "intruder", 0.1, token="wrong")
+
+                # 两个远程工作进程只通过 HTTP 访问队列，合计检查每个链接恰好一次。
+                counts = []
+                workers = [
+                    threading.Thread(target=lambda name=name: counts.append(run_queue_worker(server.url, name, 0.1, token="secret")))
+                    for name in ("remote-1", "remote-2")
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join(timeout=20)
+                server.wait_for_workers(timeout=1)
+                self.assertEqual(server._active, set())
+            finally:
+                server.close()
+
+            self.assertEqual(sum(counts), 4)
+            self.assertTrue(work_queue.is_complete())
+            results = list(work_queue.iter_results())
+            self.assertEqual([result.index for result in results], [1, 2, 3, 4])
+            self.assertEqual([result.status_code for result in results[:2]], [200, 404])
+            self.assertEqual(results[2].error, "ConnectionError")
+            self.assertEqual(results[3].redirect_chain, (f"{self.base_url}/redirect", f"{self.base_url}/ok"))
+            work_queue.close()
+
+    def test_distributed_check_runs_worker_processes(self):
+        urls = [f"{self.base_url}/ok", f"{self.base_url}/redirect", f"{self.base_url}/bad"]
+        args = build_parser().parse_args(["--workers", "2", "-t", "2"])
+
+        results = distributed_check(urls, args)
+
+        self.assertEqual([result.index for result in results], [1, 2, 3])
+        self.assertEqual([result.ok for result in results], [True, True, False])
+        self.assertEqual(results[1].redirect_chain, (f"{self.base_url}/redirect", f"{self.base_url}/ok"))
+
+    def test_link_extractor_handles_chunked_html(self):
+        extractor = LinkExtractor("https://example.com/docs/index.html")
+        html = '<base href="/v2/"><a href="guide#intro">g</a><img src="https://cdn.example.com/a b.png"><a href="javascript:void(0)">x</a>'
+        for start in range(0, len(html), 7):
+            extractor.feed(html[start:start + 7])
+        extractor.close()
+
+        self.assertEqual(extractor.links, ["https://example.com/v2/guide", "https://cdn.example.com/a%20b.png"])
+
+        # 属性值中的括号和结尾的点是地址的一部分，不能去掉。
+        extractor = LinkExtractor("https://example.com/")
+        extractor.feed('<a href="/wiki/Foo_(bar)">w</a><a href="/a/v1.">v</a>')
+        extractor.close()
+        self.assertEqual(extractor.links, ["https://example.com/wiki/Foo_(bar)", "https://example.com/a/v1."])
+
+    def test_crawler_follows_same_host_pages_up_to_depth(self):
+        checker = LinkChecker(timeout=2, retry_policy=RetryPolicy(max_retries=0))
+        seed = f"{self.base_url}/site"
+
+        results = {result.input_url: result for result in Crawler(checker, max_depth=1).crawl([seed], concurrency=4)}
+        self.assertEqual(
+            set(results),
+            {seed, f"{self.base_url}/site/a", f"{self.base_url}/bad", f"{self.base_url}/logo.png"},
+        )
+        self.assertEqual((results[seed].depth, results[seed].found_on), (0, None))
+        self.assertEqual((results[f"{self.base_url}/bad"].depth, results[f"{self.base_url}/bad"].found_on), (1, seed))
+        self.assertFalse(results[f"{self.base_url}/bad"].ok)
+
+        crawler = Crawler(checker, max_depth=2)
+        results = {result.input_url: result for result in crawler.crawl([seed], concurrency=4)}
+        self.assertEqual(results[f"{self.base_url}/site/b"].found_on, f"{self.base_url}/site/a")
+        self.assertEqual(results[f"{self.base_url}/site/b"].depth, 2)
+        self.assertEqual(len(results), 5)
+        self.assertEqual(crawler.pages_fetched, 2)
+        self.assertEqual(sorted(result.index for result in results.values()), [1, 2, 3, 4, 5])
+
+    def test_crawler_pages_use_checker_scheduling_and_retries(self):
+        _LinkHandler.flaky_site_gets = 0
+        _LinkHandler.site_heads = 0
+        checker = LinkChecker(timeout=2, retry_policy=RetryPolicy(max_retries=2, backoff_base=0.01))
+        seed = f"{self.base_url}/flaky-site"
+
+        crawler = Crawler(checker, max_depth=1)
+        results = {result.input_url: result for result in crawler.crawl([seed], concurrency=4)}
+
+        # 页面下载就是该链接的检查：一次 GET，503 时按重试策略重试，不再另发 HEAD。
+        self.assertEqual(_LinkHandler.site_heads, 0)
+        self.assertEqual(_LinkHandler.flaky_site_gets, 2)
+        self.assertEqual((results[seed].method_used, results[seed].attempts, results[seed].ok), ("GET", 2, True))
+        self.assertEqual(crawler.pages_fetched, 1)
+        self.assertEqual(
+            set(results),
+            {seed, f"{self.base_url}/wiki/Foo_(bar)", f"{self.base_url}/a/v1."},
+        )
+
+    def test_columnar_report_round_trips_and_filters_failures(self):
+        checker = LinkChecker(timeout=2, retry_policy=RetryPolicy(max_retries=0))
+        urls = [f"{self.base_url}/ok", f"{self.base_url}/redirect", f"{self.base_url}/bad", "http://127.0.0.1:1/down"]
+        results = checker.check_urls(urls, concurrency=2)
+        results[0].depth, results[0].found_on = 1, "https://example.com/页面"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_path = Path(temp_dir) / "report.lcr"
+            writer = ColumnarReportWriter(str(report_path), build_parser().parse_args([]), row_group_size=3)
+            for result in results:
+                writer.write_result(result)
+            writer.close(ResultSummary.from_results(results), 12.5)
+
+            report = ColumnarReport(str(report_path))
+            self.assertEqual((report.row_count, len(report.row_groups)), (4, 2))
+            self.assertEqual(report.summary["invalid"], 1)
+
+            restored = list(report.iter_results())
+            for original, loaded in zip(results, restored):
+                expected = dict(link_checker.asdict(original), elapsed_ms=None)
+                self.assertEqual(dict(link_checker.asdict(loaded), elapsed_ms=None), expected)
+                self.assertAlmostEqual(loaded.elapsed_ms, original.elapsed_ms, places=2)
+
+            failed = list(report.iter_results(only_failed=True))
+            self.assertEqual([result.index for result in failed], [3, 4])
+            self.assertEqual(list(report.read_column("status_code")), [200, 200, 404, -1])
+            self.assertEqual(set(load_report_results(str(report_path))), set(urls))
+
+            report_path.write_bytes(report_path.read_bytes()[:-20])
+            with self.assertRaises(ValueError):
+                ColumnarReport(str(report_path))
+
+    def test_link_results_are_memory_lean(self):
+        checker = LinkChecker(timeout=2)
+        ok, redirected = checker.check_urls([f"{self.base_url}/ok", f"{self.base_url}/redirect"], concurrency=2)
+
+        if sys.version_info >= (3, 10):
+            self.assertFalse(hasattr(ok, "__dict__"))
+        self.assertIs(ok.final_url, ok.checked_url)
+        self.assertIs(ok.redirect_chain, ())
+        self.assertIs(ok.method_used, redirected.method_used)
+        self.assertIs(ok.status_text, sys.intern("OK"))
+        self.assertEqual(link_checker.asdict(redirected)["redirect_chain"], (f"{self.base_url}/redirect", f"{self.base_url}/ok"))
+        self.assertEqual(link_checker.result_from_dict(json.loads(json.dumps(link_checker.asdict(redirected)))), redirected)
+
+        chainless = LinkChecker(timeout=2, store_redirect_chain=False).check_one(1, f"{self.base_url}/redirect")
+        self.assertEqual((chainless.redirect_chain, chainless.final_url), ((), f"{self.base_url}/ok"))
+        self.assertTrue(chainless.redirected)
+
+
+    def test_adaptive_concurrency_ramps_up_and_backs_off(self):
+        def result(url, status=200, error=None, elapsed_ms=10.0):
+            return link_checker.LinkResult(
+                1, url, url, url, status, "", status == 200, False, (), "HEAD", elapsed_ms, error=error
+            )
+
+        def run_window(adaptive, url, count, **kwargs):
+            for _ in range(count):
+                adaptive.on_submit(url)
+            for _ in range(count):
+                adaptive.on_complete(result(url, **kwargs))
+
+        adaptive = AdaptiveConcurrency(max_limit=64)
+        adaptive.start(4, per_host_max=0)
+        # 名额用满且健康时慢启动翻倍，直到上限。
+        for expected in (8, 16, 32, 64, 64):
+            run_window(adaptive, "http://a.test/x", adaptive.limit)
+            self.assertEqual(adaptive.limit, expected)
+
+        # 单个 5xx 不回退；主机返回 429 时只降低该主机的上限，同一批在途请求只触发一次。
+        run_window(adaptive, "http://b.test/x", 1, status=500)
+        self.assertEqual(adaptive.host_decreases, 0)
+        run_window(adaptive, "http://b.test/x", 2, status=429)
+        self.assertEqual(adaptive.host_limit("b.test"), 2)
+        self.assertEqual(adaptive.limit, 64)
+        run_window(adaptive, "http://b.test/x", 1, status=429)
+        run_window(adaptive, "http://b.test/x", 1, status=429)
+        self.assertEqual(adaptive.host_limit("b.test"), 1)
+        self.assertEqual(adaptive.throttled_hosts(), [("b.test", 1)])
+
+        # 大面积超时时全局上限减半，之后每个窗口只加 1。
+        for index in range(64):
+            adaptive.on_submit(f"http://h{index}.test/x")
+        for index in range(64):
+            error = "Timeout" if index % 4 == 0 else None
+            adaptive.on_complete(result(f"http://h{index}.test/x", status=None if error else 200, error=error))
+        self.assertEqual(adaptive.limit, 32)
+        run_window(adaptive, "http://a.test/x", 32)
+        self.assertEqual(adaptive.limit, 33)
+
+        # 耗时明显上升同样视为拥塞。
+        run_window(adaptive, "http://a.test/x", 33, elapsed_ms=500.0)
+        self.assertEqual(adaptive.limit, 16)
+
+    def test_adaptive_latency_baseline_ignores_cached_results(self):
+        def result(elapsed_ms, **kwargs):
+            url = "http://a.test/x"
+            return link_checker.LinkResult(1, url, url, url, 200, "", True, False, (), "HEAD", elapsed_ms, **kwargs)
+
+        def run_window(adaptive, count, **kwargs):
+            for _ in range(count):
+                adaptive.on_submit("http://a.test/x")
+            for _ in range(count):
+                adaptive.on_complete(result(**kwargs))
+
+        # 缓存和重定向备忘命中耗时为 0，不能把基线压到 0，之后 50ms 的正常请求不应被当作变慢。
+        adaptive = AdaptiveConcurrency(max_limit=64)
+        adaptive.start(40, per_host_max=0)
+        run_window(adaptive, 40, elapsed_ms=0.0, cached=True)
+        run_window(adaptive, 20, elapsed_ms=0.0, memoized=True)
+        for _ in range(5):
+            run_window(adaptive, adaptive.limit, elapsed_ms=50.0)
+        self.assertEqual(adaptive.decreases, 0)
+        self.assertEqual(adaptive.limit, 64)
+
+        # 即使真实请求极快，基线也不低于下限；已在下限时重新学习基线，而不是一直停在 1。
+        adaptive = AdaptiveConcurrency(max_limit=8)
+        adaptive.start(1, per_host_max=0)
+        run_window(adaptive, 1, elapsed_ms=0.0)
+        for _ in range(3):
+            run_window(adaptive, adaptive.limit, elapsed_ms=500.0)
+        self.assertGreater(adaptive.limit, 1)
+
+    def test_adaptive_checker_converges_below_server_capacity(self):
+        urls = [f"{self.base_url}/capped?n={index}" for index in range(160)]
+        policy = RetryPolicy(max_retries=0)
+
+        _LinkHandler.capped_rejected = 0
+        LinkChecker(timeout=5, per_host_limit=0, retry_policy=policy).check_urls(urls, concurrency=24)
+        fixed_rejected = _LinkHandler.capped_rejected
+
+        _LinkHandler.capped_rejected = 0
+        adaptive = AdaptiveConcurrency(max_limit=24)
+        results = LinkChecker(timeout=5, per_host_limit=0, retry_policy=policy, adaptive=adaptive).check_urls(
+            urls, concurrency=2
+        )
+
+        self.assertEqual(len(results), 160)
+        self.assertEqual(sum(1 for item in results if item.status_code == 503), _LinkHandler.capped_rejected)
+        self.assertLess(_LinkHandler.capped_rejected, fixed_rejected / 2)
+        self.assertGreater(adaptive.host_decreases, 0)
+        self.assertLessEqual(adaptive.host_limit(link_checker.url_host(urls[0])), 8)
 
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,74 @@
+import importlib.util
+import json
+import tempfile
+import unittest
+from pathlib import Path
+import sys
+
+import requests
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+MODULE_PATH = ROOT_DIR / "tools" / "link_checker_benchmark.py"
+
+spec = importlib.util.spec_from_file_location("link_checker_benchmark", MODULE_PATH)
+if spec is None or spec.loader is None:
+    raise RuntimeError(f"无法加载模块: {MODULE_PATH}")
+
+link_checker_benchmark = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = link_checker_benchmark
+spec.loader.exec_module(link_checker_benchmark)
+
+ServerProfile = link_checker_benchmark.ServerProfile
+SyntheticServer = link_checker_benchmark.SyntheticServer
+compare_with_baseline = link_checker_benchmark.compare_with_baseline
+generate_urls = link_checker_benchmark.generate_urls
+run_benchmark = link_checker_benchmark.run_benchmark
+
+
+class LinkCheckerBenchmarkTests(unittest.TestCase):
+    def test_synthetic_server_follows_generated_profile(self):
+        server = SyntheticServer(hosts=2)
+        base_urls = server.start()
+        try:
+            profile = ServerProfile(urls=40, latency_ms=1, jitter_ms=0, error_rate=0.5, redirect_rate=0.5, redirect_depth=2)
+            urls = generate_urls(base_urls, profile)
+
+            self.assertEqual(urls, generate_urls(base_urls, profile))
+            self.assertEqual({url.split("/page/")[0] for url in urls}, set(base_urls))
+
+            redirect_url = next(url for url in urls if "hops=2" in url and "status" not in url)
+            response = requests.get(redirect_url, timeout=5)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.history), 2)
+
+            error_url = next(url for url in urls if "status=500" in url and "hops" not in url)
+            self.assertEqual(requests.head(error_url, timeout=5).status_code, 500)
+        finally:
+            server.stop()
+
+    def test_run_benchmark_reports_each_case_and_detects_regressions(self):
+        profile = ServerProfile(urls=30, hosts=2, latency_ms=1, jitter_ms=0)
+        report = run_benchmark(profile, ["thread", "async"], [4], timeout=5)
+
+        self.assertEqual([(item["engine"], item["concurrency"]) for item in report["results"]], [("thread", 4), ("async", 4)])
+        for item in report["results"]:
+            self.assertEqual(item["urls"], 30)
+            self.assertEqual(item["valid"] + item["invalid"] + item["failed"], 30)
+            self.assertGreater(item["urls_per_sec"], 0)
+            self.assertIsNotNone(item["latency_ms"]["p99"])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            baseline_path = Path(temp_dir) / "baseline.json"
+            faster = json.loads(json.dumps(report))
+            for item in faster["results"]:
+                item["urls_per_sec"] *= 10
+            baseline_path.write_text(json.dumps(faster), encoding="utf-8")
+
+            self.assertEqual(compare_with_baseline(report["results"], str(baseline_path), 0.1)[0].split()[0], "thread/c=4")
+            baseline_path.write_text(json.dumps(report), encoding="utf-8")
+            self.assertEqual(compare_with_baseline(report["results"], str(baseline_path), 0.1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
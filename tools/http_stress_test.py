@@ -7,15 +7,471 @@ HTTP接口压力测试工具
 import aiohttp
 import asyncio
 import time
-import statistics
 import argparse
+import csv
 import json
+import math
+import multiprocessing
+import os
+import queue
+import random
+import re
+import concurrent.futures
+import urllib.parse
+from bisect import bisect_right
 from datetime import datetime
 from collections import defaultdict
-from typing import Dict, List, Any
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Any, Optional, TextIO, Tuple
 import sys
 
 
+# 开环模式下实际发出时间晚于计划时间超过该值（秒）即计为错过计划
+SCHEDULE_TOLERANCE = 0.01
+# 报告中保留的错误详情条数上限，超出部分只计数，长时间压测内存不会持续增长
+MAX_ERROR_DETAILS = 1000
+# 场景模板中的变量写法：${name}
+TEMPLATE_VARIABLE = re.compile(r"\$\{(\w+)\}")
+SCENARIO_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS")
+
+
+def parse_rate(value: str) -> float:
+    """解析请求速率，支持 200、200/s、6000/m 等写法，返回每秒请求数"""
+    text = value.strip().lower()
+    unit = 1.0
+    if text.endswith("/s"):
+        text = text[:-2]
+    elif text.endswith("/m"):
+        text, unit = text[:-2], 60.0
+    try:
+        rate = float(text) / unit
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的速率: {value}，示例: 200/s")
+    if rate < 0:
+        raise argparse.ArgumentTypeError(f"速率不能为负数: {value}")
+    return rate
+
+
+def parse_stage(value: str) -> Tuple[float, float]:
+    """解析压测阶段 RATE:DURATION，如 500/s:30s、6000/m:2m，返回 (目标速率, 持续秒数)"""
+    if ":" not in value:
+        raise argparse.ArgumentTypeError(f"无效的阶段: {value}，格式: 目标速率:持续时间，如 500/s:30s")
+    rate_text, duration_text = value.rsplit(":", 1)
+    duration_text = duration_text.strip().lower()
+    unit = 1.0
+    if duration_text.endswith("m"):
+        duration_text, unit = duration_text[:-1], 60.0
+    elif duration_text.endswith("s"):
+        duration_text = duration_text[:-1]
+    try:
+        duration = float(duration_text) * unit
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的持续时间: {value}")
+    if duration <= 0:
+        raise argparse.ArgumentTypeError(f"持续时间必须大于 0: {value}")
+    return parse_rate(rate_text), duration
+
+
+def iter_schedule(start_rate: float, stages: List[Tuple[float, float]]) -> Iterator[float]:
+    """按阶段生成每个请求的计划发出时间（相对开始的秒数）
+    
+    每个阶段在持续时间内把速率从上一阶段的目标线性变化到本阶段的目标，
+    第一个阶段从 start_rate 开始；目标速率与起始速率相同即为恒定速率。
+    第 k 个请求安排在累计请求数达到 k 的时刻，与服务器响应快慢无关。
+    """
+    elapsed = 0.0  # 之前各阶段的总时长
+    scheduled = 0.0  # 之前各阶段累计的请求数（可为小数）
+    next_request = 0
+    rate = start_rate
+    for target, duration in stages:
+        # 阶段内累计请求数 N(t) = rate * t + accel * t^2
+        accel = (target - rate) / (2 * duration)
+        stage_total = rate * duration + accel * duration * duration
+        # 留出浮点误差余量，恒定速率下恰好生成 total_requests 个请求
+        while next_request - scheduled < stage_total - 1e-9:
+            k = next_request - scheduled
+            # 解 N(t) = k，用该写法避免加速度很小时相减损失精度
+            t = 2 * k / (rate + math.sqrt(max(0.0, rate * rate + 4 * accel * k))) if k > 0 else 0.0
+            yield elapsed + min(t, duration)
+            next_request += 1
+        elapsed += duration
+        scheduled += stage_total
+        rate = target
+
+
+class LatencyHistogram:
+    """对数分桶的响应时间直方图（类似 HDR Histogram）
+    
+    相邻桶边界相差 precision 比例，任意百分位的相对误差不超过 precision / 2，
+    内存只与覆盖的数量级有关（默认 0.1% 精度下 1 微秒到 1 小时约 2 万个桶，按需稀疏存储），
+    与请求数无关；多个直方图精度相同时可直接合并。数值单位为毫秒。
+    """
+    
+    PERCENTILES = (50, 90, 95, 99, 99.9, 99.99)
+    
+    def __init__(self, precision: float = 0.001, min_value: float = 0.001):
+        self.precision = precision
+        self.min_value = min_value
+        self._log_base = math.log1p(precision)
+        self.buckets: Dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+    
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_base) + 1
+    
+    def _bounds(self, bucket: int) -> Tuple[float, float]:
+        """桶的取值范围 (下界, 上界]"""
+        if bucket == 0:
+            return 0.0, self.min_value
+        lower = self.min_value * math.exp((bucket - 1) * self._log_base)
+        return lower, lower * (1 + self.precision)
+    
+    def record(self, value: float):
+        """记录一个响应时间（毫秒）"""
+        self.buckets[self._bucket(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+    
+    def merge(self, other: "LatencyHistogram"):
+        """合并另一个直方图，两者精度必须相同"""
+        if (other.precision, other.min_value) != (self.precision, self.min_value):
+            raise ValueError("直方图精度不同，无法合并")
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] += count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+    
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+    
+    def percentile(self, percent: float) -> Optional[float]:
+        """最近秩法计算百分位数，返回所在桶的中点，并限制在实际最小值和最大值之间"""
+        if not self.count:
+            return None
+        # 先舍入再取整，避免 20000 * 99.99 / 100 这类浮点误差把秩多算 1
+        rank = max(1, math.ceil(round(self.count * percent / 100, 9)))
+        if rank >= self.count:
+            return self.max
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                lower, upper = self._bounds(bucket)
+                return min(self.max, max(self.min, (lower + upper) / 2))
+        return self.max
+    
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        """常用百分位数，键为 p50、p99.9 等"""
+        return {f"p{percent:g}": self.percentile(percent) for percent in self.PERCENTILES}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可写入 JSON 的字典，buckets 为 [下界, 上界, 数量] 列表"""
+        return {
+            "unit": "ms",
+            "precision": self.precision,
+            "min_value": self.min_value,
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "buckets": [[*self._bounds(bucket), self.buckets[bucket]] for bucket in sorted(self.buckets)],
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """从 to_dict 的结果还原，可用于合并多个进程或多份报告"""
+        histogram = cls(data["precision"], data["min_value"])
+        for lower, upper, count in data["buckets"]:
+            # 按桶中点定位，避免边界值的浮点误差落到相邻桶
+            histogram.buckets[histogram._bucket((lower + upper) / 2)] += count
+        histogram.count = data["count"]
+        histogram.total = data["sum"]
+        if data["count"]:
+            histogram.min = data["min"]
+            histogram.max = data["max"]
+        return histogram
+
+
+class IntervalStats:
+    """一个时间窗口（如 1 秒）内完成的请求统计，用于按时间观察 502 等错误的突发"""
+    
+    CSV_FIELDS = ["time", "elapsed_s", "requests", "rps", "success", "failure",
+                  "status_codes", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    
+    def __init__(self, index: int, start: float, duration: float):
+        self.index = index  # 从测试开始算起的第几个窗口
+        self.start = start  # 窗口开始的时间戳
+        self.duration = duration  # 窗口时长（秒），最后一个窗口可能不足一个间隔
+        self.success = 0
+        self.failure = 0
+        self.status_codes = defaultdict(int)
+        self.latency = LatencyHistogram()
+    
+    @property
+    def requests(self) -> int:
+        return self.success + self.failure
+    
+    def record(self, status: Any, ok: bool, duration_ms: Optional[float]):
+        if ok:
+            self.success += 1
+        else:
+            self.failure += 1
+        self.status_codes[status] += 1
+        if duration_ms is not None:
+            self.latency.record(duration_ms)
+    
+    def merge(self, other: "IntervalStats"):
+        """合并其他进程同一窗口的统计"""
+        self.success += other.success
+        self.failure += other.failure
+        for status, count in other.status_codes.items():
+            self.status_codes[status] += count
+        self.latency.merge(other.latency)
+        self.duration = max(self.duration, other.duration)
+    
+    def export(self) -> Dict[str, Any]:
+        """导出为可跨进程传递的字典"""
+        return {
+            "index": self.index,
+            "start": self.start,
+            "duration": self.duration,
+            "success": self.success,
+            "failure": self.failure,
+            "status_codes": dict(self.status_codes),
+            "latency": self.latency.to_dict(),
+        }
+    
+    @classmethod
+    def from_export(cls, data: Dict[str, Any]) -> "IntervalStats":
+        window = cls(data["index"], data["start"], data["duration"])
+        window.success = data["success"]
+        window.failure = data["failure"]
+        window.status_codes.update(data["status_codes"])
+        window.latency = LatencyHistogram.from_dict(data["latency"])
+        return window
+    
+    def to_row(self, timeline_start: float) -> Dict[str, Any]:
+        """时间序列中的一行，写入 NDJSON/CSV"""
+        def ms(value: Optional[float]) -> Optional[float]:
+            return round(value, 3) if value is not None else None
+        
+        return {
+            "time": datetime.fromtimestamp(self.start).isoformat(timespec="milliseconds"),
+            "elapsed_s": round(self.start - timeline_start, 3),
+            "requests": self.requests,
+            "rps": round(self.requests / self.duration, 2) if self.duration > 0 else 0.0,
+            "success": self.success,
+            "failure": self.failure,
+            "status_codes": {str(status): count for status, count in sorted(self.status_codes.items(), key=lambda item: str(item[0]))},
+            "p50_ms": ms(self.latency.percentile(50)),
+            "p95_ms": ms(self.latency.percentile(95)),
+            "p99_ms": ms(self.latency.percentile(99)),
+            "max_ms": ms(self.latency.max if self.latency.count else None),
+        }
+
+
+def compile_template(text: str, escape: Optional[Callable[[str], str]] = None) -> Callable[[Dict[str, str]], str]:
+    """把含 ${name} 变量的字符串预编译为渲染函数
+    
+    加载时拆成字面量和变量名交替的片段，每个请求只需按顺序拼接，不再做正则匹配；
+    不含变量的字符串直接返回原文。escape 用于对变量值转义（如写入 JSON 字符串）。
+    """
+    parts = TEMPLATE_VARIABLE.split(text)
+    if len(parts) == 1:
+        return lambda variables: text
+    literals = parts[0::2]
+    names = parts[1::2]
+    
+    def render(variables: Dict[str, str]) -> str:
+        values = [variables[name] for name in names]
+        if escape:
+            values = [escape(value) for value in values]
+        pieces = [literals[0]]
+        for value, literal in zip(values, literals[1:]):
+            pieces.append(value)
+            pieces.append(literal)
+        return "".join(pieces)
+    
+    return render
+
+
+def template_variables(text: str) -> List[str]:
+    """字符串中引用的变量名"""
+    return TEMPLATE_VARIABLE.findall(text)
+
+
+def escape_json_string(value: str) -> str:
+    """变量值写入 JSON 字符串内部时的转义"""
+    return json.dumps(value, ensure_ascii=False)[1:-1]
+
+
+def escape_url_component(value: str) -> str:
+    """变量值写入 URL 时按百分号编码，空格、&、#、?、/ 等不会改变路径或查询参数的结构"""
+    return urllib.parse.quote(value, safe="")
+
+
+def check_header_value(value: str) -> str:
+    """变量值写入请求头时不允许换行，避免拆出额外的请求头"""
+    if "\r" in value or "\n" in value:
+        raise ValueError(f"请求头变量值不能包含换行: {value!r}")
+    return value
+
+
+class RequestTemplate:
+    """场景文件中的一个请求模板，加载时预编译 URL、请求头和请求体"""
+    
+    def __init__(self, spec: Dict[str, Any], base_url: Optional[str] = None):
+        if not isinstance(spec, dict) or not spec.get("url"):
+            raise ValueError("请求模板必须是包含 url 的 JSON 对象")
+        self.spec = spec
+        self.name = spec.get("name") or f"{spec.get('method', 'GET').upper()} {spec['url']}"
+        self.method = spec.get("method", "GET").upper()
+        if self.method not in SCENARIO_METHODS:
+            raise ValueError(f"不支持的HTTP方法: {self.method}")
+        self.weight = float(spec.get("weight", 1))
+        if self.weight < 0:
+            raise ValueError(f"权重不能为负数: {self.weight}")
+        
+        # 以 / 开头的相对地址拼接在 -u 指定的基础地址之后
+        url = spec["url"]
+        if url.startswith("/"):
+            if not base_url:
+                raise ValueError(f"模板 {self.name} 使用相对地址，需要用 -u 指定基础地址")
+            url = base_url.rstrip("/") + url
+        self.variables = set(template_variables(url))
+        self.url = compile_template(url, escape_url_component)
+        
+        headers = dict(spec.get("headers") or {})
+        body = spec.get("body")
+        if body is not None and not isinstance(body, str):
+            # JSON 请求体预先序列化，变量值按 JSON 字符串转义后填入
+            body = json.dumps(body, ensure_ascii=False)
+            if not any(key.lower() == "content-type" for key in headers):
+                headers["Content-Type"] = "application/json"
+        header_variables = set(template_variables("".join(f"{key}{value}" for key, value in headers.items())))
+        self.variables.update(header_variables)
+        self.header_variables = header_variables
+        # 不含变量的请求头直接复用同一个字典
+        self.static_headers = None if header_variables else headers
+        self.headers = [
+            (compile_template(key, check_header_value), compile_template(str(value), check_header_value))
+            for key, value in headers.items()
+        ]
+        self.body = None
+        if body is not None:
+            self.variables.update(template_variables(body))
+            self.body = compile_template(body, escape_json_string if not isinstance(spec["body"], str) else None)
+    
+    def render(self, variables: Dict[str, str]) -> Tuple[str, Dict[str, str], Optional[bytes]]:
+        """生成一个具体请求：URL、请求头、请求体"""
+        headers = self.static_headers
+        if headers is None:
+            headers = {key(variables): value(variables) for key, value in self.headers}
+        body = self.body(variables).encode("utf-8") if self.body else None
+        return self.url(variables), headers, body
+
+
+class Scenario:
+    """场景：一组请求模板、选择方式以及 CSV 变量数据
+    
+    每个请求按序号选择模板（加权随机或轮询），并取 CSV 中的一行作为变量，数据用完后从头循环。
+    模板中除 CSV 列外还可以使用 ${index}（请求序号）。多进程时各进程按 offset/stride 错开序号，
+    不会重复使用同一行数据。
+    """
+    
+    SELECTIONS = ("weighted", "round-robin")
+    
+    def __init__(self, specs: List[Dict[str, Any]], rows: Optional[List[Dict[str, str]]] = None,
+                 selection: str = "weighted", base_url: Optional[str] = None,
+                 seed: Optional[int] = None, offset: int = 0, stride: int = 1):
+        if selection not in self.SELECTIONS:
+            raise ValueError(f"不支持的选择方式: {selection}")
+        if not specs:
+            raise ValueError("场景中没有请求模板")
+        self.specs = specs
+        self.rows = rows or []
+        self.selection = selection
+        self.base_url = base_url
+        self.seed = seed
+        self.offset = offset
+        self.stride = stride
+        
+        self.templates = [RequestTemplate(spec, base_url) for spec in specs]
+        columns = set(self.rows[0]) if self.rows else set()
+        for template in self.templates:
+            missing = template.variables - columns - {"index"}
+            if missing:
+                raise ValueError(f"模板 {template.name} 引用了数据中不存在的变量: {', '.join(sorted(missing))}")
+            # 加载时就检查请求头用到的数据，不要等到发压中途才报错
+            for row in self.rows:
+                for name in template.header_variables - {"index"}:
+                    check_header_value(row[name])
+        
+        # 加权随机用累计权重二分查找，每个请求 O(log n)
+        self.cumulative_weights = list(accumulate(template.weight for template in self.templates))
+        if self.cumulative_weights[-1] <= 0:
+            raise ValueError("请求模板的权重之和必须大于 0")
+        # 轮询同样跳过权重为 0 的模板，权重 0 表示暂时停用
+        self._rotation = [template for template in self.templates if template.weight > 0]
+        self._random = random.Random(None if seed is None else seed + offset)
+    
+    def __reduce__(self):
+        # 预编译的渲染函数不能序列化，传给子进程时由原始模板重新编译
+        return (Scenario, (self.specs, self.rows, self.selection, self.base_url,
+                           self.seed, self.offset, self.stride))
+    
+    def shard(self, offset: int, stride: int) -> "Scenario":
+        """第 offset 个发压进程使用的场景，共 stride 个进程"""
+        return Scenario(self.specs, self.rows, self.selection, self.base_url, self.seed, offset, stride)
+    
+    def select(self, index: int) -> RequestTemplate:
+        if self.selection == "round-robin":
+            return self._rotation[(index * self.stride + self.offset) % len(self._rotation)]
+        point = self._random.random() * self.cumulative_weights[-1]
+        return self.templates[min(bisect_right(self.cumulative_weights, point), len(self.templates) - 1)]
+    
+    def build(self, index: int) -> Tuple[RequestTemplate, str, Dict[str, str], Optional[bytes]]:
+        """生成第 index 个请求：模板、URL、请求头、请求体"""
+        template = self.select(index)
+        sequence = index * self.stride + self.offset
+        variables = dict(self.rows[sequence % len(self.rows)]) if self.rows else {}
+        variables["index"] = str(sequence)
+        return (template, *template.render(variables))
+
+
+def load_scenario(path: str, data_path: Optional[str] = None, selection: str = "weighted",
+                  base_url: Optional[str] = None, seed: Optional[int] = None) -> Scenario:
+    """逐行读取 JSONL 场景文件（空行和 # 开头的行跳过），可选读取 CSV 变量数据"""
+    specs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                specs.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} 第 {line_number} 行不是有效的JSON: {e}") from e
+    
+    rows = None
+    if data_path:
+        with open(data_path, "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        if not rows:
+            raise ValueError(f"变量数据文件为空: {data_path}")
+    return Scenario(specs, rows, selection, base_url, seed)
+
+
 class HTTPStressTester:
     """HTTP压力测试器"""
     
@@ -26,7 +482,14 @@ class HTTPStressTester:
                  headers: Dict = None,
                  body: Any = None,
                  delay: float = 0.0,
-                 keepalive: bool = True):
+                 keepalive: bool = True,
+                 rate: float = 0.0,
+                 stages: Optional[List[Tuple[float, float]]] = None,
+                 processes: int = 1,
+                 schedule_phase: float = 0.0,
+                 interval: float = 0.0,
+                 timeseries_prefix: Optional[str] = None,
+                 scenario: Optional[Scenario] = None):
         self.url = url
         self.method = method.upper()
         self.total_requests = total_requests
@@ -36,43 +499,89 @@ class HTTPStressTester:
         self.body = body
         self.delay = delay  # 请求间延迟（秒）
         self.keepalive = keepalive  # 是否启用连接复用
+        self.scenario = scenario  # 场景模式：按模板生成每个请求，代替固定的 url/method/body
+        
+        # 开环模式：按固定时间表发出请求，不等待前一个请求完成
+        self.rate = rate
+        self.stages = list(stages or [])
+        if self.rate > 0 and not self.stages:
+            # 只指定速率时以恒定速率发出 total_requests 个请求
+            self.stages = [(self.rate, total_requests / self.rate)]
+        self.open_loop = bool(self.stages)
+        if self.open_loop:
+            self.total_requests = sum(1 for _ in iter_schedule(self.rate, self.stages))
+        self.schedule_phase = schedule_phase  # 多进程开环时各进程时间表的错开量（秒）
+        
+        # 多进程模式：每个进程运行独立的事件循环和连接池，分担请求数、并发数或速率；
+        # 每个进程至少一个连接，进程数不超过并发数，合计连接数才不会超过 -c
+        self.processes = max(1, min(processes, self.concurrent))
+        self.show_progress = True
+        
+        # 时间序列：每 interval 秒一个窗口，实时输出并写入 NDJSON/CSV（timeseries_prefix 为文件名前缀），0 表示关闭
+        self.interval = max(0.0, interval)
+        self.timeseries_prefix = timeseries_prefix
+        self.timeline_start = None  # 窗口划分的起点，多进程时各进程共用
+        self.schedule_base = None  # 开环时间表的起点，多进程时由父进程统一指定，不取各进程自己的启动时间
+        self.window_sink: Optional[Callable[[IntervalStats], None]] = None  # 窗口结束时的处理函数
+        self.intervals: List[Dict[str, Any]] = []  # 已输出窗口的汇总行
+        self._window: Optional[IntervalStats] = None
+        self._timeseries_files: List[TextIO] = []
+        self._csv_writer = None
         
         # 统计数据
         self.success_count = 0
         self.failure_count = 0
-        self.response_times = []
+        self.latency = LatencyHistogram()  # 响应时间直方图（毫秒）
         self.status_codes = defaultdict(int)
         self.error_details = []
+        self.errors_dropped = 0  # 超出 MAX_ERROR_DETAILS 未保留详情的错误数
         self.completed = 0
+        self.missed_schedule = 0  # 开环模式下未能按计划时间发出的请求数
+        self.max_schedule_lag = 0.0
         
         # 记录开始时间
         self.start_time = None
         self.end_time = None
     
-    async def send_request(self, session: aiohttp.ClientSession, index: int):
-        """发送单个HTTP请求"""
+    async def send_request(self, session: aiohttp.ClientSession, index: int,
+                           scheduled_start: Optional[float] = None):
+        """发送单个HTTP请求
+        
+        开环模式下传入 scheduled_start，响应时间从计划发出时间算起，
+        客户端排队、等待连接的时间也计入，避免协调遗漏（coordinated omission）。
+        """
         # 添加请求延迟，模拟真实用户行为
-        if self.delay > 0 and index > 0:
+        if self.delay > 0 and index > 0 and scheduled_start is None:
             await asyncio.sleep(self.delay)
         
-        start_time = time.time()
+        start_time = time.time() if scheduled_start is None else scheduled_start
+        template = None
         
         try:
-            # 准备请求参数
-            kwargs = {
-                "headers": self.headers,
-                "ssl": False  # 如果需要忽略SSL证书验证
-            }
-            
-            # 根据HTTP方法添加请求体
-            if self.method in ["POST", "PUT", "PATCH"] and self.body:
-                if isinstance(self.body, dict):
-                    kwargs["json"] = self.body
-                else:
-                    kwargs["data"] = self.body
+            method, url = self.method, self.url
+            if self.scenario:
+                # 场景模式：由预编译的模板生成请求，模板请求头覆盖 -H 指定的同名请求头
+                template, url, headers, body = self.scenario.build(index)
+                method = template.method
+                kwargs = {"headers": {**self.headers, **headers}, "ssl": False}
+                if body is not None:
+                    kwargs["data"] = body
+            else:
+                # 准备请求参数
+                kwargs = {
+                    "headers": self.headers,
+                    "ssl": False  # 如果需要忽略SSL证书验证
+                }
+                
+                # 根据HTTP方法添加请求体
+                if self.method in ["POST", "PUT", "PATCH"] and self.body:
+                    if isinstance(self.body, dict):
+                        kwargs["json"] = self.body
+                    else:
+                        kwargs["data"] = self.body
             
             # 发送请求
-            async with session.request(self.method, self.url, **kwargs) as response:
+            async with session.request(method, url, **kwargs) as response:
                 await response.text()  # 读取响应体
                 duration = time.time() - start_time
                 
@@ -80,7 +589,8 @@ class HTTPStressTester:
                 self.status_codes[response.status] += 1
                 
                 # 记录响应时间
-                self.response_times.append(duration)
+                self.latency.record(duration * 1000)
+                self.record_window(response.status, 200 <= response.status < 400, duration * 1000)
                 
                 # 判断成功或失败
                 if 200 <= response.status < 400:
@@ -89,8 +599,9 @@ class HTTPStressTester:
                     self.failure_count += 1
                     # 记录错误详情（特别关注502等错误）
                     if response.status >= 400:
-                        self.error_details.append({
+                        self.record_error({
                             "request_index": index,
+                            "request": template.name if template else None,
                             "status_code": response.status,
                             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
                             "response_time": f"{duration * 1000:.2f}ms"
@@ -99,8 +610,10 @@ class HTTPStressTester:
         except asyncio.TimeoutError:
             self.failure_count += 1
             self.status_codes["TIMEOUT"] += 1
-            self.error_details.append({
+            self.record_window("TIMEOUT", False, None)
+            self.record_error({
                 "request_index": index,
+                "request": template.name if template else None,
                 "error": "Timeout",
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
             })
@@ -109,8 +622,10 @@ class HTTPStressTester:
             self.failure_count += 1
             error_type = type(e).__name__
             self.status_codes[f"ERROR_{error_type}"] += 1
-            self.error_details.append({
+            self.record_window(f"ERROR_{error_type}", False, None)
+            self.record_error({
                 "request_index": index,
+                "request": template.name if template else None,
                 "error": error_type,
                 "message": str(e),
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
@@ -118,27 +633,67 @@ class HTTPStressTester:
         
         finally:
             self.completed += 1
-            # 实时显示进度
-            if self.completed % max(1, self.total_requests // 20) == 0:
+            # 实时显示进度（按时间窗口输出时由窗口统计代替）
+            if self.show_progress and not self.interval and self.completed % max(1, self.total_requests // 20) == 0:
                 progress = (self.completed / self.total_requests) * 100
                 print(f"进度: {self.completed}/{self.total_requests} ({progress:.1f}%)", end="\r")
     
+    def record_error(self, detail: Dict[str, Any]):
+        """记录错误详情，超出上限后只计数"""
+        if len(self.error_details) < MAX_ERROR_DETAILS:
+            self.error_details.append(detail)
+        else:
+            self.errors_dropped += 1
+    
     async def run_test(self):
         """执行压力测试"""
         print(f"\n{'='*60}")
         print(f"🚀 开始HTTP压力测试")
         print(f"{'='*60}")
-        print(f"目标URL: {self.url}")
-        print(f"请求方法: {self.method}")
+        if self.scenario:
+            print(f"请求场景: {len(self.scenario.templates)} 个请求模板，"
+                  f"{'加权随机' if self.scenario.selection == 'weighted' else '轮询'}选择")
+            if self.scenario.rows:
+                print(f"变量数据: {len(self.scenario.rows)} 行")
+        else:
+            print(f"目标URL: {self.url}")
+            print(f"请求方法: {self.method}")
         print(f"总请求数: {self.total_requests}")
-        print(f"并发数: {self.concurrent}")
+        if self.open_loop:
+            print(f"发压模式: 开环，{self.describe_stages()}")
+            print(f"连接数上限: {self.concurrent}")
+        else:
+            print(f"并发数: {self.concurrent}")
         print(f"超时设置: {self.timeout}秒")
         print(f"连接复用: {'启用' if self.keepalive else '禁用'}")
         if self.delay > 0:
             print(f"请求延迟: {self.delay}秒")
+        if self.processes > 1:
+            print(f"发压进程数: {self.processes}")
         print(f"{'='*60}\n")
         
+        if self.interval:
+            self.open_timeseries()
+            if self.window_sink is None:
+                self.window_sink = self.emit_window
+        try:
+            if self.processes > 1:
+                await self.run_processes()
+            else:
+                await self.execute()
+        finally:
+            self.close_timeseries()
+        print("\n")  # 清除进度显示
+    
+    async def execute(self):
+        """在当前进程的事件循环中发出全部请求"""
         self.start_time = time.time()
+        if self.timeline_start is None:
+            self.timeline_start = self.start_time
+        reporter = None
+        if self.interval and self.window_sink:
+            self._window = IntervalStats(0, self.timeline_start, self.interval)
+            reporter = asyncio.ensure_future(self.run_interval_reporter())
         
         # 配置连接器和超时
         connector = aiohttp.TCPConnector(
@@ -158,14 +713,263 @@ class HTTPStressTester:
             connector=connector, 
             timeout=timeout
         ) as session:
-            tasks = [
-                self.send_request(session, i) 
-                for i in range(self.total_requests)
-            ]
-            await asyncio.gather(*tasks)
+            if self.open_loop:
+                await self.run_open_loop(session)
+            else:
+                # 固定数量的工作协程共享同一个请求序号迭代器，内存占用只与并发数有关
+                indexes = iter(range(self.total_requests))
+                workers = [
+                    self.run_worker(session, indexes)
+                    for _ in range(min(self.concurrent, self.total_requests))
+                ]
+                await asyncio.gather(*workers)
         
         self.end_time = time.time()
-        print("\n")  # 清除进度显示
+        if reporter:
+            reporter.cancel()
+            # 等报告协程真正结束后再输出最后一个窗口，避免同一窗口被输出两次或乱序
+            await asyncio.gather(reporter, return_exceptions=True)
+            # 输出最后一个（可能不足一个间隔的）窗口
+            self.advance_windows(self.end_time)
+            self._window.duration = max(0.0, self.end_time - self._window.start)
+            self.window_sink(self._window)
+            self._window = None
+    
+    def record_window(self, status: Any, ok: bool, duration_ms: Optional[float]):
+        """把一次完成的请求计入当前时间窗口"""
+        if self._window is None:
+            return
+        self.advance_windows(time.time())
+        self._window.record(status, ok, duration_ms)
+    
+    def advance_windows(self, now: float):
+        """关闭已经结束的窗口，空窗口同样输出，保证时间序列连续"""
+        current = int((now - self.timeline_start) / self.interval)
+        while self._window.index < current:
+            self.window_sink(self._window)
+            index = self._window.index + 1
+            self._window = IntervalStats(index, self.timeline_start + index * self.interval, self.interval)
+    
+    async def run_interval_reporter(self):
+        """每到窗口边界关闭当前窗口，没有请求完成时也按时输出"""
+        while True:
+            boundary = self.timeline_start + (self._window.index + 1) * self.interval
+            await asyncio.sleep(max(0.0, boundary - time.time()))
+            self.advance_windows(time.time())
+    
+    def open_timeseries(self):
+        """打开时间序列文件（NDJSON 和 CSV），测试过程中逐行写入"""
+        if not self.timeseries_prefix:
+            return
+        os.makedirs(os.path.dirname(self.timeseries_prefix) or ".", exist_ok=True)
+        ndjson_file = open(f"{self.timeseries_prefix}.ndjson", "w", encoding="utf-8")
+        csv_file = open(f"{self.timeseries_prefix}.csv", "w", encoding="utf-8", newline="")
+        self._timeseries_files = [ndjson_file, csv_file]
+        self._csv_writer = csv.DictWriter(csv_file, fieldnames=IntervalStats.CSV_FIELDS)
+        self._csv_writer.writeheader()
+    
+    def close_timeseries(self):
+        for file in self._timeseries_files:
+            file.close()
+        self._timeseries_files = []
+        self._csv_writer = None
+    
+    def emit_window(self, window: IntervalStats):
+        """输出一个窗口：控制台打印一行，并追加到时间序列文件"""
+        row = window.to_row(self.timeline_start)
+        self.intervals.append(row)
+        
+        errors = ", ".join(
+            f"{status}×{count}" for status, count in row["status_codes"].items()
+            if not (status.isdigit() and 200 <= int(status) < 400)
+        )
+        latency = "/".join("-" if row[key] is None else f"{row[key]:.1f}" for key in ("p50_ms", "p95_ms", "p99_ms"))
+        line = (f"[{row['elapsed_s']:>7.1f}s] {row['rps']:>8.1f} 请求/秒  成功 {row['success']:<6} "
+                f"失败 {row['failure']:<5} p50/p95/p99 {latency} ms")
+        if errors:
+            line += f"  ❌ {errors}"
+        print(line)
+        
+        if self._timeseries_files:
+            ndjson_file, csv_file = self._timeseries_files
+            ndjson_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            ndjson_file.flush()
+            self._csv_writer.writerow({
+                **row,
+                "status_codes": ";".join(f"{status}:{count}" for status, count in row["status_codes"].items()),
+            })
+            csv_file.flush()
+    
+    def process_options(self, process_index: int) -> Dict[str, Any]:
+        """第 process_index 个发压进程的参数：平分请求数、并发数和速率"""
+        def share(total: int) -> int:
+            return total // self.processes + (1 if process_index < total % self.processes else 0)
+        
+        options = {
+            "url": self.url,
+            "method": self.method,
+            "total_requests": share(self.total_requests),
+            "concurrent": share(self.concurrent),
+            "timeout": self.timeout,
+            "headers": self.headers,
+            "body": self.body,
+            "delay": self.delay,
+            "keepalive": self.keepalive,
+            "interval": self.interval,
+            "scenario": self.scenario.shard(process_index, self.processes) if self.scenario else None,
+        }
+        if self.open_loop:
+            options["rate"] = self.rate / self.processes
+            options["stages"] = [(target / self.processes, duration) for target, duration in self.stages]
+            # 各进程时间表按峰值速率错开，合起来仍是均匀的请求流，而不是每次 N 个请求同时发出
+            peak_rate = max([self.rate] + [target for target, _ in self.stages])
+            options["schedule_phase"] = process_index / peak_rate if peak_rate > 0 else 0.0
+        return options
+    
+    async def run_processes(self):
+        """启动多个发压进程并合并它们的统计数据
+        
+        按时间窗口输出时，各进程把结束的窗口通过队列发回，所有仍在运行的进程都发回某个窗口后
+        合并输出，控制台和时间序列文件中看到的是整体的每秒统计。
+        """
+        loop = asyncio.get_running_loop()
+        # 统一的开始时间，避免进程启动快慢不一导致负载错位；时间窗口也以此为起点
+        start_at = time.time() + 0.5
+        self.timeline_start = start_at
+        with multiprocessing.Manager() as manager, \
+                concurrent.futures.ProcessPoolExecutor(max_workers=self.processes) as executor:
+            window_queue = manager.Queue() if self.interval else None
+            futures = [
+                loop.run_in_executor(executor, run_load_process, self.process_options(i), start_at, i, window_queue)
+                for i in range(self.processes)
+            ]
+            collector = asyncio.ensure_future(self.collect_windows(window_queue)) if window_queue else None
+            try:
+                for process_index, future in enumerate(asyncio.as_completed(futures)):
+                    self.merge_stats(await future)
+                    if not self.interval:
+                        print(f"进度: {process_index + 1}/{self.processes} 个进程完成", end="\r")
+                if collector:
+                    await collector
+            finally:
+                # 子进程出错时收集任务可能仍在等待窗口，须在 Manager 关闭前取消并等它结束
+                if collector and not collector.done():
+                    collector.cancel()
+                if collector:
+                    await asyncio.gather(collector, return_exceptions=True)
+        # 开环模式下各进程按速率分摊后的请求数之和可能与整体时间表略有出入，以实际完成数为准
+        self.total_requests = self.completed
+    
+    async def collect_windows(self, window_queue: Any):
+        """接收各进程发回的窗口，按窗口序号合并后依次输出"""
+        loop = asyncio.get_running_loop()
+        pending: Dict[int, IntervalStats] = {}
+        reported = [-1] * self.processes  # 各进程已发回的最后一个窗口序号
+        finished = [False] * self.processes
+        next_index = 0
+        
+        def receive() -> Optional[Dict[str, Any]]:
+            try:
+                return window_queue.get(timeout=0.2)
+            except queue.Empty:
+                return None
+        
+        while not all(finished) or pending:
+            data = await loop.run_in_executor(None, receive) if not all(finished) else None
+            if data is not None:
+                worker = data["worker"]
+                if data.get("done"):
+                    finished[worker] = True
+                else:
+                    window = IntervalStats.from_export(data["window"])
+                    reported[worker] = window.index
+                    if window.index in pending:
+                        pending[window.index].merge(window)
+                    else:
+                        pending[window.index] = window
+            
+            # 所有仍在运行的进程都已发回该窗口时即可输出
+            while pending and all(done or last >= next_index for done, last in zip(finished, reported)):
+                if next_index in pending:
+                    self.window_sink(pending.pop(next_index))
+                next_index += 1
+                if not pending and all(finished):
+                    break
+    
+    def export_stats(self) -> Dict[str, Any]:
+        """导出统计数据，供父进程合并"""
+        return {
+            "success_count": self.success_count,
+            "failure_count": self.failure_count,
+            "latency": self.latency.to_dict(),
+            "status_codes": dict(self.status_codes),
+            "error_details": self.error_details,
+            "errors_dropped": self.errors_dropped,
+            "completed": self.completed,
+            "missed_schedule": self.missed_schedule,
+            "max_schedule_lag": self.max_schedule_lag,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "pid": os.getpid(),
+        }
+    
+    def merge_stats(self, stats: Dict[str, Any]):
+        """合并一个发压进程的统计数据"""
+        self.success_count += stats["success_count"]
+        self.failure_count += stats["failure_count"]
+        self.latency.merge(LatencyHistogram.from_dict(stats["latency"]))
+        for status, count in stats["status_codes"].items():
+            self.status_codes[status] += count
+        for error in stats["error_details"]:
+            self.record_error({**error, "pid": stats["pid"]})
+        self.errors_dropped += stats["errors_dropped"]
+        self.completed += stats["completed"]
+        self.missed_schedule += stats["missed_schedule"]
+        self.max_schedule_lag = max(self.max_schedule_lag, stats["max_schedule_lag"])
+        self.start_time = stats["start_time"] if self.start_time is None else min(self.start_time, stats["start_time"])
+        self.end_time = stats["end_time"] if self.end_time is None else max(self.end_time, stats["end_time"])
+    
+    async def run_worker(self, session: aiohttp.ClientSession, indexes: Iterator[int]):
+        """闭环工作协程：取下一个请求序号并发送，完成后再取下一个，直到全部发完"""
+        for index in indexes:
+            await self.send_request(session, index)
+    
+    async def run_open_loop(self, session: aiohttp.ClientSession):
+        """开环发压：按时间表准时发出每个请求，请求是否完成不影响后续请求的发出时间"""
+        pending = set()
+        base_time = (self.schedule_base or time.time()) + self.schedule_phase
+        for index, offset in enumerate(iter_schedule(self.rate, self.stages)):
+            scheduled_start = base_time + offset
+            wait = scheduled_start - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            
+            # 客户端来不及按计划发出（事件循环繁忙等），记录错过计划的次数和最大滞后
+            lag = time.time() - scheduled_start
+            self.max_schedule_lag = max(self.max_schedule_lag, lag)
+            if lag > SCHEDULE_TOLERANCE:
+                self.missed_schedule += 1
+            
+            task = asyncio.ensure_future(self.send_request(session, index, scheduled_start))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        
+        if pending:
+            await asyncio.gather(*pending)
+    
+    def describe_stages(self) -> str:
+        """开环模式的速率计划说明"""
+        if len(self.stages) == 1 and self.stages[0][0] == self.rate:
+            return f"恒定 {self.rate:g} 请求/秒"
+        parts = []
+        rate = self.rate
+        for target, duration in self.stages:
+            if target == rate:
+                parts.append(f"保持 {target:g}/s {duration:g}秒")
+            else:
+                parts.append(f"{rate:g}→{target:g}/s {duration:g}秒")
+            rate = target
+        return "，".join(parts)
     
     def generate_report(self):
         """生成测试报告"""
@@ -177,6 +981,10 @@ class HTTPStressTester:
         print(f"测试时间: {datetime.fromtimestamp(self.start_time).strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"总耗时: {total_time:.2f}秒")
         print(f"QPS (每秒请求数): {self.total_requests / total_time:.2f}")
+        if self.open_loop:
+            print(f"发压计划: {self.describe_stages()}")
+            print(f"错过计划: {self.missed_schedule} 个请求晚于计划时间 {SCHEDULE_TOLERANCE * 1000:.0f}ms 以上发出"
+                  f"，最大滞后 {self.max_schedule_lag * 1000:.2f} ms")
         print(f"\n{'='*60}")
         print(f"📈 请求统计")
         print(f"{'='*60}")
@@ -199,21 +1007,20 @@ class HTTPStressTester:
             percentage = (count / self.total_requests) * 100
             print(f"{status}: {count} ({percentage:.2f}%)")
         
-        if self.response_times:
+        if self.latency.count:
             print(f"\n{'='*60}")
             print(f"⏱️  响应时间统计")
             print(f"{'='*60}")
-            print(f"平均响应时间: {statistics.mean(self.response_times) * 1000:.2f} ms")
-            print(f"最快响应时间: {min(self.response_times) * 1000:.2f} ms")
-            print(f"最慢响应时间: {max(self.response_times) * 1000:.2f} ms")
-            print(f"中位数响应时间: {statistics.median(self.response_times) * 1000:.2f} ms")
+            if self.open_loop:
+                print("（从计划发出时间算起，包含客户端排队时间）")
+            print(f"平均响应时间: {self.latency.mean:.2f} ms")
+            print(f"最快响应时间: {self.latency.min:.2f} ms")
+            print(f"最慢响应时间: {self.latency.max:.2f} ms")
             
-            # 计算百分位数
-            sorted_times = sorted(self.response_times)
-            p95_index = int(len(sorted_times) * 0.95)
-            p99_index = int(len(sorted_times) * 0.99)
-            print(f"P95响应时间: {sorted_times[p95_index] * 1000:.2f} ms")
-            print(f"P99响应时间: {sorted_times[p99_index] * 1000:.2f} ms")
+            # 百分位数来自直方图，相对误差不超过 0.05%
+            for name, value in self.latency.percentiles().items():
+                label = "中位数" if name == "p50" else name.upper()
+                print(f"{label}响应时间: {value:.2f} ms")
         
         # 显示错误详情
         if self.error_details:
@@ -224,6 +1031,8 @@ class HTTPStressTester:
                 print(f"\n错误 #{i}:")
                 for key, value in error.items():
                     print(f"  {key}: {value}")
+            if self.errors_dropped:
+                print(f"\n另有 {self.errors_dropped} 个错误超出 {MAX_ERROR_DETAILS} 条上限，未保留详情")
         
         print(f"\n{'='*60}")
         
@@ -245,7 +1054,17 @@ class HTTPStressTester:
                 "method": self.method,
                 "total_requests": self.total_requests,
                 "concurrent": self.concurrent,
-                "timeout": self.timeout
+                "timeout": self.timeout,
+                "processes": self.processes,
+                "open_loop": self.open_loop,
+                "rate": self.rate,
+                "stages": [{"target_rate": target, "duration_seconds": duration} for target, duration in self.stages],
+                "scenario": {
+                    "requests": [template.name for template in self.scenario.templates],
+                    "weights": [template.weight for template in self.scenario.templates],
+                    "selection": self.scenario.selection,
+                    "data_rows": len(self.scenario.rows)
+                } if self.scenario else None
             },
             "test_time": {
                 "start": datetime.fromtimestamp(self.start_time).isoformat(),
@@ -257,22 +1076,59 @@ class HTTPStressTester:
                 "success_count": self.success_count,
                 "failure_count": self.failure_count,
                 "success_rate": f"{self.success_count/self.total_requests*100:.2f}%",
-                "qps": self.total_requests / (self.end_time - self.start_time)
+                "qps": self.total_requests / (self.end_time - self.start_time),
+                "missed_schedule": self.missed_schedule,
+                "max_schedule_lag_ms": self.max_schedule_lag * 1000
             },
             "status_codes": dict(self.status_codes),
             "response_times": {
-                "average_ms": statistics.mean(self.response_times) * 1000 if self.response_times else 0,
-                "min_ms": min(self.response_times) * 1000 if self.response_times else 0,
-                "max_ms": max(self.response_times) * 1000 if self.response_times else 0,
-                "median_ms": statistics.median(self.response_times) * 1000 if self.response_times else 0
+                "average_ms": self.latency.mean or 0,
+                "min_ms": self.latency.min if self.latency.count else 0,
+                "max_ms": self.latency.max,
+                "median_ms": self.latency.percentile(50) or 0,
+                "percentiles_ms": self.latency.percentiles(),
+                "histogram": self.latency.to_dict()
             },
-            "errors": self.error_details
+            "errors": self.error_details,
+            "errors_dropped": self.errors_dropped,
+            "timeseries": {
+                "interval_seconds": self.interval,
+                "windows": len(self.intervals),
+                "ndjson": f"{self.timeseries_prefix}.ndjson",
+                "csv": f"{self.timeseries_prefix}.csv"
+            } if self.timeseries_prefix and self.interval else None
         }
         
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(report_data, f, indent=2, ensure_ascii=False)
         
         print(f"✅ 详细报告已保存到: {filename}")
+        if report_data["timeseries"]:
+            print(f"✅ 时间序列已保存到: {self.timeseries_prefix}.ndjson / .csv")
+
+
+def run_load_process(options: Dict[str, Any], start_at: float,
+                     worker: int = 0, window_queue: Any = None) -> Dict[str, Any]:
+    """发压子进程入口：等到统一的开始时间后运行自己的事件循环，返回统计数据
+    
+    传入 window_queue 时每个时间窗口结束后发回父进程，结束时（包括创建压测器失败时）再发送完成标记。
+    开环时间表以 start_at 为起点，进程启动晚了也不会整体顺延，而是记为错过计划。
+    """
+    try:
+        tester = HTTPStressTester(**options)
+        tester.show_progress = False
+        tester.timeline_start = start_at
+        tester.schedule_base = start_at
+        if window_queue is not None:
+            tester.window_sink = lambda window: window_queue.put({"worker": worker, "window": window.export()})
+        wait = start_at - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        asyncio.run(tester.execute())
+    finally:
+        if window_queue is not None:
+            window_queue.put({"worker": worker, "done": True})
+    return tester.export_stats()
 
 
 def main():
@@ -293,13 +1149,28 @@ def main():
   
   # 添加自定义请求头
   python http_stress_test.py -u https://api.example.com/api -H "Authorization: Bearer token123" -H "Content-Type: application/json"
+  
+  # 开环模式：每秒固定发出 200 个请求，共 6000 个，响应时间从计划时间算起
+  python http_stress_test.py -u https://api.example.com/api --rate 200/s -n 6000
+  
+  # 分阶段：30 秒内从 0 升到 500/s，保持 60 秒，再 10 秒内降到 0
+  python http_stress_test.py -u https://api.example.com/api --stage 500/s:30s --stage 500/s:60s --stage 0:10s
+  
+  # 单个事件循环跑满一个 CPU 时，用 8 个进程共同发压
+  python http_stress_test.py -u https://api.example.com/api -n 1000000 -c 800 -p 8
+  
+  # 每 5 秒输出一行统计（请求/秒、错误状态码、P50/P95/P99），观察 502 在什么时间段集中出现
+  python http_stress_test.py -u https://api.example.com/api --rate 300/s -n 90000 --interval 5
+  
+  # 场景模式：按 JSONL 中的请求模板和权重混合发压，${user_id} 等变量取自 CSV 的每一行
+  python http_stress_test.py -u https://api.example.com --scenario scenario.jsonl --scenario-data users.csv --rate 500/s -n 30000
         """
     )
     
-    parser.add_argument("-u", "--url", required=True, help="目标URL")
-    parser.add_argument("-m", "--method", default="GET", 
+    parser.add_argument("-u", "--url", help="目标URL；场景模式下为模板中以 / 开头的相对地址的基础地址")
+    parser.add_argument("-m", "--method",
                        choices=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"],
-                       help="HTTP方法 (默认: GET)")
+                       help="HTTP方法 (默认: GET)；场景模式下由模板指定，不能使用")
     parser.add_argument("-n", "--number", type=int, default=1000,
                        help="总请求数 (默认: 1000)")
     parser.add_argument("-c", "--concurrent", type=int, default=50,
@@ -308,14 +1179,55 @@ def main():
                        help="请求超时时间(秒) (默认: 30)")
     parser.add_argument("-H", "--header", action="append", dest="headers",
                        help="自定义请求头，可以多次使用。格式: 'Key: Value'")
-    parser.add_argument("-d", "--data", help="请求体数据 (用于POST/PUT等)")
+    parser.add_argument("-d", "--data", help="请求体数据 (用于POST/PUT等)；场景模式下由模板指定，不能使用")
     parser.add_argument("--delay", type=float, default=0.0,
-                       help="请求间延迟时间(秒)，模拟真实用户行为 (默认: 0)")
+                       help="每个并发用户两次请求之间的延迟(秒)，模拟真实用户行为 (默认: 0)")
     parser.add_argument("--no-keepalive", action="store_true",
                        help="禁用HTTP连接复用，每个请求新建连接")
+    parser.add_argument("--rate", type=parse_rate, default=0.0,
+                       help="开环模式：按固定速率发出请求，如 200/s、6000/m；此时 -c 为连接数上限")
+    parser.add_argument("--stage", action="append", type=parse_stage, dest="stages",
+                       help="开环模式的发压阶段，格式 目标速率:持续时间（如 500/s:30s），速率从上一阶段线性变化到目标，"
+                            "第一阶段从 --rate（默认 0）开始，可多次使用；指定后总请求数由阶段决定")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                       help="发压进程数，每个进程运行独立的事件循环，平分请求数、并发数和速率 (默认: 1)")
+    parser.add_argument("--interval", type=float, default=0,
+                       help="时间序列统计间隔(秒)，指定后每个间隔输出一行并写入 NDJSON/CSV 文件 (默认: 0，关闭并显示进度)")
+    parser.add_argument("--scenario",
+                       help="场景文件（JSONL），每行一个请求模板: {\"method\", \"url\", \"headers\", \"body\", \"weight\", \"name\"}，"
+                            "可使用 ${变量} 引用 CSV 数据列或 ${index}")
+    parser.add_argument("--scenario-data",
+                       help="场景变量数据（CSV，首行为列名），每个请求依次取一行，用完后循环")
+    parser.add_argument("--selection", choices=Scenario.SELECTIONS, default="weighted",
+                       help="场景中请求模板的选择方式：weighted 按权重随机，round-robin 依次轮询 (默认: weighted)")
+    parser.add_argument("--seed", type=int,
+                       help="加权随机选择的随机种子，指定后每次运行的请求序列相同")
     
     args = parser.parse_args()
     
+    if (args.rate > 0 or args.stages) and args.delay > 0:
+        print("❌ 开环模式（--rate/--stage）按时间表发出请求，不能与 --delay 同时使用")
+        sys.exit(1)
+    if args.interval < 0:
+        print("❌ --interval 不能为负数")
+        sys.exit(1)
+    if args.processes > args.concurrent:
+        print("❌ 发压进程数（-p）不能大于并发数（-c），每个进程至少占用一个连接")
+        sys.exit(1)
+    if not args.url and not args.scenario:
+        print("❌ 请使用 -u 指定目标URL，或使用 --scenario 指定场景文件")
+        sys.exit(1)
+    
+    scenario = None
+    if args.scenario:
+        if args.method or args.data:
+            parser.error("--scenario 模式下请求方法和请求体由模板指定，不能同时使用 -m/--method 或 -d/--data")
+        try:
+            scenario = load_scenario(args.scenario, args.scenario_data, args.selection, args.url, args.seed)
+        except (OSError, ValueError) as e:
+            print(f"❌ 无法加载场景: {e}")
+            sys.exit(1)
+    
     # 解析请求头
     headers = {}
     if args.headers:
@@ -335,14 +1247,20 @@ def main():
     # 创建测试器并运行
     tester = HTTPStressTester(
         url=args.url,
-        method=args.method,
+        method=args.method or "GET",
         total_requests=args.number,
         concurrent=args.concurrent,
         timeout=args.timeout,
         headers=headers,
         body=body,
         delay=args.delay,
-        keepalive=not args.no_keepalive
+        keepalive=not args.no_keepalive,
+        rate=args.rate,
+        stages=args.stages,
+        processes=args.processes,
+        interval=args.interval,
+        scenario=scenario,
+        timeseries_prefix=f"data/stress_test_reports/stress_test_timeseries_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     )
     
     try:
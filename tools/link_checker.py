@@ -7,17 +7,46 @@
 """
 
 import argparse
+import asyncio
+import codecs
 import concurrent.futures
+import contextlib
+import contextvars
+import hashlib
+import hmac
+import heapq
+import itertools
 import json
+import math
+import mmap
+import os
+import queue
+import random
 import re
+import socket
+import sqlite3
+import struct
+import subprocess
 import sys
+import tempfile
+import threading
 import time
-from dataclasses import asdict, dataclass
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field, fields
+from email.utils import parsedate_to_datetime
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Set, TextIO, Tuple, Union
+from urllib.parse import urldefrag, urljoin, urlsplit
 
+import aiohttp
+import aiohttp.abc
 import requests
 from requests.utils import requote_uri
+from yarl import URL
 
 
 class Colors:
@@ -35,11 +64,59 @@ class Colors:
 
 
 URL_PATTERN = re.compile(r"https?://[^\s<>'\"]+", re.IGNORECASE)
+REDIRECT_STATUS_CODES = {301, 302, 303, 307, 308}
+THROTTLE_STATUS_CODES = {429, 503}
+RETRYABLE_ERRORS = {"Timeout", "ConnectionError"}
+MAX_REDIRECTS = 30
+# 这些 DNS 错误表示域名不存在，会被负缓存。
+DNS_NEGATIVE_ERRORS = {socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)}
+# iter_results 输入结束的标记，区别于表示“暂时没有新链接”的 None。
+_END_OF_INPUT = object()
+# 异步引擎中当前检查在连接池排队等待连接的累计秒数，由 aiohttp 的跟踪回调累加。
+_CONNECTION_WAIT: "contextvars.ContextVar[List[float]]" = contextvars.ContextVar("connection_wait")
+# 爬取模式下不会是 HTML 页面、无需下载解析的扩展名。
+NON_HTML_EXTENSIONS = {
+    ".7z", ".avi", ".bmp", ".css", ".csv", ".doc", ".docx", ".exe", ".gif", ".gz", ".ico", ".jpeg", ".jpg",
+    ".js", ".json", ".mov", ".mp3", ".mp4", ".pdf", ".png", ".ppt", ".pptx", ".svg", ".tar", ".tgz", ".txt",
+    ".wav", ".webm", ".webp", ".woff", ".woff2", ".xls", ".xlsx", ".xml", ".zip",
+}
+# 分布式模式下默认的主机分片数，同一主机的链接总在同一分片，由同一个工作进程检查。
+DEFAULT_SHARD_COUNT = 256
+# 分布式工作进程的分片租约（秒）。心跳线程每隔三分之一租约续租一次，进程异常退出后最多这么久分片即可被接手。
+QUEUE_LEASE_SECONDS = 30.0
+# 队列全部完成后，协调者继续提供服务等待远程工作进程确认完成的最长秒数，之后关闭监听。
+QUEUE_LINGER_SECONDS = 5.0
+# 远程工作进程调用协调者失败（网络抖动、协调者繁忙）时的重试次数。
+QUEUE_RPC_RETRIES = 3
+# 主机调度器默认最多预读的待发送任务数，与重排缓冲区无关；链接集中在少数主机时，
+# 预读足够多的任务才能看到其他主机，让空闲名额分给它们。每个任务只有序号和 URL，一万个约 1～2 MB。
+SCHEDULER_LOOKAHEAD = 10000
+# 自适应并发模式下默认的并发上限。
+ADAPTIVE_MAX_CONCURRENCY = 500
+# 窗口平均耗时超过基线的倍数之外，还需超出的绝对毫秒数，避免本地极低耗时下的抖动被当作拥塞。
+ADAPTIVE_LATENCY_SLACK_MS = 20.0
+# 耗时基线的下限（毫秒），基线不会被极快的响应压到 0。
+ADAPTIVE_MIN_BASELINE_MS = 1.0
+# 列式报告文件的扩展名和魔数，--output 以该扩展名结尾时写列式报告。
+COLUMNAR_REPORT_SUFFIX = ".lcr"
+COLUMNAR_MAGIC = b"LCR1"
+# 流式读取大文件时每块的字节数。
+EXTRACT_CHUNK_SIZE = 4 * 1024 * 1024
+# GET 检查时读取响应体的块大小。
+BODY_CHUNK_SIZE = 16 * 1024
 
 
-@dataclass
+# Python 3.10 起 dataclass 支持 slots，去掉每个实例的 __dict__。
+_DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class LinkResult:
-    """单个链接的检查结果。"""
+    """单个链接的检查结果。
+
+    整个运行期间每个链接保留一条，因此尽量省内存：使用 slots，跳转链为元组（空链共享同一个 ()），
+    状态文本、方法、协议等重复字符串经过 intern，最终地址与检查地址相同时共用同一个字符串。
+    """
 
     index: int
     input_url: str
@@ -49,11 +126,74 @@ class LinkResult:
     status_text: str
     ok: bool
     redirected: bool
-    redirect_chain: List[str]
+    redirect_chain: Tuple[str, ...]
     method_used: str
     elapsed_ms: float
     error: Optional[str] = None
     message: Optional[str] = None
+    # 结果来自 --cache 缓存，本次未重新检查完整请求。
+    cached: bool = False
+    # 结果直接取自本次运行的重定向备忘，没有发出请求。
+    memoized: bool = False
+    # 结果沿用 --since 历史报告，本次没有检查这个链接。
+    reused: bool = False
+    # 服务器限流（429/503）时 Retry-After 要求等待的秒数。
+    retry_after: Optional[float] = None
+    attempts: int = 1
+    # 最终响应使用的协议，如 HTTP/1.1、HTTP/2。
+    protocol: Optional[str] = None
+    # 最终响应实际读取的响应体字节数（未解压）。
+    bytes_transferred: int = 0
+    # 爬取模式下链接所在的页面和爬取深度，输入链接的深度为 0。
+    found_on: Optional[str] = None
+    depth: Optional[int] = None
+
+
+@dataclass
+class ResultSummary:
+    """检查结果的汇总计数，可以边检查边累加。"""
+
+    total: int = 0
+    valid: int = 0
+    invalid: int = 0
+    failed: int = 0
+    redirected: int = 0
+    cached: int = 0
+    reused: int = 0
+    retried: int = 0
+    protocols: Dict[str, int] = field(default_factory=dict)
+    bytes_transferred: int = 0
+
+    def add(self, result: LinkResult) -> None:
+        """累加一条结果。"""
+
+        self.total += 1
+        if result.ok:
+            self.valid += 1
+        elif result.error:
+            self.failed += 1
+        else:
+            self.invalid += 1
+        if result.redirected:
+            self.redirected += 1
+        if result.cached:
+            self.cached += 1
+        if result.reused:
+            self.reused += 1
+        if result.attempts > 1:
+            self.retried += 1
+        if result.protocol:
+            self.protocols[result.protocol] = self.protocols.get(result.protocol, 0) + 1
+        self.bytes_transferred += result.bytes_transferred
+
+    @classmethod
+    def from_results(cls, results: Iterable[LinkResult]) -> "ResultSummary":
+        """根据已有结果生成汇总。"""
+
+        summary = cls()
+        for result in results:
+            summary.add(result)
+        return summary
 
 
 def parse_key_value_pairs(pairs: Optional[Sequence[str]]) -> Dict[str, str]:
@@ -100,21 +240,10 @@ def extract_urls_from_text(text: str) -> List[str]:
     return urls
 
 
-def load_urls_from_file(file_path: str) -> List[str]:
-    """从文件中提取链接，支持纯文本、Markdown、HTML、JSON 等内容。"""
-
-    path = Path(file_path)
-    if not path.exists():
-        raise FileNotFoundError(f"文件不存在: {file_path}")
+def extract_urls_from_lines(text: str) -> List[str]:
+    """按行提取链接（不去重），是文件提取的核心逻辑，可在子进程中执行。"""
 
-    text = path.read_text(encoding="utf-8", errors="ignore")
     urls: List[str] = []
-    seen: Set[str] = set()
-
-    def add_url(candidate: Optional[str]) -> None:
-        if candidate and candidate not in seen:
-            seen.add(candidate)
-            urls.append(candidate)
 
     # 优先按“整行 URL”读取，兼容文件名里包含空格的场景。
     for raw_line in text.splitlines():
@@ -124,41 +253,428 @@ def load_urls_from_file(file_path: str) -> List[str]:
 
         normalized_line_url = normalize_url(line)
         if normalized_line_url:
-            add_url(normalized_line_url)
+            urls.append(normalized_line_url)
             continue
 
         # 对混合文本（markdown/html/json）再走正则提取。
-        for item in extract_urls_from_text(line):
-            add_url(item)
+        urls.extend(extract_urls_from_text(line))
 
     return urls
 
 
-def collect_urls(urls: Iterable[Optional[str]], files: Iterable[str], read_stdin: bool) -> List[str]:
-    """合并命令行、文件和标准输入中的链接，并去重保序。"""
+def _extract_urls_from_chunk(chunk: bytes) -> List[str]:
+    """解码一个按行对齐的数据块并提取链接。"""
+
+    return extract_urls_from_lines(chunk.decode("utf-8", errors="ignore"))
+
+
+def iter_file_chunks(file_path: str, chunk_size: int = EXTRACT_CHUNK_SIZE, use_mmap: bool = False) -> Iterator[bytes]:
+    """按块读取文件，每块都在换行处截断，跨块的行拼到下一块，保证 URL 不被切开。"""
+
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"文件不存在: {file_path}")
+
+    with path.open("rb") as source:
+        if use_mmap and path.stat().st_size > 0:
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                start = 0
+                size = len(mapped)
+                while start < size:
+                    end = min(size, start + chunk_size)
+                    if end < size:
+                        newline = mapped.rfind(b"\n", start, end)
+                        end = newline + 1 if newline >= start else (mapped.find(b"\n", end) + 1 or size)
+                    yield mapped[start:end]
+                    start = end
+            return
+
+        carry = b""
+        while True:
+            block = source.read(chunk_size)
+            if not block:
+                break
+            block = carry + block
+            newline = block.rfind(b"\n")
+            if newline < 0:
+                carry = block
+                continue
+            carry = block[newline + 1:]
+            yield block[:newline + 1]
 
-    collected: List[str] = []
+        if carry:
+            yield carry
+
+
+def iter_urls_from_file(
+    file_path: str,
+    workers: int = 0,
+    use_mmap: bool = False,
+    chunk_size: int = EXTRACT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """流式提取文件中的链接（不去重），按文件顺序产出。
+
+    workers 大于 0 时把各块的正则提取分给进程池，同时最多预读 2 * workers 个块，
+    内存占用与文件大小无关。
+    """
+
+    chunks = iter_file_chunks(file_path, chunk_size, use_mmap)
+
+    if workers <= 0:
+        for chunk in chunks:
+            yield from _extract_urls_from_chunk(chunk)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: Deque[concurrent.futures.Future] = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_extract_urls_from_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def load_urls_from_file(file_path: str, workers: int = 0, use_mmap: bool = False) -> List[str]:
+    """从文件中提取链接，支持纯文本、Markdown、HTML、JSON 等内容。"""
+
+    urls: List[str] = []
     seen: Set[str] = set()
 
-    def add_url(value: Optional[str]) -> None:
+    for url in iter_urls_from_file(file_path, workers=workers, use_mmap=use_mmap):
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+
+    return urls
+
+
+class ExactDeduplicator:
+    """基于 set 的精确去重，每个 URL 约占用 100 字节以上。"""
+
+    def __init__(self) -> None:
+        self._seen: Set[str] = set()
+
+    def add(self, url: str) -> bool:
+        """记录 URL，首次出现时返回 True。"""
+
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        return True
+
+
+class FingerprintDeduplicator:
+    """64 位指纹 + 开放寻址数组表，每个 URL 约占用 10-20 字节。
+
+    不同 URL 的指纹碰撞概率约为 n² / 2^65，1 亿个 URL 时整体误判期望值约万分之三。
+    """
+
+    MAX_LOAD = 0.8
+
+    def __init__(self, capacity: int = 1 << 20):
+        size = 1 << max(4, int(capacity / self.MAX_LOAD).bit_length())
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _fingerprint(url: str) -> int:
+        value = int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")
+        # 0 表示空槽位。
+        return value or 1
+
+    def add(self, url: str) -> bool:
+        """记录 URL，首次出现时返回 True。"""
+
+        if self._count + 1 > len(self._slots) * self.MAX_LOAD:
+            self._grow()
+        return self._insert(self._fingerprint(url))
+
+    def _insert(self, fingerprint: int) -> bool:
+        slots = self._slots
+        mask = self._mask
+        position = fingerprint & mask
+
+        while True:
+            current = slots[position]
+            if current == 0:
+                slots[position] = fingerprint
+                self._count += 1
+                return True
+            if current == fingerprint:
+                return False
+            position = (position + 1) & mask
+
+    def _grow(self) -> None:
+        old_slots = self._slots
+        self._slots = array("Q", bytes(16 * len(old_slots)))
+        self._mask = len(self._slots) - 1
+        self._count = 0
+        for fingerprint in old_slots:
+            if fingerprint:
+                self._insert(fingerprint)
+
+
+class BloomDeduplicator:
+    """Bloom 过滤器去重，内存固定，每个 URL 约占 1.44 * log2(1/error_rate) 位（0.1% 时不到 2 字节）。
+
+    不会漏掉重复 URL，但会以约 error_rate 的概率把新 URL 误判为重复而跳过。
+    """
+
+    def __init__(self, capacity: int = 1 << 20, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        error_rate = min(max(error_rate, 1e-12), 0.5)
+        self._size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._hashes = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+
+    def add(self, url: str) -> bool:
+        """记录 URL，判断为首次出现时返回 True。"""
+
+        digest = hashlib.blake2b(url.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        bits = self._bits
+        is_new = False
+
+        for number in range(self._hashes):
+            position = (first + number * step) % self._size
+            byte_index = position >> 3
+            mask = 1 << (position & 7)
+            if not bits[byte_index] & mask:
+                bits[byte_index] |= mask
+                is_new = True
+
+        return is_new
+
+
+UrlDeduplicator = Union[ExactDeduplicator, FingerprintDeduplicator, BloomDeduplicator]
+
+
+def create_deduplicator(kind: str = "exact", capacity: int = 1 << 20, error_rate: float = 0.001) -> UrlDeduplicator:
+    """按名称创建去重器：exact / fingerprint / bloom。"""
+
+    if kind == "exact":
+        return ExactDeduplicator()
+    if kind == "fingerprint":
+        return FingerprintDeduplicator(capacity)
+    if kind == "bloom":
+        return BloomDeduplicator(capacity, error_rate)
+    raise ValueError(f"未知的去重方式: {kind}")
+
+
+class SpillQueue:
+    """保持插入顺序的 URL 队列，超过内存上限的部分写入临时文件。
+
+    同一时间只能有一个迭代器在读取。
+    """
+
+    def __init__(self, memory_limit: int = 100_000):
+        self.memory_limit = max(0, memory_limit)
+        self._memory: List[str] = []
+        self._spill: Optional[TextIO] = None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, url: str) -> None:
+        """追加一个 URL。"""
+
+        self._count += 1
+        if self._spill is None and len(self._memory) < self.memory_limit:
+            self._memory.append(url)
+            return
+
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self._spill.seek(0, 2)
+        self._spill.write(url)
+        self._spill.write("\n")
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._memory
+        if self._spill is None:
+            return
+
+        self._spill.flush()
+        self._spill.seek(0)
+        for line in self._spill:
+            yield line.rstrip("\n")
+
+    def close(self) -> None:
+        """删除临时文件。"""
+
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+
+def iter_collect_urls(
+    urls: Iterable[Optional[str]],
+    files: Iterable[str],
+    read_stdin: bool,
+    workers: int = 0,
+    use_mmap: bool = False,
+    deduplicator: Optional[UrlDeduplicator] = None,
+) -> Iterator[str]:
+    """流式合并命令行、文件和标准输入中的链接，去重保序，边读边产出。
+
+    默认用 set 精确去重，超大输入可传入 FingerprintDeduplicator 或 BloomDeduplicator 控制内存。
+    """
+
+    seen = deduplicator or ExactDeduplicator()
+
+    def sources() -> Iterator[Optional[str]]:
+        yield from urls
+        for file_path in files:
+            yield from iter_urls_from_file(file_path, workers=workers, use_mmap=use_mmap)
+        if read_stdin:
+            for line in sys.stdin:
+                yield from extract_urls_from_text(line)
+
+    for value in sources():
         normalized = normalize_url(value or "")
-        if normalized and normalized not in seen:
-            seen.add(normalized)
-            collected.append(normalized)
+        if normalized and seen.add(normalized):
+            yield normalized
+
+
+def collect_urls(
+    urls: Iterable[Optional[str]],
+    files: Iterable[str],
+    read_stdin: bool,
+    workers: int = 0,
+    use_mmap: bool = False,
+    deduplicator: Optional[UrlDeduplicator] = None,
+) -> List[str]:
+    """合并命令行、文件和标准输入中的链接，并去重保序。"""
+
+    return list(
+        iter_collect_urls(urls, files, read_stdin, workers=workers, use_mmap=use_mmap, deduplicator=deduplicator)
+    )
+
+
+def result_from_dict(data: Dict[str, Any]) -> LinkResult:
+    """把报告中的结果字典还原为 LinkResult，忽略未知字段。"""
+
+    known_fields = {item.name for item in fields(LinkResult)}
+    values = {key: value for key, value in data.items() if key in known_fields}
+    values["redirect_chain"] = tuple(values.get("redirect_chain") or ())
+    return LinkResult(**values)
+
+
+def load_report_results(file_path: str) -> Dict[str, LinkResult]:
+    """读取历史报告中的结果，按输入 URL 建立索引。
+
+    同时支持 --output 导出的 JSON 报告、--stream 模式写出的 NDJSON 报告和 .lcr 列式报告。
+    """
+
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"报告不存在: {file_path}")
+
+    results: Dict[str, LinkResult] = {}
+
+    with path.open("rb") as report_file:
+        is_columnar = report_file.read(len(COLUMNAR_MAGIC)) == COLUMNAR_MAGIC
+    if is_columnar:
+        for result in ColumnarReport(file_path).iter_results():
+            results[result.input_url] = result
+        return results
+
+    with path.open("r", encoding="utf-8") as report_file:
+        first_line = report_file.readline()
+        try:
+            first_record = json.loads(first_line)
+        except json.JSONDecodeError:
+            first_record = None
+
+        if isinstance(first_record, dict) and first_record.get("type") == "meta":
+            for line in report_file:
+                record = json.loads(line)
+                if record.get("type") == "result":
+                    result = result_from_dict(record)
+                    results[result.input_url] = result
+            return results
+
+        report = json.loads(first_line + report_file.read())
+
+    for record in report.get("results", []):
+        result = result_from_dict(record)
+        results[result.input_url] = result
+    return results
+
+
+@dataclass
+class IncrementalPlan:
+    """--since 增量检查计划。"""
+
+    urls: List[str]
+    positions: List[int]
+    reused: List[LinkResult]
+
+    def restore_index(self, result: LinkResult) -> LinkResult:
+        """把子集检查结果的序号映射回完整输入中的序号。"""
+
+        result.index = self.positions[result.index - 1]
+        return result
+
+
+def plan_incremental_check(
+    urls: Sequence[str],
+    previous: Dict[str, LinkResult],
+    valid_status_codes: Optional[Set[int]] = None,
+) -> IncrementalPlan:
+    """对比历史报告：新增链接和上次无效的链接需要检查，其余沿用历史结果。
 
-    for url in urls:
-        add_url(url)
+    历史结果是否有效按本次的 --valid-status 重新判断，而不是照搬报告里的 ok。
+    """
 
-    for file_path in files:
-        for url in load_urls_from_file(file_path):
-            add_url(url)
+    valid_status_codes = valid_status_codes or set(range(200, 400))
+    plan = IncrementalPlan(urls=[], positions=[], reused=[])
 
-    if read_stdin:
-        stdin_text = sys.stdin.read()
-        for url in extract_urls_from_text(stdin_text):
-            add_url(url)
+    for position, url in enumerate(urls, start=1):
+        old_result = previous.get(url)
+        if old_result is None or old_result.error or old_result.status_code not in valid_status_codes:
+            plan.urls.append(url)
+            plan.positions.append(position)
+            continue
+
+        old_result.index = position
+        old_result.ok = True
+        old_result.cached = False
+        old_result.memoized = False
+        old_result.reused = True
+        plan.reused.append(old_result)
+
+    return plan
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头，支持秒数和 HTTP 日期两种格式。"""
+
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
 
-    return collected
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def url_host(url: str) -> str:
+    """返回用于按主机调度的 host:port。"""
+
+    return urlsplit(url).netloc.lower()
 
 
 def parse_status_spec(spec: str) -> Set[int]:
@@ -197,257 +713,3139 @@ def parse_status_spec(spec: str) -> Set[int]:
     return allowed
 
 
-class LinkChecker:
-    """批量链接检查器。"""
+@dataclass
+class CacheEntry:
+    """缓存中保存的一条检查记录。"""
 
-    def __init__(
-        self,
-        timeout: float = 10.0,
-        verify_ssl: bool = True,
-        follow_redirects: bool = True,
-        trace_redirects: bool = True,
-        method: str = "HEAD",
-        headers: Optional[Dict[str, str]] = None,
-        valid_status_codes: Optional[Set[int]] = None,
-    ):
-        self.timeout = timeout
-        self.verify_ssl = verify_ssl
-        self.follow_redirects = follow_redirects
-        self.trace_redirects = trace_redirects
-        self.method = method.upper()
-        self.headers = headers or {}
-        self.valid_status_codes = valid_status_codes or set(range(200, 400))
-        self.session = requests.Session()
+    url: str
+    final_url: Optional[str]
+    status_code: int
+    status_text: str
+    redirected: bool
+    redirect_chain: List[str]
+    method_used: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    checked_at: float
 
-    def check_one(self, index: int, url: str) -> LinkResult:
-        """检查单个链接。"""
+    def conditional_headers(self) -> Dict[str, str]:
+        """重新验证时携带的条件请求头。"""
 
-        start_time = time.time()
-        checked_url = url
-        method_used = self.method
-        redirect_chain: List[str] = []
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
 
-        try:
-            response = self._send(method_used, checked_url)
+    def to_result(self, index: int, input_url: str, valid_status_codes: Set[int], elapsed_ms: float = 0.0) -> LinkResult:
+        """把缓存记录还原成检查结果，按本次的有效状态码重新判断是否有效。"""
 
-            if self.method == "HEAD" and response.status_code in {405, 501}:
-                method_used = "GET"
-                response = self._send(method_used, checked_url)
-
-            elapsed_ms = (time.time() - start_time) * 1000
-            final_url = response.url if self.trace_redirects else checked_url
-            status_code = response.status_code
-            status_text = response.reason or ""
-            redirected = response.is_redirect or bool(response.history)
-            if self.trace_redirects and response.history:
-                redirect_chain = [item.url for item in response.history] + [response.url]
-            ok = status_code in self.valid_status_codes
-
-            return LinkResult(
-                index=index,
-                input_url=url,
-                checked_url=checked_url,
-                final_url=final_url,
-                status_code=status_code,
-                status_text=status_text,
-                ok=ok,
-                redirected=redirected,
-                redirect_chain=redirect_chain,
-                method_used=method_used,
-                elapsed_ms=elapsed_ms,
-            )
+        return LinkResult(
+            index=index,
+            input_url=input_url,
+            checked_url=self.url,
+            final_url=self.final_url,
+            status_code=self.status_code,
+            status_text=self.status_text,
+            ok=self.status_code in valid_status_codes,
+            redirected=self.redirected,
+            redirect_chain=tuple(self.redirect_chain),
+            method_used=self.method_used,
+            elapsed_ms=elapsed_ms,
+            cached=True,
+        )
 
-        except requests.exceptions.Timeout:
-            elapsed_ms = (time.time() - start_time) * 1000
-            return LinkResult(
-                index=index,
-                input_url=url,
-                checked_url=checked_url,
-                final_url=None,
-                status_code=None,
-                status_text="",
-                ok=False,
-                redirected=False,
-                redirect_chain=[],
-                method_used=method_used,
-                elapsed_ms=elapsed_ms,
-                error="Timeout",
-                message=f"请求超时（{self.timeout}秒）",
-            )
-        except requests.exceptions.ConnectionError as exc:
-            elapsed_ms = (time.time() - start_time) * 1000
-            return LinkResult(
-                index=index,
-                input_url=url,
-                checked_url=checked_url,
-                final_url=None,
-                status_code=None,
-                status_text="",
-                ok=False,
-                redirected=False,
-                redirect_chain=[],
-                method_used=method_used,
-                elapsed_ms=elapsed_ms,
-                error="ConnectionError",
-                message=str(exc),
-            )
-        except requests.exceptions.RequestException as exc:
-            elapsed_ms = (time.time() - start_time) * 1000
-            return LinkResult(
-                index=index,
-                input_url=url,
-                checked_url=checked_url,
-                final_url=None,
-                status_code=None,
-                status_text="",
-                ok=False,
-                redirected=False,
-                redirect_chain=[],
-                method_used=method_used,
-                elapsed_ms=elapsed_ms,
-                error=type(exc).__name__,
-                message=str(exc),
+
+class LinkCache:
+    """基于 SQLite 的持久化检查缓存，以规范化后的 URL 为键。
+
+    只缓存有效的结果：TTL 内的记录直接复用，过期记录带上 ETag/Last-Modified
+    发送条件请求，服务器返回 304 时沿用缓存结果并刷新检查时间。
+    """
+
+    def __init__(self, db_path: str, ttl: float = 86400.0, commit_every: int = 200):
+        self.path = Path(db_path)
+        self.ttl = ttl
+        self.commit_every = max(1, commit_every)
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS link_cache (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                status_code INTEGER NOT NULL,
+                status_text TEXT NOT NULL,
+                redirected INTEGER NOT NULL,
+                redirect_chain TEXT NOT NULL,
+                method_used TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at REAL NOT NULL
             )
+            """
+        )
+        self._conn.commit()
 
-    def _send(self, method: str, url: str) -> requests.Response:
-        """发送请求并返回响应。"""
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """读取缓存记录，不存在时返回 None。"""
 
-        return self.session.request(
-            method=method,
-            url=url,
-            headers=self.headers or None,
-            timeout=self.timeout,
-            verify=self.verify_ssl,
-            allow_redirects=self.follow_redirects,
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, final_url, status_code, status_text, redirected, redirect_chain, "
+                "method_used, etag, last_modified, checked_at FROM link_cache WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return CacheEntry(
+            url=row[0],
+            final_url=row[1],
+            status_code=row[2],
+            status_text=row[3],
+            redirected=bool(row[4]),
+            redirect_chain=json.loads(row[5]),
+            method_used=row[6],
+            etag=row[7],
+            last_modified=row[8],
+            checked_at=row[9],
         )
 
-    def check_urls(self, urls: Sequence[str], concurrency: int) -> List[LinkResult]:
-        """并发检查多个链接。"""
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """判断记录是否仍在 TTL 内。"""
 
-        if not urls:
-            return []
+        return time.time() - entry.checked_at < self.ttl
 
-        worker_count = max(1, concurrency)
-        results: List[Optional[LinkResult]] = [None] * len(urls)
+    def store(self, result: LinkResult, headers: Any) -> None:
+        """保存检查结果，无效结果会清除旧记录以便下次重新检查。"""
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=worker_count) as executor:
-            future_map = {
-                executor.submit(self.check_one, index + 1, url): index
-                for index, url in enumerate(urls)
-            }
+        if not result.ok or result.status_code is None:
+            self._write("DELETE FROM link_cache WHERE url = ?", (result.checked_url,))
+            return
 
-            for future in concurrent.futures.as_completed(future_map):
-                index = future_map[future]
-                results[index] = future.result()
+        self._write(
+            "INSERT OR REPLACE INTO link_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                result.checked_url,
+                result.final_url,
+                result.status_code,
+                result.status_text,
+                int(result.redirected),
+                json.dumps(result.redirect_chain),
+                result.method_used,
+                headers.get("ETag"),
+                headers.get("Last-Modified"),
+                time.time(),
+            ),
+        )
 
-        return [result for result in results if result is not None]
+    def touch(self, url: str) -> None:
+        """条件请求确认未变化后刷新检查时间。"""
 
+        self._write("UPDATE link_cache SET checked_at = ? WHERE url = ?", (time.time(), url))
 
-class ResultPrinter:
-    """结果打印器。"""
+    def _write(self, sql: str, params: Sequence[Any]) -> None:
+        """批量提交写操作，减少磁盘同步次数。"""
 
-    @staticmethod
-    def print_summary(results: Sequence[LinkResult], total_elapsed_ms: float) -> None:
-        """打印汇总信息。"""
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._pending_writes += 1
+            if self._pending_writes >= self.commit_every:
+                self._conn.commit()
+                self._pending_writes = 0
 
-        total = len(results)
-        valid = sum(1 for result in results if result.ok)
-        invalid = sum(1 for result in results if not result.ok and not result.error)
-        failed = sum(1 for result in results if result.error)
-        redirected = sum(1 for result in results if result.redirected)
+    def close(self) -> None:
+        """提交剩余写入并关闭数据库。"""
 
-        print()
-        print(f"{Colors.BOLD}{Colors.CYAN}检查完成{Colors.RESET}")
-        print(f"{Colors.GRAY}总数: {total}{Colors.RESET}")
-        print(f"{Colors.GREEN}有效: {valid}{Colors.RESET}")
-        print(f"{Colors.YELLOW}重定向: {redirected}{Colors.RESET}")
-        print(f"{Colors.RED}无效: {invalid}{Colors.RESET}")
-        print(f"{Colors.RED}错误: {failed}{Colors.RESET}")
-        print(f"{Colors.GRAY}总耗时: {total_elapsed_ms:.2f} ms{Colors.RESET}")
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
 
-    @staticmethod
-    def print_result(result: LinkResult, verbose: bool = False) -> None:
-        """打印单条结果。"""
 
+@dataclass
+class RetryPolicy:
+    """瞬时失败（超时、连接错误、429、5xx）的重试策略。
+
+    重试间隔按指数退避并加入随机抖动，服务器给出 Retry-After 时不短于该值；
+    全局重试次数不超过 budget_min + budget_ratio * 已发请求数，避免大面积故障时重试风暴。
+    """
+
+    max_retries: int = 2
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    jitter: bool = True
+    budget_ratio: float = 0.2
+    budget_min: int = 10
+
+    def is_retryable(self, result: LinkResult) -> bool:
+        """判断结果是否属于值得重试的瞬时失败。"""
+
+        if result.ok:
+            return False
         if result.error:
-            print(
-                f"[{result.index:03d}] {Colors.RED}FAIL{Colors.RESET} "
-                f"{Colors.GRAY}{result.elapsed_ms:8.2f} ms{Colors.RESET}  {result.input_url}"
-            )
-            print(f"      {Colors.RED}{result.error}: {result.message}{Colors.RESET}")
-            return
+            return result.error in RETRYABLE_ERRORS
+        return result.status_code == 429 or (result.status_code or 0) >= 500
 
-        if result.redirected and result.ok:
-            status_color = Colors.YELLOW
-            label = "REDIRECT_OK"
-        elif result.redirected and not result.ok:
-            status_color = Colors.RED
-            label = "REDIRECT_BAD"
-        elif result.ok:
-            status_color = Colors.GREEN
-            label = "OK"
-        else:
-            status_color = Colors.RED
-            label = "BAD"
+    def within_budget(self, retries: int, requests_sent: int) -> bool:
+        """判断全局重试预算是否还有余量。"""
 
-        final_part = ""
-        if result.redirected and result.final_url:
-            final_part = f" -> {result.final_url}"
+        return retries < self.budget_min + self.budget_ratio * requests_sent
 
-        status_text = f"{result.status_code} {result.status_text}".strip()
-        print(
-            f"[{result.index:03d}] {status_color}{label}{Colors.RESET} "
-            f"{Colors.GRAY}{result.elapsed_ms:8.2f} ms{Colors.RESET}  "
-            f"{status_text}{final_part}"
-        )
+    def backoff(self, retry_number: int, retry_after: Optional[float] = None) -> float:
+        """第 retry_number 次重试前需要等待的秒数。"""
 
-        if not result.ok:
-            print(f"      {Colors.RED}原始链接: {result.input_url}{Colors.RESET}")
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (retry_number - 1)))
+        if self.jitter:
+            delay = random.uniform(delay / 2, delay)
+        return max(delay, retry_after or 0.0)
 
-        if verbose:
-            print(f"      {Colors.GRAY}输入: {result.input_url}{Colors.RESET}")
-            print(f"      {Colors.GRAY}方法: {result.method_used}{Colors.RESET}")
-            if result.redirect_chain:
-                print(f"      {Colors.GRAY}跳转链: {' -> '.join(result.redirect_chain)}{Colors.RESET}")
 
+def is_congestion_signal(result: LinkResult) -> bool:
+    """判断结果是否说明对端或网络过载：超时、连接错误、429、5xx。"""
 
-def build_report(results: Sequence[LinkResult], args: argparse.Namespace, urls: Sequence[str], elapsed_ms: float) -> Dict[str, Any]:
-    """构造导出报告。"""
+    if result.error:
+        return result.error in RETRYABLE_ERRORS
+    return result.status_code == 429 or (result.status_code or 0) >= 500
 
-    valid = sum(1 for result in results if result.ok)
-    invalid = sum(1 for result in results if not result.ok and not result.error)
-    failed = sum(1 for result in results if result.error)
 
-    return {
-        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "options": {
-            "method": args.method,
-            "timeout": args.timeout,
-            "concurrency": args.concurrency,
-            "follow_redirects": args.trace_redirects,
-            "trace_redirects": args.trace_redirects,
-            "verify_ssl": not args.no_ssl_verify,
-            "valid_status": args.valid_status,
-            "headers": args.header or [],
-        },
-        "summary": {
-            "total": len(results),
-            "valid": valid,
-            "invalid": invalid,
-            "failed": failed,
-            "elapsed_ms": elapsed_ms,
-        },
-        "input_urls": list(urls),
-        "results": [asdict(result) for result in results],
-    }
+class _AimdLimit:
+    """单个 AIMD 并发上限（全局或某个主机）。
 
+    窗口大小为当前上限，大致对应一个往返。窗口内拥塞信号超过 1 个且超过上限的 error_threshold 比例，
+    或收到明确的限流响应时立即乘性减小；减小时已在途的请求随后完成时不再计入，避免同一批过载请求
+    连续触发回退。窗口结束时平均耗时超过
+    基线的 latency_tolerance 倍同样减小，否则只要窗口内名额被用满就增大：首次减小前每个窗口翻倍
+    （慢启动），之后每个窗口加 1。已在下限时耗时仍偏高说明与本端并发无关，直接以当前耗时作为新基线。
+    """
 
-def main() -> None:
-    """命令行入口。"""
+    def __init__(self, initial: int, minimum: int, maximum: int, error_threshold: float):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.value = float(min(self.maximum, max(self.minimum, initial)))
+        self.error_threshold = error_threshold
+        self.slow_start = True
+        self.in_flight = 0
+        self.draining = 0
+        self.baseline_ms: Optional[float] = None
+        self._reset_window()
 
-    parser = argparse.ArgumentParser(
-        description="链接有效性检查工具 - 批量验证 URL 是否可访问",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self.value))
+
+    def _reset_window(self) -> None:
+        self.completions = 0
+        self.signals = 0
+        self.latency_total = 0.0
+        self.latency_count = 0
+        self.saturated = self.in_flight >= self.limit
+
+    def _decrease(self, backoff: float) -> int:
+        self.slow_start = False
+        self.value = max(float(self.minimum), self.value * backoff)
+        self.draining = self.in_flight
+        self._reset_window()
+        return -1
+
+    def on_submit(self) -> None:
+        self.in_flight += 1
+        if self.in_flight >= self.limit:
+            self.saturated = True
+
+    def on_complete(
+        self,
+        congested: bool,
+        latency_ms: Optional[float],
+        backoff: float,
+        latency_tolerance: float,
+        throttled: bool = False,
+    ) -> int:
+        """记录一次完成并按需调整上限，返回 1 表示增大，-1 表示减小，0 表示不变。
+
+        latency_ms 为 None 表示没有实际请求（缓存、重定向备忘命中），不计入耗时统计。
+        """
+
+        self.in_flight -= 1
+        if self.draining:
+            self.draining -= 1
+            return 0
+
+        self.completions += 1
+        if throttled:
+            return self._decrease(backoff)
+        if congested:
+            self.signals += 1
+            # 个别链接本身就返回 5xx 很常见，单个信号不足以说明过载。
+            if self.signals > max(1.0, self.error_threshold * self.limit):
+                return self._decrease(backoff)
+        elif latency_ms is not None:
+            self.latency_total += latency_ms
+            self.latency_count += 1
+        if self.completions < self.limit:
+            return 0
+
+        latency_high = False
+        if self.latency_count:
+            mean = self.latency_total / self.latency_count
+            if self.baseline_ms is not None:
+                latency_high = mean > self.baseline_ms * latency_tolerance + ADAPTIVE_LATENCY_SLACK_MS
+            if latency_high and self.limit <= self.minimum:
+                # 已无法再减小，耗时偏高不是本端并发造成的，重新学习基线。
+                latency_high = False
+                self.baseline_ms = mean
+            # 基线缓慢上浮，对端整体变慢后能重新学习，而不是一直减小到下限。
+            baseline = mean if self.baseline_ms is None else min(mean, self.baseline_ms * 1.05)
+            self.baseline_ms = max(ADAPTIVE_MIN_BASELINE_MS, baseline)
+        if latency_high:
+            return self._decrease(backoff)
+
+        change = 0
+        if self.saturated and self.value < self.maximum:
+            self.value = min(float(self.maximum), self.value * 2 if self.slow_start else self.value + 1)
+            change = 1
+        self._reset_window()
+        return change
+
+
+class AdaptiveConcurrency:
+    """AIMD 自适应并发控制器，同时调整全局并发数和每个主机的并发数。
+
+    在途名额被用满且耗时、错误率正常时逐步提高上限，出现超时、429、5xx 激增或耗时明显上升时
+    按 backoff 倍数回退，最终收敛到不压垮对端的最大吞吐。拥塞信号超过窗口的 error_threshold 比例时回退，
+    主机返回 429 时立即降低该主机的上限；单个主机的信号只计入该主机和全局窗口，不会单独拖慢其他主机。
+    由 iter_results 在每轮检查开始时调用 start，并在每次发送和完成时通知。
+    """
+
+    def __init__(
+        self,
+        max_limit: int = ADAPTIVE_MAX_CONCURRENCY,
+        min_limit: int = 1,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        error_threshold: float = 0.1,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = min(self.max_limit, max(1, min_limit))
+        self.backoff = min(0.95, max(0.1, backoff))
+        self.latency_tolerance = max(1.0, latency_tolerance)
+        self.error_threshold = max(0.0, error_threshold)
+        self.start(self.min_limit)
+
+    def start(self, initial: int, per_host_max: int = 0) -> None:
+        """开始一轮检查：initial 为初始并发数，per_host_max 为单主机上限（0 表示与全局上限相同）。"""
+
+        self._global = _AimdLimit(initial, self.min_limit, self.max_limit, self.error_threshold)
+        self._host_max = min(per_host_max or self.max_limit, self.max_limit)
+        self._host_initial = min(self._host_max, max(1, initial))
+        self._hosts: Dict[str, _AimdLimit] = {}
+        self.peak_limit = self._global.limit
+        self.increases = 0
+        self.decreases = 0
+        self.host_decreases = 0
+
+    @property
+    def limit(self) -> int:
+        """当前全局并发上限。"""
+
+        return self._global.limit
+
+    def host_limit(self, host: str) -> int:
+        """主机当前的并发上限，供 HostScheduler 调度时使用。"""
+
+        state = self._hosts.get(host)
+        return state.limit if state else self._host_initial
+
+    def on_submit(self, url: str) -> None:
+        """一次请求开始发送。"""
+
+        host = url_host(url)
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _AimdLimit(self._host_initial, 1, self._host_max, self.error_threshold)
+        state.on_submit()
+        self._global.on_submit()
+
+    def on_complete(self, result: LinkResult) -> None:
+        """一次请求完成，按结果调整全局和主机的上限。"""
+
+        congested = is_congestion_signal(result)
+        # 缓存和重定向备忘命中几乎不耗时，计入会把基线压到接近 0，之后正常请求都被当作变慢。
+        latency_ms = None if result.cached or result.memoized else result.elapsed_ms
+        change = self._global.on_complete(congested, latency_ms, self.backoff, self.latency_tolerance)
+        if change > 0:
+            self.increases += 1
+            self.peak_limit = max(self.peak_limit, self._global.limit)
+        elif change < 0:
+            self.decreases += 1
+
+        host = url_host(result.checked_url)
+        state = self._hosts.get(host)
+        if state is None:
+            return
+        throttled = result.status_code == 429
+        if state.on_complete(congested, latency_ms, self.backoff, self.latency_tolerance, throttled) < 0:
+            self.host_decreases += 1
+        # 空闲且上限已恢复的主机与新主机无异，释放其状态以免主机很多时内存增长。
+        if not state.in_flight and state.limit >= self._host_initial:
+            del self._hosts[host]
+
+    def throttled_hosts(self, limit: int = 0) -> List[Tuple[str, int]]:
+        """上限低于初始值的主机及其当前上限，按上限从小到大排序。"""
+
+        hosts = sorted(
+            ((host, state.limit) for host, state in self._hosts.items() if state.limit < self._host_initial),
+            key=lambda item: (item[1], item[0]),
+        )
+        return hosts[:limit] if limit > 0 else hosts
+
+
+@dataclass
+class _DnsEntry:
+    """DNS 缓存记录，error 不为空时表示负缓存。"""
+
+    addresses: List[Tuple[Any, ...]]
+    expires_at: float
+    error: Optional[socket.gaierror] = None
+
+
+class DnsCache:
+    """进程内 DNS 缓存。
+
+    按主机名缓存 getaddrinfo 结果（与端口无关），域名不存在（NXDOMAIN）时做负缓存，
+    之后同一主机的链接无需打开任何连接即可立即失败。prefetch 可在检查开始前并发
+    解析全部主机名。
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        negative_ttl: float = 60.0,
+        resolver: Optional[Callable[..., List[Tuple[Any, ...]]]] = None,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._resolver = resolver or socket.getaddrinfo
+        self._entries: Dict[str, _DnsEntry] = {}
+        self._resolving: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def is_cached(self, host: str) -> bool:
+        """判断主机是否有未过期的缓存（含负缓存）。"""
+
+        with self._lock:
+            entry = self._entries.get(host)
+        return entry is not None and entry.expires_at > time.monotonic()
+
+    def lookup(self, host: str) -> List[Tuple[Any, ...]]:
+        """解析主机名，返回 getaddrinfo 格式的地址列表（端口为 0）。"""
+
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._entries.get(host)
+                if entry is not None and entry.expires_at > now:
+                    break
+                # 同一主机同时只解析一次，其他线程等待结果。
+                pending = self._resolving.get(host)
+                if pending is None:
+                    self._resolving[host] = threading.Event()
+                    break
+            pending.wait()
+
+        if entry is not None and entry.expires_at > now:
+            if entry.error is not None:
+                # 每次抛出新的异常对象：多个线程重复抛出同一个实例会让其 __traceback__ 不断增长。
+                raise socket.gaierror(entry.error.errno, entry.error.strerror)
+            return entry.addresses
+
+        try:
+            addresses = self._resolver(host, None, 0, socket.SOCK_STREAM)
+        except socket.gaierror as exc:
+            if exc.errno in DNS_NEGATIVE_ERRORS:
+                self._finish(host, _DnsEntry([], now + self.negative_ttl, exc))
+            else:
+                self._finish(host, None)
+            raise
+        except BaseException:
+            self._finish(host, None)
+            raise
+
+        self._finish(host, _DnsEntry(addresses, now + self.ttl))
+        return addresses
+
+    def _finish(self, host: str, entry: Optional[_DnsEntry]) -> None:
+        """保存解析结果并唤醒等待同一主机的线程。"""
+
+        with self._lock:
+            if entry is not None:
+                self._entries[host] = entry
+            self._resolving.pop(host).set()
+
+    def getaddrinfo(
+        self,
+        host: Any,
+        port: Any,
+        family: int = 0,
+        type: int = 0,
+        proto: int = 0,
+        flags: int = 0,
+    ) -> List[Tuple[Any, ...]]:
+        """与 socket.getaddrinfo 签名一致的缓存版本，非 TCP 或特殊参数直接透传。"""
+
+        port_number = 0 if port is None else int(port) if str(port).isdigit() else None
+        if (
+            not isinstance(host, str)
+            or port_number is None
+            or flags
+            or type not in (0, socket.SOCK_STREAM)
+            or proto not in (0, socket.IPPROTO_TCP)
+        ):
+            return self._resolver(host, port, family, type, proto, flags)
+
+        results = [
+            (address_family, socket.SOCK_STREAM, address_proto, "", (sockaddr[0], port_number) + tuple(sockaddr[2:]))
+            for address_family, _, address_proto, _, sockaddr in self.lookup(host)
+            if family in (0, address_family)
+        ]
+        return results or self._resolver(host, port, family, type, proto, flags)
+
+    def prefetch(self, hosts: Iterable[str], workers: int = 64) -> Tuple[int, int]:
+        """并发解析所有主机名，返回 (成功数, 失败数)。"""
+
+        resolved = 0
+        failed = 0
+
+        def resolve(host: str) -> bool:
+            try:
+                self.lookup(host)
+            except OSError:
+                return False
+            return True
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for ok in executor.map(resolve, set(hosts)):
+                if ok:
+                    resolved += 1
+                else:
+                    failed += 1
+
+        return resolved, failed
+
+    @contextlib.contextmanager
+    def install(self) -> Iterator["DnsCache"]:
+        """在上下文中用缓存替换 socket.getaddrinfo，供 requests/urllib3 使用。"""
+
+        original = socket.getaddrinfo
+        socket.getaddrinfo = self.getaddrinfo  # type: ignore[assignment]
+        try:
+            yield self
+        finally:
+            socket.getaddrinfo = original
+
+
+class CachedResolver(aiohttp.abc.AbstractResolver):
+    """让 aiohttp 使用 DnsCache 的解析器，缓存命中时不经过线程池。"""
+
+    def __init__(self, dns_cache: DnsCache):
+        self.dns_cache = dns_cache
+
+    async def resolve(self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET) -> List[Dict[str, Any]]:
+        if self.dns_cache.is_cached(host):
+            infos = self.dns_cache.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+        else:
+            loop = asyncio.get_running_loop()
+            infos = await loop.run_in_executor(
+                None, self.dns_cache.getaddrinfo, host, port, family, socket.SOCK_STREAM
+            )
+
+        return [
+            {
+                "hostname": host,
+                "host": sockaddr[0],
+                "port": sockaddr[1],
+                "family": address_family,
+                "proto": address_proto,
+                "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+            }
+            for address_family, _, address_proto, _, sockaddr in infos
+        ]
+
+    async def close(self) -> None:
+        return None
+
+
+def is_dns_not_found(exc: BaseException) -> bool:
+    """判断请求异常是否由域名不存在（NXDOMAIN）引起。
+
+    requests、aiohttp、httpx 都会把 gaierror 包装在自己的连接错误中，这里沿异常链和常见的
+    reason/os_error 属性查找。
+    """
+
+    pending: List[BaseException] = [exc]
+    seen: Set[int] = set()
+    while pending:
+        current = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, socket.gaierror):
+            if current.errno in DNS_NEGATIVE_ERRORS:
+                return True
+            continue
+        linked = [current.__cause__, current.__context__, getattr(current, "reason", None), getattr(current, "os_error", None)]
+        linked.extend(current.args)
+        pending.extend(item for item in linked if isinstance(item, BaseException))
+    return False
+
+
+def url_hostname(url: str) -> Optional[str]:
+    """返回 URL 中的主机名（不含端口），用于 DNS 预解析。"""
+
+    return urlsplit(url).hostname
+
+
+@dataclass
+class _HostState:
+    """单个主机的调度状态。"""
+
+    queue: Deque[Tuple[int, str]] = field(default_factory=deque)
+    in_flight: int = 0
+    next_start: float = 0.0
+    # idle: 无任务或已达并发上限；ready: 在轮转队列中；delayed: 在延迟堆中。
+    state: str = "idle"
+
+
+class HostScheduler:
+    """按主机调度检查任务的礼貌调度器。
+
+    各主机的任务轮流出队，避免同一主机的大量链接连续占满并发；
+    每个主机限制最大并发数和两次请求之间的最小间隔，被限流的主机按
+    Retry-After 暂停，期间继续处理其他主机的任务。
+    传入 host_limit 时每个主机的并发上限由它动态给出（如自适应并发），代替固定的 max_per_host。
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 0,
+        min_delay: float = 0.0,
+        host_limit: Optional[Callable[[str], int]] = None,
+    ):
+        self.max_per_host = max(0, max_per_host)
+        self.min_delay = max(0.0, min_delay)
+        self.host_limit = host_limit
+        self._hosts: Dict[str, _HostState] = {}
+        self._ready: Deque[str] = deque()
+        self._delayed: List[Tuple[float, str]] = []
+        self._waiting: List[Tuple[float, int, str]] = []
+        self._queued = 0
+
+    @property
+    def queued(self) -> int:
+        """尚未出队的任务数。"""
+
+        return self._queued
+
+    def add(self, index: int, url: str, front: bool = False, delay: float = 0.0) -> None:
+        """加入一个待检查任务。
+
+        front=True 时排在该主机队首；delay 大于 0 时先在等待堆中停留，
+        到期后再排到主机队首，等待期间不占用任何并发名额。
+        """
+
+        self._queued += 1
+        if delay > 0:
+            heapq.heappush(self._waiting, (time.monotonic() + delay, index, url))
+            return
+
+        self._enqueue(index, url, front)
+
+    def _enqueue(self, index: int, url: str, front: bool) -> None:
+        """把任务放入主机队列。"""
+
+        host = url_host(url)
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+
+        if front:
+            state.queue.appendleft((index, url))
+        else:
+            state.queue.append((index, url))
+
+        if state.state == "idle":
+            self._place(host, state, time.monotonic())
+
+    def pop_ready(self) -> Optional[Tuple[int, str]]:
+        """取出下一个可以立即发送的任务，没有时返回 None。"""
+
+        now = time.monotonic()
+        self._promote_waiting(now)
+        self._promote_delayed(now)
+
+        while self._ready:
+            host = self._ready.popleft()
+            state = self._hosts[host]
+            state.state = "idle"
+
+            # 在轮转队列中期间可能被 Retry-After 暂停，需重新放置。
+            if state.next_start > now:
+                self._place(host, state, now)
+                continue
+
+            index, url = state.queue.popleft()
+            self._queued -= 1
+            state.in_flight += 1
+            state.next_start = now + self.min_delay
+            self._place(host, state, now)
+            return index, url
+
+        return None
+
+    def release(self, url: str, pause: Optional[float] = None) -> None:
+        """任务完成后释放主机并发名额，pause 为该主机需要暂停的秒数。"""
+
+        host = url_host(url)
+        state = self._hosts[host]
+        state.in_flight -= 1
+        now = time.monotonic()
+        if pause:
+            state.next_start = max(state.next_start, now + pause)
+
+        if state.state == "idle":
+            self._place(host, state, now)
+        elif not state.queue and not state.in_flight:
+            del self._hosts[host]
+
+    def host_depths(self, limit: int = 0) -> List[Tuple[str, int, int]]:
+        """各主机的 (主机, 排队任务数, 在途任务数)，按排队数从多到少排序，limit 大于 0 时只取前几个。"""
+
+        depths = [(host, len(state.queue), state.in_flight) for host, state in self._hosts.items()]
+        depths.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return depths[:limit] if limit > 0 else depths
+
+    def next_ready_in(self) -> Optional[float]:
+        """距离下一个任务可发送还需等待的秒数，没有排队任务时返回 None。"""
+
+        if self._ready:
+            return 0.0
+
+        due_times = [heap[0][0] for heap in (self._delayed, self._waiting) if heap]
+        if not due_times:
+            return None
+        return max(0.0, min(due_times) - time.monotonic())
+
+    def _place(self, host: str, state: _HostState, now: float) -> None:
+        """根据主机当前状态放入轮转队列、延迟堆，或保持空闲。"""
+
+        if not state.queue:
+            if not state.in_flight:
+                del self._hosts[host]
+            return
+
+        limit = self.host_limit(host) if self.host_limit else self.max_per_host
+        if limit and state.in_flight >= limit:
+            return
+
+        if state.next_start > now:
+            state.state = "delayed"
+            heapq.heappush(self._delayed, (state.next_start, host))
+        else:
+            state.state = "ready"
+            self._ready.append(host)
+
+    def _promote_waiting(self, now: float) -> None:
+        """把等待到期的任务排回各自主机的队首。"""
+
+        while self._waiting and self._waiting[0][0] <= now:
+            _, index, url = heapq.heappop(self._waiting)
+            self._enqueue(index, url, front=True)
+
+    def _promote_delayed(self, now: float) -> None:
+        """把延迟时间已到的主机移回轮转队列。"""
+
+        while self._delayed and self._delayed[0][0] <= now:
+            _, host = heapq.heappop(self._delayed)
+            state = self._hosts.get(host)
+            if state is None or state.state != "delayed":
+                continue
+            state.state = "idle"
+            self._place(host, state, now)
+
+
+@dataclass
+class ResponseInfo:
+    """与引擎无关的响应摘要，history 为最终地址之前依次经过的跳转地址。"""
+
+    status_code: int
+    status_text: str
+    url: str
+    history: List[str]
+    is_redirect: bool
+    headers: Any
+    protocol: Optional[str] = None
+    bytes_transferred: int = 0
+    # 整条结果取自重定向备忘，本次没有发出请求。
+    memoized: bool = False
+
+
+class RedirectMemo:
+    """单次运行内的重定向跳转备忘。
+
+    一条跳转链走完后，链上每一跳都记下最终响应；之后其他链接以相同方法跳到已知地址时
+    直接复用结果，不再继续请求。限流、5xx、304 和 416 等不稳定或依赖请求头的响应不记录。
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Tuple[str, ...], int, ResponseInfo]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, method: str, url: str) -> Optional[Tuple[List[str], ResponseInfo]]:
+        """返回从 url 到最终地址的跳转链（含两端）和最终响应。"""
+
+        with self._lock:
+            entry = self._entries.get((method, url))
+            if entry is None:
+                return None
+            self.hits += 1
+
+        chain, offset, final = entry
+        return list(chain[offset:]), final
+
+    def remember(self, method: str, chain: List[str], final: ResponseInfo) -> None:
+        """记录一条完整跳转链的最终响应。"""
+
+        if final.status_code in {304, 416, 429} or final.status_code >= 500:
+            return
+
+        frozen_chain = tuple(chain)
+        with self._lock:
+            for offset, url in enumerate(frozen_chain):
+                self._entries[(method, url)] = (frozen_chain, offset, final)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空备忘，开始新一轮检查时调用。"""
+
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+
+
+def _requests_protocol(response: requests.Response) -> Optional[str]:
+    """requests/urllib3 响应使用的协议版本。"""
+
+    version = getattr(response.raw, "version", None)
+    return {10: "HTTP/1.0", 11: "HTTP/1.1"}.get(version)
+
+
+def _memo_response(history: List[str], hit: Tuple[List[str], ResponseInfo]) -> ResponseInfo:
+    """把已走过的跳转与备忘中的剩余跳转拼成完整响应摘要。"""
+
+    chain, final = hit
+    full_history = history + chain[:-1]
+    return ResponseInfo(
+        status_code=final.status_code,
+        status_text=final.status_text,
+        url=final.url,
+        history=full_history,
+        is_redirect=bool(full_history),
+        headers=final.headers,
+        protocol=final.protocol,
+        memoized=not history,
+    )
+
+
+class LatencyHistogram:
+    """按对数分桶的流式耗时直方图。
+
+    每个桶的上下界相差 (1 + precision) 倍，分位数的相对误差不超过 precision，
+    内存只与耗时跨度有关，与记录条数无关。
+    """
+
+    def __init__(self, precision: float = 0.02, min_value: float = 0.01):
+        self.min_value = min_value
+        self.count = 0
+        self.max = 0.0
+        self._log_base = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+
+    def record(self, value: float) -> None:
+        """记录一个耗时（毫秒）。"""
+
+        bucket = int(math.log(value / self.min_value) / self._log_base) if value > self.min_value else 0
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """返回第 percent 百分位的耗时估计（取所在桶的中点），没有记录时返回 None。"""
+
+        if not self.count:
+            return None
+
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= rank:
+                if bucket == 0:
+                    return min(self.min_value, self.max)
+                middle = self.min_value * math.exp((bucket + 0.5) * self._log_base)
+                return min(middle, self.max)
+        return self.max
+
+
+class ProgressMonitor:
+    """检查过程的实时进度与吞吐遥测。
+
+    由 iter_results 在主循环中调用：记录每次请求完成的耗时和结果，按 interval 周期
+    刷新一行进度（检查速率、在途数、排队最多的主机、p50/p95/p99），并可把同样的指标
+    写入 Prometheus 文本格式文件，文件名以 .json 结尾时写 JSON 快照。
+    """
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        stream: Optional[TextIO] = None,
+        metrics_path: Optional[str] = None,
+        top_hosts: int = 5,
+    ):
+        self.interval = max(0.1, interval)
+        self.stream = stream
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.top_hosts = top_hosts
+        self.histogram = LatencyHistogram()
+        self.checks = 0
+        self.results = 0
+        self.valid = 0
+        self.invalid = 0
+        self.failed = 0
+        self.retries = 0
+        self.in_flight = 0
+        self._scheduler: Optional[HostScheduler] = None
+        self._concurrency = 0
+        self._start = time.monotonic()
+        self._last_tick = self._start
+        self._last_checks = 0
+        self._last_completion = self._start
+        self._line_width = 0
+
+    def start(self, scheduler: HostScheduler, concurrency: int) -> None:
+        """开始一轮检查，记录调度器以便读取各主机排队深度。"""
+
+        self._scheduler = scheduler
+        self._concurrency = concurrency
+        self._start = self._last_tick = self._last_completion = time.monotonic()
+
+    def on_submit(self) -> None:
+        """一次请求开始发送。"""
+
+        self.in_flight += 1
+
+    def set_concurrency(self, concurrency: int) -> None:
+        """自适应并发调整上限后更新显示的并发数。"""
+
+        self._concurrency = concurrency
+
+    def on_complete(self, result: LinkResult, will_retry: bool) -> None:
+        """一次请求完成；will_retry 为 True 时结果会被重试，不计入最终结果。"""
+
+        self.in_flight -= 1
+        self.checks += 1
+        self.histogram.record(result.elapsed_ms)
+        self._last_completion = time.monotonic()
+        if will_retry:
+            self.retries += 1
+            return
+
+        self.results += 1
+        if result.ok:
+            self.valid += 1
+        elif result.error:
+            self.failed += 1
+        else:
+            self.invalid += 1
+
+    def time_until_tick(self) -> float:
+        """距离下一次刷新的秒数，主循环等待完成结果时不超过这个时间。"""
+
+        return max(0.0, self._last_tick + self.interval - time.monotonic())
+
+    def tick(self) -> None:
+        """到达刷新周期时输出进度并导出指标。"""
+
+        if self.time_until_tick() > 0:
+            return
+        self._emit(final=False)
+
+    def close(self) -> None:
+        """检查结束时输出最终进度和指标。"""
+
+        self._emit(final=True)
+        self._scheduler = None
+
+    def clear_line(self) -> None:
+        """擦掉终端中原地刷新的进度行，流式输出结果前调用，避免结果与进度行混在同一行；下次刷新时再画出。"""
+
+        if not self._line_width:
+            return
+        # 进度行含中文等宽字符，按字符数补空格擦不干净，直接用 ANSI 清除整行。
+        self.stream.write("\r\033[K")
+        self.stream.flush()
+        self._line_width = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前指标快照。"""
+
+        now = time.monotonic()
+        elapsed = max(now - self._start, 1e-9)
+        window = max(now - self._last_tick, 1e-9)
+        scheduler = self._scheduler
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "checks": self.checks,
+            "results": self.results,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "concurrency": self._concurrency,
+            "queued": scheduler.queued if scheduler else 0,
+            "checks_per_sec": round(self.checks / elapsed, 2),
+            "recent_checks_per_sec": round((self.checks - self._last_checks) / window, 2),
+            "seconds_since_last_completion": round(now - self._last_completion, 3),
+            "latency_ms": {f"p{percent}": self.histogram.percentile(percent) for percent in self.PERCENTILES},
+            "hosts": [
+                {"host": host, "queued": queued, "in_flight": in_flight}
+                for host, queued, in_flight in (scheduler.host_depths(self.top_hosts) if scheduler else [])
+            ],
+        }
+
+    def _emit(self, final: bool) -> None:
+        snapshot = self.snapshot()
+        self._last_tick = time.monotonic()
+        self._last_checks = self.checks
+        if self.stream:
+            self._render(snapshot, final)
+        if self.metrics_path:
+            self.write_metrics(snapshot)
+
+    def _render(self, snapshot: Dict[str, Any], final: bool) -> None:
+        """输出一行进度；终端中原地刷新，否则逐行输出。"""
+
+        def fmt(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value:.0f}"
+
+        latency = snapshot["latency_ms"]
+        hosts = " ".join(f"{item['host']}:{item['queued']}" for item in snapshot["hosts"][:3] if item["queued"])
+        line = (
+            f"进度 {snapshot['results']} 完成 | {snapshot['recent_checks_per_sec']:.1f} 次/秒 "
+            f"(平均 {snapshot['checks_per_sec']:.1f}) | 在途 {snapshot['in_flight']}/{snapshot['concurrency']} "
+            f"| 排队 {snapshot['queued']} | p50/p95/p99 {fmt(latency['p50'])}/{fmt(latency['p95'])}/{fmt(latency['p99'])} ms"
+        )
+        if hosts:
+            line += f" | {hosts}"
+        if snapshot["seconds_since_last_completion"] >= 10 and snapshot["in_flight"]:
+            line += f" | {Colors.YELLOW}{snapshot['seconds_since_last_completion']:.0f}s 无完成{Colors.RESET}"
+
+        if self.stream.isatty():
+            padding = " " * max(0, self._line_width - len(line))
+            self._line_width = 0 if final else len(line)
+            self.stream.write(f"\r{Colors.GRAY}{line}{Colors.RESET}{padding}" + ("\n" if final else ""))
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+
+    def write_metrics(self, snapshot: Dict[str, Any]) -> None:
+        """写入指标文件，先写临时文件再替换，抓取方不会读到写了一半的内容。"""
+
+        if self.metrics_path.suffix.lower() == ".json":
+            content = json.dumps(snapshot, ensure_ascii=False, indent=2)
+        else:
+            content = self.format_prometheus(snapshot)
+
+        temp_path = self.metrics_path.with_name(self.metrics_path.name + ".tmp")
+        temp_path.write_text(content, encoding="utf-8")
+        temp_path.replace(self.metrics_path)
+
+    @staticmethod
+    def format_prometheus(snapshot: Dict[str, Any]) -> str:
+        """按 Prometheus 文本格式输出指标快照。"""
+
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: Iterable[Tuple[str, Any]]) -> None:
+            lines.append(f"# HELP link_checker_{name} {help_text}")
+            lines.append(f"# TYPE link_checker_{name} {kind}")
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f"link_checker_{name}{labels} {value}")
+
+        metric("checks_total", "counter", "Completed requests including retried attempts.", [("", snapshot["checks"])])
+        metric(
+            "results_total",
+            "counter",
+            "Final results by outcome.",
+            [(f'{{outcome="{outcome}"}}', snapshot[outcome]) for outcome in ("valid", "invalid", "failed")],
+        )
+        metric("retries_total", "counter", "Attempts that were scheduled for retry.", [("", snapshot["retries"])])
+        metric("in_flight", "gauge", "Requests currently in flight.", [("", snapshot["in_flight"])])
+        metric("queued", "gauge", "Checks waiting in the host scheduler.", [("", snapshot["queued"])])
+        metric("checks_per_second", "gauge", "Completed requests per second since the last snapshot.", [("", snapshot["recent_checks_per_sec"])])
+        metric("seconds_since_last_completion", "gauge", "Seconds since the last request completed.", [("", snapshot["seconds_since_last_completion"])])
+        metric(
+            "latency_ms",
+            "summary",
+            "Request latency in milliseconds.",
+            [(f'{{quantile="{int(key[1:]) / 100}"}}', value) for key, value in snapshot["latency_ms"].items()],
+        )
+        metric(
+            "host_queue_depth",
+            "gauge",
+            "Queued checks for the busiest hosts.",
+            [(f'{{host="{item["host"]}"}}', item["queued"]) for item in snapshot["hosts"]],
+        )
+        return "\n".join(lines) + "\n"
+
+
+class LinkChecker:
+    """批量链接检查器。"""
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        verify_ssl: bool = True,
+        follow_redirects: bool = True,
+        trace_redirects: bool = True,
+        method: str = "HEAD",
+        headers: Optional[Dict[str, str]] = None,
+        valid_status_codes: Optional[Set[int]] = None,
+        cache: Optional[LinkCache] = None,
+        per_host_limit: int = 0,
+        host_delay: float = 0.0,
+        retry_policy: Optional[RetryPolicy] = None,
+        dns_cache: Optional[DnsCache] = None,
+        memoize_redirects: bool = True,
+        store_redirect_chain: bool = True,
+        max_body_bytes: int = 64 * 1024,
+        range_probe: bool = False,
+        progress: Optional[ProgressMonitor] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+    ):
+        self.timeout = timeout
+        self.verify_ssl = verify_ssl
+        self.follow_redirects = follow_redirects
+        self.trace_redirects = trace_redirects
+        self.method = method.upper()
+        self.headers = headers or {}
+        self.valid_status_codes = valid_status_codes or set(range(200, 400))
+        self.cache = cache
+        self.per_host_limit = max(0, per_host_limit)
+        self.host_delay = max(0.0, host_delay)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.dns_cache = dns_cache
+        self.redirect_memo = RedirectMemo() if memoize_redirects and follow_redirects else None
+        self.store_redirect_chain = store_redirect_chain
+        self.max_body_bytes = max(0, max_body_bytes)
+        self.range_probe = range_probe
+        self.progress = progress
+        self.adaptive = adaptive
+        self.session = requests.Session()
+
+    def close(self) -> None:
+        """关闭连接池。缓存由调用方创建，不在这里关闭。"""
+
+        self.session.close()
+
+    def check_one(self, index: int, url: str) -> LinkResult:
+        """检查单个链接。"""
+
+        start_time = time.time()
+        checked_url = url
+        method_used = self.method
+        entry = self.cache.get(url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            return entry.to_result(index, url, self.valid_status_codes)
+        conditional_headers = entry.conditional_headers() if entry else None
+
+        try:
+            response = self._fetch(method_used, checked_url, self._request_headers(method_used, conditional_headers))
+
+            if self.method == "HEAD" and response.status_code in {405, 501}:
+                method_used = "GET"
+                response = self._fetch(method_used, checked_url, self._request_headers(method_used, conditional_headers))
+
+            if response.status_code == 416 and self._request_headers(method_used, None):
+                # 空资源等不支持首字节范围时去掉 Range 再请求一次。
+                response = self._fetch(method_used, checked_url, conditional_headers)
+
+            return self._finish_result(index, url, checked_url, method_used, start_time, response, entry)
+
+        except self.request_errors as exc:
+            error, message = self._describe_error(exc)
+            return self._build_error_result(index, url, checked_url, method_used, start_time, error, message)
+
+    def _request_headers(
+        self, method: str, conditional_headers: Optional[Dict[str, str]]
+    ) -> Optional[Dict[str, str]]:
+        """本次请求附加的请求头：条件请求头，以及启用 range_probe 时 GET 请求的首字节 Range。"""
+
+        if self.range_probe and method == "GET":
+            return {"Range": "bytes=0-0", **(conditional_headers or {})}
+        return conditional_headers
+
+    # check_one 中按请求失败处理的异常类型，子类替换传输层时一并覆盖。
+    request_errors: Tuple[type, ...] = (requests.exceptions.RequestException,)
+
+    def _describe_error(self, exc: BaseException) -> Tuple[str, str]:
+        """把请求异常归类为 (错误类型, 说明)，超时和连接错误使用统一名称以便重试。
+
+        域名不存在归为 DNSError，不会重试。
+        """
+
+        if is_dns_not_found(exc):
+            return "DNSError", f"域名不存在: {exc}"
+        if isinstance(exc, requests.exceptions.Timeout):
+            return "Timeout", f"请求超时（{self.timeout}秒）"
+        if isinstance(exc, requests.exceptions.ConnectionError):
+            return "ConnectionError", str(exc)
+        return type(exc).__name__, str(exc)
+
+    def _fetch(self, method: str, url: str, extra_headers: Optional[Dict[str, str]] = None) -> ResponseInfo:
+        """发送请求并跟随重定向，启用跳转备忘时逐跳检查是否已有结果。"""
+
+        if self.redirect_memo is None:
+            response = self._send(method, url, extra_headers)
+            return ResponseInfo(
+                status_code=response.status_code,
+                status_text=response.reason or "",
+                url=response.url,
+                history=[item.url for item in response.history],
+                is_redirect=response.is_redirect,
+                headers=response.headers,
+                protocol=_requests_protocol(response),
+                bytes_transferred=self._drain_body(response),
+            )
+
+        hit = self.redirect_memo.get(method, url)
+        if hit:
+            return _memo_response([], hit)
+
+        response = self._send(method, url, extra_headers, allow_redirects=False)
+        history: List[str] = []
+
+        while response.is_redirect:
+            if len(history) >= MAX_REDIRECTS:
+                raise requests.exceptions.TooManyRedirects(f"超过 {MAX_REDIRECTS} 次重定向", response=response)
+            history.append(response.url)
+
+            # 借用 requests 生成下一跳请求（跨域时去掉认证头、303 改方法等），但先查备忘再决定是否发送。
+            next_request = next(self.session.resolve_redirects(response, response.request, yield_requests=True))
+            hit = self.redirect_memo.get(next_request.method, next_request.url)
+            if hit:
+                return _memo_response(history, hit)
+
+            response = self.session.send(
+                next_request,
+                allow_redirects=False,
+                timeout=self.timeout,
+                verify=self.verify_ssl,
+                stream=True,
+            )
+
+        info = ResponseInfo(
+            status_code=response.status_code,
+            status_text=response.reason or "",
+            url=response.url,
+            history=history,
+            is_redirect=bool(history),
+            headers=response.headers,
+            protocol=_requests_protocol(response),
+            bytes_transferred=self._drain_body(response),
+        )
+        self.redirect_memo.remember(response.request.method, history + [response.url], info)
+        return info
+
+    def _finish_result(
+        self,
+        index: int,
+        url: str,
+        checked_url: str,
+        method_used: str,
+        start_time: float,
+        response: ResponseInfo,
+        entry: Optional[CacheEntry],
+    ) -> LinkResult:
+        """处理条件请求的 304、构造结果并写入缓存，同步/异步引擎共用。"""
+
+        if entry and response.status_code == 304:
+            return self._revalidated_result(entry, index, url, start_time)
+
+        result = self._build_result(index, url, checked_url, method_used, start_time, response)
+        if self.cache:
+            self._cache_write(self.cache.store, result, response.headers)
+        return result
+
+    def _cache_write(self, write: Callable[..., None], *args: Any) -> None:
+        """执行一次缓存写入，异步引擎改为交给专用线程，不阻塞事件循环。"""
+
+        write(*args)
+
+    def _build_result(
+        self,
+        index: int,
+        url: str,
+        checked_url: str,
+        method_used: str,
+        start_time: float,
+        response: ResponseInfo,
+    ) -> LinkResult:
+        """根据响应信息构造检查结果。"""
+
+        elapsed_ms = (time.time() - start_time) * 1000
+        status_code = response.status_code
+        redirect_chain: Tuple[str, ...] = ()
+        if self.trace_redirects and self.store_redirect_chain and response.history:
+            redirect_chain = (*response.history, response.url)
+        final_url = checked_url
+        if self.trace_redirects and response.url != checked_url:
+            final_url = response.url
+
+        retry_after = None
+        if status_code in THROTTLE_STATUS_CODES:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+        return LinkResult(
+            index=index,
+            input_url=url,
+            checked_url=checked_url,
+            final_url=final_url,
+            status_code=status_code,
+            status_text=sys.intern(response.status_text),
+            ok=status_code in self.valid_status_codes,
+            redirected=response.is_redirect or bool(response.history),
+            redirect_chain=redirect_chain,
+            method_used=sys.intern(method_used),
+            elapsed_ms=elapsed_ms,
+            retry_after=retry_after,
+            protocol=sys.intern(response.protocol) if response.protocol else None,
+            bytes_transferred=response.bytes_transferred,
+            memoized=response.memoized,
+        )
+
+    def _revalidated_result(self, entry: CacheEntry, index: int, url: str, start_time: float) -> LinkResult:
+        """条件请求返回 304，沿用缓存结果。"""
+
+        self._cache_write(self.cache.touch, entry.url)
+        return entry.to_result(index, url, self.valid_status_codes, elapsed_ms=(time.time() - start_time) * 1000)
+
+    @staticmethod
+    def _build_error_result(
+        index: int,
+        url: str,
+        checked_url: str,
+        method_used: str,
+        start_time: float,
+        error: str,
+        message: str,
+    ) -> LinkResult:
+        """构造请求失败（超时、连接错误等）时的检查结果。"""
+
+        return LinkResult(
+            index=index,
+            input_url=url,
+            checked_url=checked_url,
+            final_url=None,
+            status_code=None,
+            status_text="",
+            ok=False,
+            redirected=False,
+            redirect_chain=(),
+            method_used=sys.intern(method_used),
+            elapsed_ms=(time.time() - start_time) * 1000,
+            error=sys.intern(error),
+            message=message,
+        )
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        extra_headers: Optional[Dict[str, str]] = None,
+        allow_redirects: Optional[bool] = None,
+    ) -> requests.Response:
+        """发送请求并返回响应，响应体留待 _drain_body 按上限读取。"""
+
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        return self.session.request(
+            method=method,
+            url=url,
+            headers=headers or None,
+            timeout=self.timeout,
+            verify=self.verify_ssl,
+            allow_redirects=self.follow_redirects if allow_redirects is None else allow_redirects,
+            stream=True,
+        )
+
+    def _drain_body(self, response: requests.Response) -> int:
+        """最多读取 max_body_bytes 字节响应体后关闭响应，返回实际读取的字节数。
+
+        响应体在上限内读完时连接放回连接池复用；超过上限则直接断开连接，不再下载剩余内容。
+        """
+
+        try:
+            no_body = response.request.method == "HEAD" or response.headers.get("Content-Length") == "0"
+            if self.max_body_bytes or no_body:
+                read = 0
+                for chunk in response.iter_content(chunk_size=min(self.max_body_bytes, BODY_CHUNK_SIZE) or BODY_CHUNK_SIZE):
+                    read += len(chunk)
+                    if read >= self.max_body_bytes:
+                        break
+            return response.raw.tell()
+        finally:
+            response.close()
+
+    def check_urls(self, urls: Sequence[str], concurrency: int) -> List[LinkResult]:
+        """并发检查多个链接，结果按输入顺序返回。"""
+
+        if not urls:
+            return []
+
+        return sorted(self.iter_results(urls, concurrency), key=lambda result: result.index)
+
+    def iter_results(
+        self,
+        urls: Iterable[str],
+        concurrency: int,
+        ordered: bool = False,
+        buffer_size: int = 0,
+        crawler: Optional["Crawler"] = None,
+        lookahead: int = 0,
+    ) -> Iterator[LinkResult]:
+        """边检查边产出结果。
+
+        读入的任务交给 HostScheduler 按主机轮转出队，在途任务数不超过并发数。
+        调度器中排队的任务最多 lookahead 个（默认 SCHEDULER_LOOKAHEAD），与重排缓冲区分开计算，
+        大量链接指向同一主机时也能看到后面其他主机的链接，不会被单主机上限拖住整体吞吐。
+        ordered=True 时通过有界重排缓冲区按输入顺序产出，缓冲区满 buffer_size（默认并发数的 4 倍）
+        后暂停读入，否则按完成顺序产出；输入再大内存也保持平稳。
+        设置了 progress 时在主循环中按周期刷新进度和指标。
+        设置了 adaptive 时 concurrency 为初始并发数，之后全局和每个主机的并发数由 AIMD 控制器
+        在 adaptive.max_limit 以内动态调整。
+        urls 产出 None 表示来源暂时没有新链接（如爬取模式在等待页面解析），
+        先处理在途任务，稍后再取；来源须保证此时仍有在途或排队的任务。
+        爬取模式下需要下载解析的页面由 crawler 提交到其下载线程池，与普通检查一样占用并发名额、
+        受主机调度和重试策略约束。
+        """
+
+        worker_count = max(1, concurrency)
+        adaptive = self.adaptive
+        if adaptive:
+            adaptive.start(worker_count, self.per_host_limit)
+            worker_count = max(worker_count, adaptive.max_limit)
+        window = max(worker_count, buffer_size or worker_count * 4)
+        lookahead = max(window, lookahead or SCHEDULER_LOOKAHEAD)
+        pending_urls = iter(urls)
+        input_indexes = itertools.count(1)
+        if self.redirect_memo:
+            self.redirect_memo.clear()
+        scheduler = HostScheduler(self.per_host_limit, self.host_delay, adaptive.host_limit if adaptive else None)
+        completed: "queue.Queue[concurrent.futures.Future]" = queue.Queue()
+        in_flight: Set[concurrent.futures.Future] = set()
+        reorder_buffer: Dict[int, LinkResult] = {}
+        retry_counts: Dict[int, int] = {}
+        policy = self.retry_policy
+        next_index = 1
+        requests_sent = 0
+        retries_used = 0
+        exhausted = False
+        monitor = self.progress
+        if monitor:
+            monitor.start(scheduler, worker_count)
+
+        with self._open_executor(worker_count) as submit:
+            try:
+                while True:
+                    # 调度器预读的任务不超过 lookahead，重排缓冲区中的结果不超过窗口大小。
+                    # 缓冲区满时队首任务一定还在排队或在途，完成后缓冲区即可继续排出。
+                    while not exhausted and scheduler.queued < lookahead and len(reorder_buffer) < window:
+                        url = next(pending_urls, _END_OF_INPUT)
+                        if url is _END_OF_INPUT:
+                            exhausted = True
+                            break
+                        if url is None:
+                            break
+                        scheduler.add(next(input_indexes), url)
+
+                    limit = adaptive.limit if adaptive else worker_count
+                    while len(in_flight) < limit:
+                        item = scheduler.pop_ready()
+                        if item is None:
+                            break
+                        future = crawler.submit_page(*item) if crawler else None
+                        if future is None:
+                            future = submit(*item)
+                        in_flight.add(future)
+                        future.add_done_callback(completed.put)
+                        requests_sent += 1
+                        if adaptive:
+                            adaptive.on_submit(item[1])
+                        if monitor:
+                            monitor.on_submit()
+
+                    if not in_flight and not scheduler.queued:
+                        break
+
+                    # 有空闲名额时最多等到下一个被延迟的主机可以发送。
+                    wait_timeout = scheduler.next_ready_in() if len(in_flight) < limit else None
+                    if monitor:
+                        if adaptive:
+                            monitor.set_concurrency(limit)
+                        monitor.tick()
+                        tick_in = monitor.time_until_tick()
+                        wait_timeout = tick_in if wait_timeout is None else min(wait_timeout, tick_in)
+                    try:
+                        future = completed.get(timeout=wait_timeout)
+                    except queue.Empty:
+                        continue
+
+                    in_flight.discard(future)
+                    result = future.result()
+
+                    retries = retry_counts.pop(result.index, 0)
+                    result.attempts = retries + 1
+                    # 先调整主机上限再释放名额，释放时按新上限决定该主机能否继续出队。
+                    if adaptive:
+                        adaptive.on_complete(result)
+                    # 被限流时按 Retry-After 暂停整个主机。
+                    scheduler.release(result.checked_url, pause=result.retry_after)
+
+                    will_retry = (
+                        retries < policy.max_retries
+                        and policy.is_retryable(result)
+                        and policy.within_budget(retries_used, requests_sent)
+                    )
+                    if monitor:
+                        monitor.on_complete(result, will_retry)
+                    if will_retry:
+                        # 重试任务在等待堆中退避，不占用工作线程或协程。
+                        retry_counts[result.index] = retries + 1
+                        retries_used += 1
+                        delay = policy.backoff(retries + 1, result.retry_after)
+                        scheduler.add(result.index, result.checked_url, delay=delay)
+                        continue
+
+                    if not ordered:
+                        yield result
+                        continue
+
+                    reorder_buffer[result.index] = result
+                    while next_index in reorder_buffer:
+                        yield reorder_buffer.pop(next_index)
+                        next_index += 1
+            finally:
+                for future in in_flight:
+                    future.cancel()
+                if monitor:
+                    monitor.close()
+
+    @contextlib.contextmanager
+    def _open_executor(self, concurrency: int) -> Iterator[Callable[[int, str], concurrent.futures.Future]]:
+        """打开线程池，返回提交单个检查任务的函数。"""
+
+        with contextlib.ExitStack() as stack:
+            if self.dns_cache:
+                stack.enter_context(self.dns_cache.install())
+            executor = stack.enter_context(concurrent.futures.ThreadPoolExecutor(max_workers=concurrency))
+            yield lambda index, url: executor.submit(self.check_one, index, url)
+
+
+class AsyncLinkChecker(LinkChecker):
+    """基于 aiohttp 的异步链接检查器。
+
+    不再为每个在途请求占用一个线程，可以同时保持成千上万个检查，
+    并通过 per_host_limit 限制单个主机的并发连接数。
+    启用缓存时 SQLite 读写在单独的缓存线程中执行，事件循环不会被磁盘 I/O 阻塞。
+    """
+
+    _cache_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    @contextlib.contextmanager
+    def _open_executor(self, concurrency: int) -> Iterator[Callable[[int, str], concurrent.futures.Future]]:
+        """在后台线程中运行事件循环，检查任务以协程形式提交到该循环。"""
+
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, name="link-checker-loop", daemon=True)
+        loop_thread.start()
+        session = asyncio.run_coroutine_threadsafe(self._create_session(concurrency), loop).result()
+        if self.cache:
+            # 单线程执行，写入按提交顺序进行。
+            self._cache_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="link-cache")
+
+        try:
+            yield lambda index, url: asyncio.run_coroutine_threadsafe(
+                self.check_one_async(session, index, url), loop
+            )
+        finally:
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.close()
+            if self._cache_executor:
+                # 等待排队的写入完成，调用方随后才会关闭缓存。
+                self._cache_executor.shutdown(wait=True)
+                self._cache_executor = None
+
+    def _cache_write(self, write: Callable[..., None], *args: Any) -> None:
+        if self._cache_executor is None:
+            write(*args)
+        else:
+            self._cache_executor.submit(write, *args)
+
+    async def _create_session(self, concurrency: int) -> aiohttp.ClientSession:
+        """创建带总并发和单主机并发限制的会话，需在事件循环中调用。
+
+        超时只限制建立连接和两次读取之间的间隔，不设总超时：在连接池中排队等待单主机名额的时间
+        不算超时，也通过跟踪回调从耗时中扣除。
+        """
+
+        connector = aiohttp.TCPConnector(
+            limit=concurrency,
+            limit_per_host=self.per_host_limit,
+            ttl_dns_cache=300,
+            use_dns_cache=self.dns_cache is None,
+            resolver=CachedResolver(self.dns_cache) if self.dns_cache else None,
+            ssl=None if self.verify_ssl else False,
+        )
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_queued_start.append(self._on_connection_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_connection_queued_end)
+        # 只统计不解析响应体，关闭自动解压以便按传输字节计数。
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout),
+            auto_decompress=False,
+            trace_configs=[trace_config],
+        )
+
+    @staticmethod
+    async def _on_connection_queued_start(session: Any, context: Any, params: Any) -> None:
+        context.queued_at = time.time()
+
+    @staticmethod
+    async def _on_connection_queued_end(session: Any, context: Any, params: Any) -> None:
+        waited = _CONNECTION_WAIT.get(None)
+        if waited is not None:
+            waited[0] += time.time() - context.queued_at
+
+    async def check_one_async(self, session: aiohttp.ClientSession, index: int, url: str) -> LinkResult:
+        """异步检查单个链接。
+
+        耗时不含在连接池排队等待连接的时间（排队时尚未发出请求）。
+        """
+
+        start_time = time.time()
+        checked_url = url
+        method_used = self.method
+        entry = None
+        if self.cache:
+            entry = await asyncio.get_running_loop().run_in_executor(self._cache_executor, self.cache.get, url)
+        if entry and self.cache.is_fresh(entry):
+            return entry.to_result(index, url, self.valid_status_codes)
+        conditional_headers = entry.conditional_headers() if entry else None
+        waited = [0.0]
+        _CONNECTION_WAIT.set(waited)
+
+        try:
+            response = await self._fetch_async(
+                session, method_used, checked_url, self._request_headers(method_used, conditional_headers)
+            )
+
+            if self.method == "HEAD" and response.status_code in {405, 501}:
+                method_used = "GET"
+                response = await self._fetch_async(
+                    session, method_used, checked_url, self._request_headers(method_used, conditional_headers)
+                )
+
+            if response.status_code == 416 and self._request_headers(method_used, None):
+                response = await self._fetch_async(session, method_used, checked_url, conditional_headers)
+
+            return self._finish_result(index, url, checked_url, method_used, start_time + waited[0], response, entry)
+
+        except asyncio.TimeoutError:
+            return self._build_error_result(
+                index, url, checked_url, method_used, start_time + waited[0], "Timeout", f"请求超时（{self.timeout}秒）"
+            )
+        except aiohttp.ClientConnectionError as exc:
+            if is_dns_not_found(exc):
+                error, message = "DNSError", f"域名不存在: {exc}"
+            else:
+                error, message = "ConnectionError", str(exc)
+            return self._build_error_result(
+                index, url, checked_url, method_used, start_time + waited[0], error, message
+            )
+        except aiohttp.ClientError as exc:
+            return self._build_error_result(
+                index, url, checked_url, method_used, start_time + waited[0], type(exc).__name__, str(exc)
+            )
+
+    async def _fetch_async(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> ResponseInfo:
+        """异步版 _fetch：启用跳转备忘时手动逐跳跟随重定向。"""
+
+        headers = {**self.headers, **extra_headers} if extra_headers else dict(self.headers)
+
+        if self.redirect_memo is None:
+            response, transferred = await self._send_async(session, method, url, headers)
+            return ResponseInfo(
+                status_code=response.status,
+                status_text=response.reason or "",
+                url=str(response.url),
+                history=[str(item.url) for item in response.history],
+                is_redirect=response.status in REDIRECT_STATUS_CODES and "Location" in response.headers,
+                headers=response.headers,
+                protocol=f"HTTP/{response.version.major}.{response.version.minor}" if response.version else None,
+                bytes_transferred=transferred,
+            )
+
+        hit = self.redirect_memo.get(method, url)
+        if hit:
+            return _memo_response([], hit)
+
+        origin = url_host(url)
+        history: List[str] = []
+        current_url = url
+
+        while True:
+            response, transferred = await self._send_async(session, method, current_url, headers, allow_redirects=False)
+            location = response.headers.get("Location")
+            if response.status not in REDIRECT_STATUS_CODES or not location:
+                break
+            if len(history) >= MAX_REDIRECTS:
+                raise aiohttp.TooManyRedirects(response.request_info, (response,), message=f"超过 {MAX_REDIRECTS} 次重定向")
+
+            history.append(str(response.url))
+            current_url = requote_uri(urljoin(str(response.url), location))
+            if response.status == 303 and method != "HEAD":
+                method = "GET"
+            if url_host(current_url) != origin:
+                headers = {key: value for key, value in headers.items() if key.lower() != "authorization"}
+
+            hit = self.redirect_memo.get(method, current_url)
+            if hit:
+                return _memo_response(history, hit)
+
+        info = ResponseInfo(
+            status_code=response.status,
+            status_text=response.reason or "",
+            url=str(response.url),
+            history=history,
+            is_redirect=bool(history),
+            headers=response.headers,
+            protocol=f"HTTP/{response.version.major}.{response.version.minor}" if response.version else None,
+            bytes_transferred=transferred,
+        )
+        self.redirect_memo.remember(method, history + [info.url], info)
+        return info
+
+    async def _send_async(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        allow_redirects: Optional[bool] = None,
+    ) -> Tuple[aiohttp.ClientResponse, int]:
+        """发送请求，最多读取 max_body_bytes 字节响应体后释放，返回响应和读取的字节数。
+
+        响应体在上限内读完时连接可以复用，否则释放时直接断开连接。
+        """
+
+        # normalize_url 已经做过转义，这里告诉 yarl 不要重复编码。
+        response = await session.request(
+            method,
+            URL(url, encoded=True),
+            headers=headers or None,
+            allow_redirects=self.follow_redirects if allow_redirects is None else allow_redirects,
+        )
+        read = 0
+        try:
+            while read < self.max_body_bytes:
+                chunk = await response.content.read(min(self.max_body_bytes - read, BODY_CHUNK_SIZE))
+                if not chunk:
+                    break
+                read += len(chunk)
+        finally:
+            response.release()
+        return response, read
+
+
+class Http2LinkChecker(LinkChecker):
+    """基于 httpx 的 HTTP/2 链接检查器。
+
+    同一主机的检查通过一个 HTTP/2 连接多路复用，省去大量 TCP/TLS 握手；
+    服务器不支持时经 ALPN 协商自动回退到 HTTP/1.1，每条结果的 protocol 字段记录实际协议。
+    需要安装 httpx[http2]。
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        try:
+            import httpx
+        except ImportError as exc:
+            raise RuntimeError("HTTP/2 引擎需要安装 httpx[http2]: pip install 'httpx[http2]'") from exc
+
+        self._httpx = httpx
+        self.request_errors = (httpx.HTTPError, httpx.InvalidURL)
+        self.client = httpx.Client(
+            http2=True,
+            verify=self.verify_ssl,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+        )
+
+    def close(self) -> None:
+        super().close()
+        self.client.close()
+
+    def _describe_error(self, exc: BaseException) -> Tuple[str, str]:
+        if is_dns_not_found(exc):
+            return "DNSError", f"域名不存在: {exc}"
+        if isinstance(exc, self._httpx.TimeoutException):
+            return "Timeout", f"请求超时（{self.timeout}秒）"
+        if isinstance(exc, (self._httpx.ConnectError, self._httpx.RemoteProtocolError, self._httpx.NetworkError)):
+            return "ConnectionError", str(exc)
+        return type(exc).__name__, str(exc)
+
+    def _send_http2(self, request: Any) -> Any:
+        """发送请求，最多读取 max_body_bytes 字节响应体后关闭响应。
+
+        HTTP/2 下提前关闭只会重置这一个流，连接继续供其他请求复用。
+        """
+
+        response = self.client.send(request, stream=True, follow_redirects=False)
+        try:
+            if self.max_body_bytes:
+                for _ in response.iter_raw(min(self.max_body_bytes, BODY_CHUNK_SIZE)):
+                    if response.num_bytes_downloaded >= self.max_body_bytes:
+                        break
+        finally:
+            response.close()
+        return response
+
+    def _response_info(self, response: Any, history: List[str]) -> ResponseInfo:
+        return ResponseInfo(
+            status_code=response.status_code,
+            status_text=response.reason_phrase or "",
+            url=str(response.url),
+            history=history,
+            is_redirect=bool(history) or response.is_redirect,
+            headers=response.headers,
+            protocol=response.http_version,
+            bytes_transferred=response.num_bytes_downloaded,
+        )
+
+    def _fetch(self, method: str, url: str, extra_headers: Optional[Dict[str, str]] = None) -> ResponseInfo:
+        """逐跳发送请求；启用跳转备忘时每一跳先查备忘，未启用且不跟随重定向时只发首跳。"""
+
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        request = self.client.build_request(method, url, headers=headers)
+
+        if self.redirect_memo:
+            hit = self.redirect_memo.get(method, url)
+            if hit:
+                return _memo_response([], hit)
+
+        response = self._send_http2(request)
+        history: List[str] = []
+
+        while self.follow_redirects and response.next_request is not None:
+            if len(history) >= MAX_REDIRECTS:
+                raise self._httpx.TooManyRedirects(f"超过 {MAX_REDIRECTS} 次重定向", request=response.request)
+            history.append(str(response.url))
+
+            # httpx 生成的下一跳请求已处理跨域去掉认证头、303 改方法等细节。
+            next_request = response.next_request
+            if self.redirect_memo:
+                hit = self.redirect_memo.get(next_request.method, str(next_request.url))
+                if hit:
+                    return _memo_response(history, hit)
+            response = self._send_http2(next_request)
+
+        info = self._response_info(response, history)
+        if self.redirect_memo:
+            self.redirect_memo.remember(response.request.method, history + [info.url], info)
+        return info
+
+
+class LinkExtractor(HTMLParser):
+    """流式提取 HTML 中的链接，可分块 feed，不保留整页内容。"""
+
+    LINK_ATTRIBUTES = {
+        "a": "href",
+        "area": "href",
+        "link": "href",
+        "iframe": "src",
+        "img": "src",
+        "script": "src",
+        "source": "src",
+    }
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag == "base":
+            href = dict(attrs).get("href")
+            if href:
+                self.base_url = urljoin(self.base_url, href.strip())
+            return
+
+        attribute = self.LINK_ATTRIBUTES.get(tag)
+        if attribute is None:
+            return
+        for name, value in attrs:
+            if name == attribute and value:
+                # 属性值边界明确，不能像纯文本那样去掉首尾标点，否则 /wiki/Foo_(bar) 会变成死链。
+                link = urldefrag(urljoin(self.base_url, value.strip()))[0]
+                if link.lower().startswith(("http://", "https://")):
+                    self.links.append(requote_uri(link))
+
+
+class Crawler:
+    """--crawl 爬取模式：从输入链接出发，递归发现并检查同域页面中的链接。
+
+    所有链接都交给检查器的 iter_results 调度；与输入链接同主机且未到最大深度的页面改由下载线程池
+    直接 GET，这一次请求既是检查也是下载，响应为 HTML 时流式解析，新发现的链接去重后放入待检查队列。
+    页面下载与普通检查一样受单主机并发、请求间隔和重试策略约束，并复用检查器的连接池。
+    下载、解析和检查同时进行，内存只与待检查队列和去重表有关。
+    """
+
+    def __init__(
+        self,
+        checker: LinkChecker,
+        max_depth: int,
+        deduplicator: Optional[Any] = None,
+        fetch_workers: int = 8,
+        max_page_bytes: int = 5 * 1024 * 1024,
+    ):
+        self.checker = checker
+        self.max_depth = max(0, max_depth)
+        self.deduplicator = deduplicator or ExactDeduplicator()
+        self.fetch_workers = max(1, fetch_workers)
+        self.max_page_bytes = max_page_bytes
+        self.pages_fetched = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._page_indexes: Set[int] = set()
+        self._hosts: Set[str] = set()
+        self._crawled: Set[str] = set()
+        self._frontier: Deque[Tuple[str, int, str]] = deque()
+        self._origins: Dict[str, Tuple[int, Optional[str]]] = {}
+        self._discovered: "queue.Queue[Tuple[List[str], int, str]]" = queue.Queue()
+        self._unresolved = 0
+        self._fetching = 0
+
+    def crawl(self, seeds: Iterable[str], concurrency: int) -> Iterator[LinkResult]:
+        """边爬取边产出检查结果，顺序为完成顺序。
+
+        seeds 不会被去重，通常已用同一个去重器收集过；它们同样会记入去重器，页面中再次出现时不再检查。
+        """
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.fetch_workers) as pool:
+            self._pool = pool
+            try:
+                for result in self.checker.iter_results(self._source(seeds), concurrency, crawler=self):
+                    self._unresolved -= 1
+                    self._page_indexes.discard(result.index)
+                    result.depth, result.found_on = self._origins.pop(result.input_url, (0, None))
+                    yield result
+            finally:
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit_page(self, index: int, url: str) -> Optional[concurrent.futures.Future]:
+        """由 iter_results 在发送前调用：需要下载解析的页面提交到下载线程池，其余返回 None 照常检查。
+
+        同一序号重试时仍按页面下载；每次提交对应发现队列中的一项。
+        """
+
+        depth = self._origins.get(url, (0, None))[0]
+        if index not in self._page_indexes:
+            if not self._is_page_candidate(url, depth):
+                return None
+            self._page_indexes.add(index)
+            with self._lock:
+                self._crawled.add(url)
+        self._fetching += 1
+        return self._pool.submit(self.check_page, index, url, depth)
+
+    def _is_page_candidate(self, url: str, depth: int) -> bool:
+        """同主机、未到最大深度、看起来是网页且未下载过的地址。"""
+
+        if depth >= self.max_depth or url_host(url) not in self._hosts:
+            return False
+        if Path(urlsplit(url).path).suffix.lower() in NON_HTML_EXTENSIONS:
+            return False
+        with self._lock:
+            return url not in self._crawled
+
+    def _source(self, seeds: Iterable[str]) -> Iterator[Optional[str]]:
+        """iter_results 的输入：先输入链接，再依次产出页面中发现的新链接。
+
+        待检查队列为空但还有链接在检查时产出 None，让 iter_results 先处理在途任务；
+        只剩页面在下载解析时阻塞等待，全部结束后停止。
+        """
+
+        for url in seeds:
+            self.deduplicator.add(url)
+            self._hosts.add(url_host(url))
+            self._origins[url] = (0, None)
+            self._unresolved += 1
+            yield url
+
+        while True:
+            self._collect_discovered(block=False)
+            if self._frontier:
+                url, depth, parent = self._frontier.popleft()
+                self._origins[url] = (depth, parent)
+                self._unresolved += 1
+                yield url
+            elif self._unresolved:
+                yield None
+            elif self._fetching:
+                self._collect_discovered(block=True)
+            else:
+                return
+
+    def _collect_discovered(self, block: bool) -> None:
+        """把下载线程解析出的链接去重后放入待检查队列。"""
+
+        while self._fetching:
+            try:
+                links, depth, parent = self._discovered.get(block=block, timeout=0.1 if block else None)
+            except queue.Empty:
+                return
+            self._fetching -= 1
+            block = False
+            for link in links:
+                if self.deduplicator.add(link):
+                    self._frontier.append((link, depth, parent))
+
+    def check_page(self, index: int, url: str, depth: int) -> LinkResult:
+        """在下载线程中 GET 页面作为该链接的检查结果，响应为同域 HTML 时流式提取链接。
+
+        提取到的链接（失败时为空列表）在返回前放入发现队列。
+        """
+
+        checker = self.checker
+        start_time = time.time()
+        links: List[str] = []
+        try:
+            with checker.session.get(
+                url,
+                headers=checker.headers or None,
+                timeout=checker.timeout,
+                verify=checker.verify_ssl,
+                allow_redirects=checker.follow_redirects,
+                stream=True,
+            ) as response:
+                final_url = response.url
+                content_type = response.headers.get("Content-Type", "").lower()
+                parse = (
+                    response.status_code in checker.valid_status_codes
+                    and "html" in content_type
+                    and url_host(final_url) in self._hosts
+                )
+                if parse and final_url != url:
+                    with self._lock:
+                        parse = final_url not in self._crawled
+                        self._crawled.add(final_url)
+                if parse:
+                    with self._lock:
+                        self.pages_fetched += 1
+                    links = self._parse_page(response, "charset=" in content_type)
+                info = ResponseInfo(
+                    status_code=response.status_code,
+                    status_text=response.reason or "",
+                    url=final_url,
+                    history=[item.url for item in response.history],
+                    is_redirect=response.is_redirect,
+                    headers=response.headers,
+                    protocol=_requests_protocol(response),
+                    bytes_transferred=response.raw.tell(),
+                )
+            return checker._build_result(index, url, url, "GET", start_time, info)
+        except (requests.exceptions.RequestException, UnicodeError) as exc:
+            # 页面下载固定使用 requests，按同步引擎的规则归类错误，超时和连接错误照常重试。
+            error, message = LinkChecker._describe_error(checker, exc)
+            return checker._build_error_result(index, url, url, "GET", start_time, error, message)
+        finally:
+            self._discovered.put((links, depth + 1, url))
+
+    def _parse_page(self, response: requests.Response, declared_charset: bool) -> List[str]:
+        """按块解码并喂给 LinkExtractor，最多读取 max_page_bytes 字节。"""
+
+        encoding = response.encoding if declared_charset and response.encoding else "utf-8"
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        extractor = LinkExtractor(response.url)
+        read = 0
+        for chunk in response.iter_content(chunk_size=BODY_CHUNK_SIZE):
+            extractor.feed(decoder.decode(chunk))
+            read += len(chunk)
+            if read >= self.max_page_bytes:
+                break
+        extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+        return extractor.links
+
+
+class ResultPrinter:
+    """结果打印器。"""
+
+    @staticmethod
+    def print_summary(results: Union[Sequence[LinkResult], ResultSummary], total_elapsed_ms: float) -> None:
+        """打印汇总信息，流式模式下直接传入累加好的 ResultSummary。"""
+
+        summary = results if isinstance(results, ResultSummary) else ResultSummary.from_results(results)
+
+        print()
+        print(f"{Colors.BOLD}{Colors.CYAN}检查完成{Colors.RESET}")
+        print(f"{Colors.GRAY}总数: {summary.total}{Colors.RESET}")
+        print(f"{Colors.GREEN}有效: {summary.valid}{Colors.RESET}")
+        print(f"{Colors.YELLOW}重定向: {summary.redirected}{Colors.RESET}")
+        print(f"{Colors.RED}无效: {summary.invalid}{Colors.RESET}")
+        print(f"{Colors.RED}错误: {summary.failed}{Colors.RESET}")
+        if summary.retried:
+            print(f"{Colors.YELLOW}经重试: {summary.retried}{Colors.RESET}")
+        if summary.protocols:
+            protocols = ", ".join(f"{name} × {count}" for name, count in sorted(summary.protocols.items()))
+            print(f"{Colors.GRAY}协议: {protocols}{Colors.RESET}")
+        if summary.cached:
+            print(f"{Colors.CYAN}缓存命中: {summary.cached}{Colors.RESET}")
+        if summary.reused:
+            print(f"{Colors.CYAN}沿用历史: {summary.reused}{Colors.RESET}")
+        if summary.bytes_transferred:
+            print(f"{Colors.GRAY}响应体流量: {summary.bytes_transferred} 字节{Colors.RESET}")
+        print(f"{Colors.GRAY}总耗时: {total_elapsed_ms:.2f} ms{Colors.RESET}")
+
+    @staticmethod
+    def print_adaptive(adaptive: AdaptiveConcurrency) -> None:
+        """打印自适应并发的收敛情况。"""
+
+        print(
+            f"{Colors.GRAY}自适应并发: 最终 {adaptive.limit}，峰值 {adaptive.peak_limit}，"
+            f"提高 {adaptive.increases} 次，回退 {adaptive.decreases} 次，主机回退 {adaptive.host_decreases} 次{Colors.RESET}"
+        )
+        throttled = adaptive.throttled_hosts(5)
+        if throttled:
+            hosts = ", ".join(f"{host} → {limit}" for host, limit in throttled)
+            print(f"{Colors.YELLOW}降低并发的主机: {hosts}{Colors.RESET}")
+
+    @staticmethod
+    def print_result(result: LinkResult, verbose: bool = False) -> None:
+        """打印单条结果。"""
+
+        if result.error:
+            print(
+                f"[{result.index:03d}] {Colors.RED}FAIL{Colors.RESET} "
+                f"{Colors.GRAY}{result.elapsed_ms:8.2f} ms{Colors.RESET}  {result.input_url}"
+            )
+            print(f"      {Colors.RED}{result.error}: {result.message}{Colors.RESET}")
+            return
+
+        if result.redirected and result.ok:
+            status_color = Colors.YELLOW
+            label = "REDIRECT_OK"
+        elif result.redirected and not result.ok:
+            status_color = Colors.RED
+            label = "REDIRECT_BAD"
+        elif result.ok:
+            status_color = Colors.GREEN
+            label = "OK"
+        else:
+            status_color = Colors.RED
+            label = "BAD"
+
+        final_part = ""
+        if result.redirected and result.final_url:
+            final_part = f" -> {result.final_url}"
+
+        status_text = f"{result.status_code} {result.status_text}".strip()
+        print(
+            f"[{result.index:03d}] {status_color}{label}{Colors.RESET} "
+            f"{Colors.GRAY}{result.elapsed_ms:8.2f} ms{Colors.RESET}  "
+            f"{status_text}{final_part}"
+        )
+
+        if not result.ok:
+            print(f"      {Colors.RED}原始链接: {result.input_url}{Colors.RESET}")
+            if result.found_on:
+                print(f"      {Colors.RED}所在页面: {result.found_on}{Colors.RESET}")
+
+        if verbose:
+            print(f"      {Colors.GRAY}输入: {result.input_url}{Colors.RESET}")
+            print(
+                f"      {Colors.GRAY}方法: {result.method_used}  协议: {result.protocol or '-'}  "
+                f"响应体: {result.bytes_transferred} 字节{Colors.RESET}"
+            )
+            if result.attempts > 1:
+                print(f"      {Colors.GRAY}尝试次数: {result.attempts}{Colors.RESET}")
+            if result.cached:
+                print(f"      {Colors.GRAY}来源: 缓存{Colors.RESET}")
+            if result.reused:
+                print(f"      {Colors.GRAY}来源: 历史报告{Colors.RESET}")
+            if result.redirect_chain:
+                print(f"      {Colors.GRAY}跳转链: {' -> '.join(result.redirect_chain)}{Colors.RESET}")
+            if result.depth:
+                print(f"      {Colors.GRAY}爬取深度: {result.depth}  来自: {result.found_on}{Colors.RESET}")
+
+
+def build_report_options(args: argparse.Namespace) -> Dict[str, Any]:
+    """报告中记录的检查参数。"""
+
+    return {
+        "method": args.method,
+        "timeout": args.timeout,
+        "concurrency": args.concurrency,
+        "adaptive": args.adaptive,
+        "max_concurrency": args.max_concurrency,
+        "engine": args.engine,
+        "per_host_limit": args.per_host_limit,
+        "host_delay": args.host_delay,
+        "follow_redirects": args.trace_redirects,
+        "trace_redirects": args.trace_redirects,
+        "verify_ssl": not args.no_ssl_verify,
+        "valid_status": args.valid_status,
+        "headers": args.header or [],
+        "cache": args.cache,
+        "cache_ttl": args.cache_ttl,
+        "since": args.since,
+        "retries": args.retries,
+        "retry_backoff": args.retry_backoff,
+        "retry_budget": args.retry_budget,
+        "dns_cache": args.dns_cache or args.dns_prefetch,
+        "dns_prefetch": args.dns_prefetch,
+        "redirect_memo": args.redirect_memo,
+        "redirect_chain": args.redirect_chain,
+        "max_body_bytes": args.max_body_bytes,
+        "range_probe": args.range_probe,
+        "crawl": args.crawl,
+        "workers": args.workers,
+        "shards": args.shards if args.workers or args.queue_db or args.queue_listen else None,
+    }
+
+
+def build_report_summary(summary: ResultSummary, elapsed_ms: float) -> Dict[str, Any]:
+    """报告中的汇总部分。"""
+
+    return {
+        "total": summary.total,
+        "valid": summary.valid,
+        "invalid": summary.invalid,
+        "failed": summary.failed,
+        "cached": summary.cached,
+        "reused": summary.reused,
+        "retried": summary.retried,
+        "protocols": dict(summary.protocols),
+        "bytes_transferred": summary.bytes_transferred,
+        "elapsed_ms": elapsed_ms,
+    }
+
+
+def build_report(results: Sequence[LinkResult], args: argparse.Namespace, urls: Sequence[str], elapsed_ms: float) -> Dict[str, Any]:
+    """构造导出报告。"""
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "options": build_report_options(args),
+        "summary": build_report_summary(ResultSummary.from_results(results), elapsed_ms),
+        "input_urls": list(urls),
+        "results": [asdict(result) for result in results],
+    }
+
+
+class NdjsonReportWriter:
+    """以 NDJSON 格式增量写入报告，每行一个 JSON 对象。
+
+    第一行为 meta（生成时间和检查参数），中间每行一条 result，最后一行为 summary。
+    """
+
+    def __init__(self, file_path: str, args: argparse.Namespace):
+        self.path = Path(file_path)
+        self._file: TextIO = self.path.open("w", encoding="utf-8")
+        self._write_line({
+            "type": "meta",
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "options": build_report_options(args),
+        })
+
+    def _write_line(self, payload: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(payload, ensure_ascii=False))
+        self._file.write("\n")
+
+    def write_result(self, result: LinkResult) -> None:
+        """写入一条检查结果。"""
+
+        self._write_line({"type": "result", **asdict(result)})
+
+    def close(self, summary: Optional[ResultSummary] = None, elapsed_ms: float = 0.0) -> None:
+        """写入汇总行并关闭文件。"""
+
+        if summary is not None:
+            self._write_line({"type": "summary", **build_report_summary(summary, elapsed_ms)})
+        self._file.close()
+
+
+class ColumnarReportWriter:
+    """以紧凑的列式二进制格式增量写入报告，适合百万级结果。
+
+    结果按 row_group_size 条分成行组，每个行组内各列单独用 zlib 压缩；文件末尾的 JSON 页脚
+    记录检查参数、汇总和每个行组各列的位置，读取时可以只解压需要的列。
+    耗时和 Retry-After 以 float32 存储。与 NdjsonReportWriter 的接口一致。
+    """
+
+    # (列名, array 类型码)，str 表示变长字符串列。
+    COLUMNS = [
+        ("index", "q"),
+        ("status_code", "h"),
+        ("flags", "B"),
+        ("elapsed_ms", "f"),
+        ("attempts", "H"),
+        ("bytes_transferred", "Q"),
+        ("retry_after", "f"),
+        ("depth", "i"),
+        ("input_url", "str"),
+        ("checked_url", "str"),
+        ("final_url", "str"),
+        ("status_text", "str"),
+        ("method_used", "str"),
+        ("error", "str"),
+        ("message", "str"),
+        ("protocol", "str"),
+        ("found_on", "str"),
+        ("redirect_chain", "str"),
+    ]
+    FLAG_OK = 1
+    FLAG_REDIRECTED = 2
+    FLAG_CACHED = 4
+    FLAG_MEMOIZED = 8
+    FLAG_REUSED = 16
+
+    def __init__(self, file_path: str, args: argparse.Namespace, row_group_size: int = 65536):
+        self.path = Path(file_path)
+        self.row_group_size = max(1, row_group_size)
+        self._options = build_report_options(args)
+        self._generated_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._file = self.path.open("wb")
+        self._file.write(COLUMNAR_MAGIC)
+        self._row_groups: List[Dict[str, Any]] = []
+        self._reset_buffers()
+
+    def _reset_buffers(self) -> None:
+        self._rows = 0
+        self._buffers: Dict[str, Any] = {
+            name: [] if type_code == "str" else array(type_code) for name, type_code in self.COLUMNS
+        }
+
+    def write_result(self, result: LinkResult) -> None:
+        """写入一条检查结果，攒满一个行组后落盘。"""
+
+        columns = self._buffers
+        columns["index"].append(result.index)
+        columns["status_code"].append(-1 if result.status_code is None else result.status_code)
+        columns["flags"].append(
+            (self.FLAG_OK if result.ok else 0)
+            | (self.FLAG_REDIRECTED if result.redirected else 0)
+            | (self.FLAG_CACHED if result.cached else 0)
+            | (self.FLAG_MEMOIZED if result.memoized else 0)
+            | (self.FLAG_REUSED if result.reused else 0)
+        )
+        columns["elapsed_ms"].append(result.elapsed_ms)
+        columns["attempts"].append(min(result.attempts, 0xFFFF))
+        columns["bytes_transferred"].append(result.bytes_transferred)
+        columns["retry_after"].append(math.nan if result.retry_after is None else result.retry_after)
+        columns["depth"].append(-1 if result.depth is None else result.depth)
+        for name in ("input_url", "checked_url", "final_url", "status_text", "method_used", "error", "message", "protocol", "found_on"):
+            columns[name].append(getattr(result, name))
+        columns["redirect_chain"].append("\n".join(result.redirect_chain))
+
+        self._rows += 1
+        if self._rows >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+
+        group = {"offset": self._file.tell(), "rows": self._rows, "columns": []}
+        for name, type_code in self.COLUMNS:
+            values = self._buffers[name]
+            raw = _encode_strings(values) if type_code == "str" else _encode_array(values)
+            data = zlib.compress(raw, 6)
+            self._file.write(data)
+            group["columns"].append(len(data))
+        self._row_groups.append(group)
+        self._reset_buffers()
+
+    def close(self, summary: Optional[ResultSummary] = None, elapsed_ms: float = 0.0) -> None:
+        """写出最后一个行组和页脚并关闭文件。"""
+
+        self._flush()
+        footer = json.dumps(
+            {
+                "format": "link_checker_columnar",
+                "version": 1,
+                "generated_at": self._generated_at,
+                "options": self._options,
+                "summary": build_report_summary(summary, elapsed_ms) if summary is not None else None,
+                "columns": self.COLUMNS,
+                "row_groups": self._row_groups,
+            },
+            ensure_ascii=False,
+        ).encode("utf-8")
+        self._file.write(footer)
+        self._file.write(struct.pack("<Q", len(footer)) + COLUMNAR_MAGIC)
+        self._file.close()
+
+
+def _encode_array(values: array) -> bytes:
+    """数值列统一按小端字节序存储。"""
+
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _decode_array(type_code: str, raw: bytes) -> array:
+    values = array(type_code)
+    values.frombytes(raw)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _encode_strings(values: Sequence[Optional[str]]) -> bytes:
+    """字符串列：先是每个值的 UTF-8 字节长度（None 为 -1），再是全部内容。"""
+
+    encoded = [value.encode("utf-8") if value is not None else None for value in values]
+    lengths = array("i", (-1 if item is None else len(item) for item in encoded))
+    return _encode_array(lengths) + b"".join(item for item in encoded if item)
+
+
+def _decode_strings(raw: bytes, rows: int) -> List[Optional[str]]:
+    header_size = rows * array("i").itemsize
+    lengths = _decode_array("i", raw[:header_size])
+    values: List[Optional[str]] = []
+    position = header_size
+    for length in lengths:
+        if length < 0:
+            values.append(None)
+            continue
+        values.append(raw[position:position + length].decode("utf-8"))
+        position += length
+    return values
+
+
+class ColumnarReport:
+    """读取 ColumnarReportWriter 写出的列式报告。
+
+    只读取页脚即可拿到参数和汇总；iter_results(only_failed=True) 先只解压 flags 列，
+    没有失败链接的行组直接跳过，其余列只在需要时解压。
+    """
+
+    def __init__(self, file_path: str):
+        self.path = Path(file_path)
+        with self.path.open("rb") as report_file:
+            report_file.seek(0, 2)
+            size = report_file.tell()
+            if size < len(COLUMNAR_MAGIC) + 12:
+                raise ValueError(f"列式报告不完整: {file_path}")
+            report_file.seek(size - 12)
+            footer_size, magic = struct.unpack("<Q4s", report_file.read(12))
+            if magic != COLUMNAR_MAGIC:
+                raise ValueError(f"列式报告缺少页脚，可能未正常写完: {file_path}")
+            report_file.seek(size - 12 - footer_size)
+            footer = json.loads(report_file.read(footer_size).decode("utf-8"))
+
+        self.options: Dict[str, Any] = footer.get("options", {})
+        self.summary: Optional[Dict[str, Any]] = footer.get("summary")
+        self.generated_at: Optional[str] = footer.get("generated_at")
+        self.columns: List[Tuple[str, str]] = [tuple(column) for column in footer["columns"]]
+        self.row_groups: List[Dict[str, Any]] = footer["row_groups"]
+        self.row_count = sum(group["rows"] for group in self.row_groups)
+
+    def read_column(self, name: str) -> Iterator[Any]:
+        """按行依次产出某一列的值，只解压这一列。"""
+
+        with self.path.open("rb") as report_file:
+            for group in self.row_groups:
+                yield from self._read_group_column(report_file, group, name)
+
+    def iter_results(self, only_failed: bool = False) -> Iterator[LinkResult]:
+        """依次还原检查结果，only_failed=True 时只产出无效或出错的链接。"""
+
+        names = [name for name, _ in self.columns]
+        with self.path.open("rb") as report_file:
+            for group in self.row_groups:
+                flags = self._read_group_column(report_file, group, "flags")
+                rows = [row for row, flag in enumerate(flags) if not (only_failed and flag & ColumnarReportWriter.FLAG_OK)]
+                if not rows:
+                    continue
+
+                values = {"flags": flags}
+                for name in names:
+                    if name != "flags":
+                        values[name] = self._read_group_column(report_file, group, name)
+                for row in rows:
+                    yield self._build_result(values, row)
+
+    def _read_group_column(self, report_file: Any, group: Dict[str, Any], name: str) -> Sequence[Any]:
+        position = [column_name for column_name, _ in self.columns].index(name)
+        type_code = self.columns[position][1]
+        report_file.seek(group["offset"] + sum(group["columns"][:position]))
+        raw = zlib.decompress(report_file.read(group["columns"][position]))
+        return _decode_strings(raw, group["rows"]) if type_code == "str" else _decode_array(type_code, raw)
+
+    @staticmethod
+    def _build_result(values: Dict[str, Sequence[Any]], row: int) -> LinkResult:
+        flags = values["flags"][row]
+        status_code = values["status_code"][row]
+        retry_after = values["retry_after"][row]
+        depth = values["depth"][row]
+        chain = values["redirect_chain"][row]
+        return LinkResult(
+            index=values["index"][row],
+            input_url=values["input_url"][row],
+            checked_url=values["checked_url"][row],
+            final_url=values["final_url"][row],
+            status_code=None if status_code < 0 else status_code,
+            status_text=values["status_text"][row] or "",
+            ok=bool(flags & ColumnarReportWriter.FLAG_OK),
+            redirected=bool(flags & ColumnarReportWriter.FLAG_REDIRECTED),
+            redirect_chain=tuple(chain.split("\n")) if chain else (),
+            method_used=values["method_used"][row],
+            elapsed_ms=values["elapsed_ms"][row],
+            error=values["error"][row],
+            message=values["message"][row],
+            cached=bool(flags & ColumnarReportWriter.FLAG_CACHED),
+            memoized=bool(flags & ColumnarReportWriter.FLAG_MEMOIZED),
+            reused=bool(flags & ColumnarReportWriter.FLAG_REUSED),
+            retry_after=None if math.isnan(retry_after) else retry_after,
+            attempts=values["attempts"][row],
+            protocol=values["protocol"][row],
+            bytes_transferred=values["bytes_transferred"][row],
+            found_on=values["found_on"][row],
+            depth=None if depth < 0 else depth,
+        )
+
+
+def create_report_writer(file_path: str, args: argparse.Namespace) -> Union[NdjsonReportWriter, ColumnarReportWriter]:
+    """按输出文件扩展名选择增量报告格式：.lcr 为列式报告，其余为 NDJSON。"""
+
+    if Path(file_path).suffix.lower() == COLUMNAR_REPORT_SUFFIX:
+        return ColumnarReportWriter(file_path, args)
+    return NdjsonReportWriter(file_path, args)
+
+
+def stream_check(
+    checker: LinkChecker,
+    urls: Iterable[str],
+    args: argparse.Namespace,
+    start_time: float,
+    plan: Optional[IncrementalPlan] = None,
+    crawler: Optional[Crawler] = None,
+) -> ResultSummary:
+    """流式检查：结果一产出就打印并追加到 NDJSON（或列式）报告，不在内存中保留结果列表。
+
+    增量模式下按完成顺序输出时先输出沿用的历史结果；--ordered 时沿用结果按输入序号并入重新检查的结果，
+    整体仍按输入顺序输出。爬取模式下按完成顺序输出。
+    """
+
+    summary = ResultSummary()
+    writer = create_report_writer(args.output, args) if args.output else None
+
+    def handle(result: LinkResult) -> None:
+        summary.add(result)
+        if checker.progress:
+            checker.progress.clear_line()
+        ResultPrinter.print_result(result, verbose=args.verbose)
+        if writer:
+            writer.write_result(result)
+
+    try:
+        ordered = args.ordered and not crawler
+        if plan:
+            if not ordered:
+                for result in plan.reused:
+                    handle(result)
+            urls = plan.urls
+
+        if crawler:
+            results: Iterable[LinkResult] = crawler.crawl(urls, args.concurrency)
+        else:
+            results = checker.iter_results(
+                urls, args.concurrency, ordered=args.ordered, buffer_size=args.reorder_buffer, lookahead=args.lookahead
+            )
+        if plan:
+            results = (plan.restore_index(result) for result in results)
+            if ordered:
+                # 两路都按输入序号递增，归并后整体保持输入顺序。
+                results = heapq.merge(plan.reused, results, key=lambda result: result.index)
+        for result in results:
+            handle(result)
+    finally:
+        elapsed_ms = (time.time() - start_time) * 1000
+        if writer:
+            writer.close(summary, elapsed_ms)
+
+    ResultPrinter.print_summary(summary, elapsed_ms)
+    if checker.adaptive:
+        ResultPrinter.print_adaptive(checker.adaptive)
+    if writer:
+        label = "列式" if isinstance(writer, ColumnarReportWriter) else "NDJSON "
+        print(f"{Colors.GREEN}✓ {label}报告已保存到: {writer.path}{Colors.RESET}")
+
+    return summary
+
+
+class WorkQueue:
+    """分布式检查使用的 SQLite 任务队列。
+
+    协调者把链接按主机哈希分片写入队列，工作进程每次领取一整个分片（租约制），
+    检查结果分批写回；工作进程异常退出时租约到期，分片由其他工作进程接手，
+    已写回的结果不会重复检查。
+    队列文件使用 WAL 日志，须放在协调者本机磁盘上（不能放在 NFS/SMB 等网络文件系统上）；
+    其他机器上的工作进程不直接打开文件，而是通过 QueueServer 以 HTTP 访问同一个队列。
+    连接允许跨线程使用，但同一时间只能有一个线程调用，QueueServer 用锁保证这一点。
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS tasks (idx INTEGER PRIMARY KEY, url TEXT NOT NULL, shard INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS tasks_shard ON tasks (shard);
+            CREATE TABLE IF NOT EXISTS shards (
+                shard INTEGER PRIMARY KEY,
+                total INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL
+            );
+            CREATE TABLE IF NOT EXISTS results (idx INTEGER PRIMARY KEY, shard INTEGER NOT NULL, data TEXT NOT NULL);
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def shard_of(url: str, shard_count: int) -> int:
+        """按主机计算分片号，各进程、各机器结果一致。"""
+
+        digest = hashlib.blake2b(url_host(url).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % shard_count
+
+    def populate(self, urls: Iterable[str], options: Dict[str, Any], shard_count: int = DEFAULT_SHARD_COUNT) -> int:
+        """清空队列后写入本次的检查参数和全部链接，返回链接数。
+
+        队列中还有未完成的分片时可能正被工作进程使用，抛出 RuntimeError 而不是清空。
+        """
+
+        shard_count = max(1, shard_count)
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            if not self.is_complete():
+                raise RuntimeError(f"队列 {self.path} 中还有未完成的检查，可能正被其他工作进程使用，请等待完成或换一个队列文件")
+            for table in ("meta", "tasks", "shards", "results"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('options', ?)", (json.dumps(options),))
+
+            total = 0
+            batch: List[Tuple[int, str, int]] = []
+            for total, url in enumerate(urls, start=1):
+                batch.append((total, url, self.shard_of(url, shard_count)))
+                if len(batch) >= 10000:
+                    self.conn.executemany("INSERT INTO tasks (idx, url, shard) VALUES (?, ?, ?)", batch)
+                    batch.clear()
+            self.conn.executemany("INSERT INTO tasks (idx, url, shard) VALUES (?, ?, ?)", batch)
+            self.conn.execute("INSERT INTO shards (shard, total) SELECT shard, COUNT(*) FROM tasks GROUP BY shard")
+        return total
+
+    def load_options(self) -> Dict[str, Any]:
+        """读取协调者写入的检查参数。"""
+
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'options'").fetchone()
+        if row is None:
+            raise ValueError(f"队列中没有检查任务: {self.path}")
+        return json.loads(row[0])
+
+    def claim_shard(self, worker: str, lease: float) -> Optional[int]:
+        """领取一个待检查或租约已过期的分片，优先领取链接多的分片，没有时返回 None。"""
+
+        now = time.time()
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self.conn.execute(
+                """
+                SELECT shard FROM shards
+                WHERE status = 'pending' OR (status = 'claimed' AND lease_until < ?)
+                ORDER BY total DESC LIMIT 1
+                """,
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE shards SET status = 'claimed', worker = ?, lease_until = ? WHERE shard = ?",
+                (worker, now + lease, row[0]),
+            )
+        return row[0]
+
+    def shard_tasks(self, shard: int) -> List[Tuple[int, str]]:
+        """分片中尚未有结果的 (序号, 链接)。"""
+
+        return self.conn.execute(
+            """
+            SELECT idx, url FROM tasks
+            WHERE shard = ? AND idx NOT IN (SELECT idx FROM results WHERE shard = ?)
+            ORDER BY idx
+            """,
+            (shard, shard),
+        ).fetchall()
+
+    def store_results(self, shard: int, worker: str, results: Sequence[LinkResult], lease: float) -> None:
+        """写回一批结果并续租分片。"""
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO results (idx, shard, data) VALUES (?, ?, ?)",
+                [(result.index, shard, json.dumps(asdict(result), ensure_ascii=False)) for result in results],
+            )
+            self.conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE shard = ? AND worker = ? AND status = 'claimed'",
+                (time.time() + lease, shard, worker),
+            )
+
+    def renew_lease(self, shard: int, worker: str, lease: float) -> None:
+        """续租分片，由工作进程的心跳线程定期调用。"""
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE shard = ? AND worker = ? AND status = 'claimed'",
+                (time.time() + lease, shard, worker),
+            )
+
+    def finish_shard(self, shard: int, worker: str) -> None:
+        """标记分片完成。"""
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE shards SET status = 'done', lease_until = NULL WHERE shard = ? AND worker = ?",
+                (shard, worker),
+            )
+
+    def progress(self) -> Tuple[int, int]:
+        """返回 (已有结果的链接数, 链接总数)。"""
+
+        done = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        total = self.conn.execute("SELECT COALESCE(SUM(total), 0) FROM shards").fetchone()[0]
+        return done, total
+
+    def is_complete(self) -> bool:
+        """全部分片都已完成。"""
+
+        row = self.conn.execute("SELECT COUNT(*) FROM shards WHERE status != 'done'").fetchone()
+        return row[0] == 0
+
+    def iter_results(self) -> Iterator[LinkResult]:
+        """按输入顺序读出全部结果。"""
+
+        for (data,) in self.conn.execute("SELECT data FROM results ORDER BY idx"):
+            yield result_from_dict(json.loads(data))
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class _QueueRequestHandler(BaseHTTPRequestHandler):
+    """QueueServer 的请求处理：POST /方法名，请求体为 JSON 参数，响应 {"result": ...}。"""
+
+    queue_server: "QueueServer"
+
+    def do_POST(self) -> None:
+        server = self.queue_server
+        token = self.headers.get("X-Queue-Token", "")
+        if server.token and not hmac.compare_digest(token.encode("utf-8"), server.token.encode("utf-8")):
+            self._reply(403, {"error": "队列令牌错误"})
+            return
+
+        name = self.path.strip("/")
+        try:
+            params = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            result = server.dispatch(name, params, self.headers.get("X-Worker-Id", ""))
+        except (KeyError, TypeError, ValueError, json.JSONDecodeError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        except sqlite3.Error as exc:
+            self._reply(500, {"error": str(exc)})
+            return
+        self._reply(200, {"result": result})
+
+    def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return
+
+
+class QueueServer:
+    """协调者在本机队列文件之前提供的 HTTP 服务，其他机器的工作进程用 --worker http://主机:端口 加入。
+
+    领取分片、续租、写回结果都由协调者在本机 SQLite 上完成，租约时间以协调者的时钟为准，
+    各机器之间不需要共享文件或同步时钟。指定 token 后请求须带相同的 X-Queue-Token 头。
+    """
+
+    METHODS = {"load_options", "claim_shard", "shard_tasks", "store_results", "renew_lease", "finish_shard", "is_complete"}
+
+    def __init__(self, queue_path: str, host: str = "127.0.0.1", port: int = 0, token: Optional[str] = None):
+        self.work_queue = WorkQueue(queue_path)
+        self.token = token
+        self._lock = threading.Lock()
+        # 调用过队列、还没确认队列已完成的远程工作进程。
+        self._active: Set[str] = set()
+        handler = type("QueueRequestHandler", (_QueueRequestHandler,), {"queue_server": self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.server.serve_forever, name="queue-server", daemon=True)
+        self._thread.start()
+
+    def dispatch(self, name: str, params: Dict[str, Any], worker: str) -> Any:
+        """执行一次远程调用，返回可以 JSON 序列化的结果。"""
+
+        if name not in self.METHODS:
+            raise ValueError(f"未知的队列操作: {name}")
+        if name == "store_results":
+            params = {**params, "results": [result_from_dict(item) for item in params["results"]]}
+
+        with self._lock:
+            result = getattr(self.work_queue, name)(**params)
+            if worker:
+                if name == "is_complete" and result:
+                    self._active.discard(worker)
+                else:
+                    self._active.add(worker)
+        return result
+
+    def wait_for_workers(self, timeout: float = QUEUE_LINGER_SECONDS) -> None:
+        """队列完成后等待远程工作进程确认完成再关闭，避免它们连不上协调者而报错退出。"""
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._active:
+                    return
+            time.sleep(0.1)
+
+    def close(self) -> None:
+        if self._thread:
+            self.server.shutdown()
+            self._thread.join()
+        self.server.server_close()
+        self.work_queue.close()
+
+
+class RemoteWorkQueue:
+    """通过 QueueServer 访问协调者队列的客户端，提供与 WorkQueue 相同的工作进程接口。"""
+
+    def __init__(self, url: str, worker_id: str = "", token: Optional[str] = None, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["X-Worker-Id"] = worker_id
+        if token:
+            self.session.headers["X-Queue-Token"] = token
+
+    def _call(self, name: str, **params: Any) -> Any:
+        error: Optional[Exception] = None
+        for attempt in range(QUEUE_RPC_RETRIES):
+            if attempt:
+                time.sleep(attempt)
+            try:
+                response = self.session.post(f"{self.url}/{name}", json=params, timeout=self.timeout)
+            except requests.RequestException as exc:
+                error = exc
+                continue
+            if response.status_code >= 500:
+                error = RuntimeError(f"协调者返回 {response.status_code}: {response.text}")
+                continue
+            payload = response.json()
+            if response.status_code != 200:
+                raise ValueError(f"协调者拒绝请求（{response.status_code}）: {payload.get('error')}")
+            return payload["result"]
+        raise RuntimeError(f"无法访问协调者 {self.url}: {error}")
+
+    def load_options(self) -> Dict[str, Any]:
+        return self._call("load_options")
+
+    def claim_shard(self, worker: str, lease: float) -> Optional[int]:
+        return self._call("claim_shard", worker=worker, lease=lease)
+
+    def shard_tasks(self, shard: int) -> List[Tuple[int, str]]:
+        return [(index, url) for index, url in self._call("shard_tasks", shard=shard)]
+
+    def store_results(self, shard: int, worker: str, results: Sequence[LinkResult], lease: float) -> None:
+        self._call("store_results", shard=shard, worker=worker, results=[asdict(result) for result in results], lease=lease)
+
+    def renew_lease(self, shard: int, worker: str, lease: float) -> None:
+        self._call("renew_lease", shard=shard, worker=worker, lease=lease)
+
+    def finish_shard(self, shard: int, worker: str) -> None:
+        self._call("finish_shard", shard=shard, worker=worker)
+
+    def is_complete(self) -> bool:
+        return self._call("is_complete")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+def open_work_queue(target: str, worker_id: str = "", token: Optional[str] = None) -> Union[WorkQueue, RemoteWorkQueue]:
+    """按 --worker 的参数打开队列：http(s):// 地址连接协调者，否则视为本机队列文件。"""
+
+    if target.startswith(("http://", "https://")):
+        return RemoteWorkQueue(target, worker_id, token)
+    return WorkQueue(target)
+
+
+def parse_listen_address(value: str) -> Tuple[str, int]:
+    """解析 --queue-listen 的 主机:端口，端口 0 表示随机端口。"""
+
+    host, _, port = value.rpartition(":")
+    if not port.isdigit() or int(port) > 65535:
+        raise ValueError(f"监听地址应为 主机:端口: {value}")
+    return host.strip("[]") or "0.0.0.0", int(port)
+
+
+def run_queue_worker(
+    queue_path: str,
+    worker_id: Optional[str] = None,
+    poll_interval: float = 1.0,
+    lease: float = QUEUE_LEASE_SECONDS,
+    token: Optional[str] = None,
+) -> int:
+    """工作进程主循环：反复领取分片并检查，直到队列全部完成，返回本进程检查的链接数。
+
+    queue_path 为本机队列文件，或协调者 --queue-listen 提供的 http://主机:端口 地址。
+    检查参数取自协调者写入队列的命令行参数，各工作进程的设置保持一致。
+    检查期间由心跳线程按 lease 的三分之一周期续租当前分片，单个请求再慢也不会丢失租约，
+    进程异常退出后分片在一个租约内即可被其他工作进程接手。
+    """
+
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    work_queue = open_work_queue(queue_path, worker_id, token)
+    args = argparse.Namespace(**{**work_queue.load_options(), "progress": False, "metrics_file": None})
+    dns_cache = DnsCache(ttl=args.dns_ttl, negative_ttl=args.dns_negative_ttl) if args.dns_cache or args.dns_prefetch else None
+    checker = build_checker(args, dns_cache)
+    checked = 0
+    current_shard: List[Optional[int]] = [None]
+    stop_heartbeat = threading.Event()
+
+    def heartbeat() -> None:
+        # 心跳线程单独打开一个连接，不与检查线程争用同一个 SQLite 连接或 HTTP 会话。
+        heartbeat_queue = open_work_queue(queue_path, worker_id, token)
+        try:
+            while not stop_heartbeat.wait(lease / 3):
+                shard = current_shard[0]
+                if shard is not None:
+                    heartbeat_queue.renew_lease(shard, worker_id, lease)
+        finally:
+            heartbeat_queue.close()
+
+    heartbeat_thread = threading.Thread(target=heartbeat, name="queue-heartbeat", daemon=True)
+    heartbeat_thread.start()
+
+    try:
+        while True:
+            shard = work_queue.claim_shard(worker_id, lease)
+            current_shard[0] = shard
+            if shard is None:
+                if work_queue.is_complete():
+                    return checked
+                # 其余分片正被其他工作进程检查，等待完成或租约过期。
+                time.sleep(poll_interval)
+                continue
+
+            tasks = work_queue.shard_tasks(shard)
+            batch: List[LinkResult] = []
+            last_flush = time.monotonic()
+            for result in checker.iter_results((url for _, url in tasks), args.concurrency):
+                result.index = tasks[result.index - 1][0]
+                batch.append(result)
+                checked += 1
+                if len(batch) >= 200 or time.monotonic() - last_flush >= 1.0:
+                    work_queue.store_results(shard, worker_id, batch, lease)
+                    batch = []
+                    last_flush = time.monotonic()
+
+            work_queue.store_results(shard, worker_id, batch, lease)
+            work_queue.finish_shard(shard, worker_id)
+            current_shard[0] = None
+    finally:
+        stop_heartbeat.set()
+        heartbeat_thread.join()
+        checker.close()
+        if checker.cache:
+            checker.cache.close()
+        work_queue.close()
+
+
+def distributed_check(urls: Iterable[str], args: argparse.Namespace) -> List[LinkResult]:
+    """协调者：把链接写入任务队列，启动本机工作进程，等待全部完成后按输入顺序返回结果。
+
+    未指定 --queue-db 时使用临时队列文件；指定 --queue-listen 时通过 QueueServer 对外提供队列，
+    其他机器用 --worker http://主机:端口 加入；--workers 0 时只等待另外启动的工作进程。
+    """
+
+    temp_dir = None if args.queue_db else tempfile.TemporaryDirectory(prefix="link_checker_queue_")
+    queue_path = args.queue_db or str(Path(temp_dir.name) / "queue.db")
+    work_queue = WorkQueue(queue_path)
+    queue_server: Optional[QueueServer] = None
+    processes: List[subprocess.Popen] = []
+
+    try:
+        excluded = {"urls", "input_urls", "files", "stdin", "queue_token"}
+        options = {key: value for key, value in vars(args).items() if key not in excluded}
+        total = work_queue.populate(urls, options, args.shards)
+        print(f"{Colors.GRAY}分布式模式: {total} 个链接已写入队列 {queue_path}，本机工作进程 {args.workers} 个{Colors.RESET}")
+        if args.queue_listen:
+            host, port = parse_listen_address(args.queue_listen)
+            queue_server = QueueServer(queue_path, host, port, args.queue_token)
+            queue_server.start()
+            token_hint = " --queue-token <令牌>" if args.queue_token else ""
+            print(
+                f"{Colors.GRAY}队列服务: {queue_server.url}，其他机器可运行 "
+                f"python tools/link_checker.py --worker http://<本机地址>:{queue_server.server.server_address[1]}{token_hint} 加入{Colors.RESET}"
+            )
+
+        worker_command = [sys.executable, str(Path(__file__).resolve()), "--worker", queue_path]
+        for number in range(args.workers):
+            worker_id = f"{socket.gethostname()}-{os.getpid()}-{number + 1}"
+            processes.append(subprocess.Popen(worker_command + ["--worker-id", worker_id]))
+
+        last_report = 0.0
+        while not work_queue.is_complete():
+            if processes and all(process.poll() is not None for process in processes):
+                raise RuntimeError("本机工作进程已全部退出，但队列中仍有未完成的分片")
+            if args.progress and time.monotonic() - last_report >= args.progress_interval:
+                done, total = work_queue.progress()
+                print(f"{Colors.GRAY}分布式进度: {done}/{total}{Colors.RESET}", file=sys.stderr)
+                last_report = time.monotonic()
+            time.sleep(0.2)
+
+        if queue_server:
+            queue_server.wait_for_workers()
+        return list(work_queue.iter_results())
+    finally:
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+            process.wait()
+        if queue_server:
+            queue_server.close()
+        work_queue.close()
+        if temp_dir:
+            temp_dir.cleanup()
+
+
+def build_checker(args: argparse.Namespace, dns_cache: Optional[DnsCache] = None) -> LinkChecker:
+    """根据命令行参数创建检查器，协调者和分布式工作进程共用。
+
+    引擎依赖缺失时抛出 RuntimeError。
+    """
+
+    checker_options: Dict[str, Any] = {
+        "timeout": args.timeout,
+        "verify_ssl": not args.no_ssl_verify,
+        "follow_redirects": args.trace_redirects,
+        "trace_redirects": args.trace_redirects,
+        "method": args.method,
+        "headers": parse_key_value_pairs(args.header),
+        "valid_status_codes": parse_status_spec(args.valid_status),
+        "cache": LinkCache(args.cache, ttl=args.cache_ttl) if args.cache else None,
+        "per_host_limit": args.per_host_limit,
+        "host_delay": args.host_delay,
+        "dns_cache": dns_cache,
+        "memoize_redirects": args.redirect_memo,
+        "store_redirect_chain": args.redirect_chain,
+        "max_body_bytes": args.max_body_bytes,
+        "range_probe": args.range_probe,
+        "progress": (
+            ProgressMonitor(
+                interval=args.progress_interval,
+                stream=sys.stderr if args.progress else None,
+                metrics_path=args.metrics_file,
+            )
+            if args.progress or args.metrics_file
+            else None
+        ),
+        "adaptive": AdaptiveConcurrency(max_limit=args.max_concurrency) if args.adaptive else None,
+        "retry_policy": RetryPolicy(
+            max_retries=max(0, args.retries),
+            backoff_base=args.retry_backoff,
+            budget_ratio=args.retry_budget,
+        ),
+    }
+    checker_classes = {"thread": LinkChecker, "async": AsyncLinkChecker, "http2": Http2LinkChecker}
+    return checker_classes[args.engine](**checker_options)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构造命令行参数解析器。"""
+
+    parser = argparse.ArgumentParser(
+        description="链接有效性检查工具 - 批量验证 URL 是否可访问",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 使用示例:
   # 直接传 URL 检查
@@ -459,6 +3857,12 @@ def main() -> None:
   # 从文件读取（支持 txt/md/html/json 等文本文件）
   python tools/link_checker.py -f data/urls.txt
 
+  # 超大文件：4 个进程并行提取，配合流式模式边提取边检查
+  python tools/link_checker.py -f data/dump.html --extract-workers 4 --mmap --stream
+
+  # 上亿链接：布隆过滤器去重，内存固定
+  python tools/link_checker.py -f data/crawl.txt --dedupe bloom --dedupe-capacity 100000000 --stream
+
   # 从标准输入读取
   cat data/urls.txt | python tools/link_checker.py --stdin
 
@@ -467,6 +3871,59 @@ def main() -> None:
 
   # 导出 JSON 报告
   python tools/link_checker.py -f data/urls.txt --output link_checker_report.json
+
+  # 流式输出，按输入顺序打印并增量写入 NDJSON 报告
+  python tools/link_checker.py -f data/urls.txt --stream --ordered --output report.ndjson
+
+  # 百万级链接导出列式报告，体积小、读写快，可只读取失败链接
+  python tools/link_checker.py -f data/urls.txt --stream --output report.lcr
+
+  # 使用本地缓存，一天内检查过的有效链接直接跳过
+  python tools/link_checker.py -f data/urls.txt --cache data/link_cache.db --cache-ttl 86400
+
+  # 增量检查：只检查相对上次报告新增的链接和上次失败的链接
+  python tools/link_checker.py -f data/urls.txt --since last_report.json --output report.json
+
+  # 单主机最多 2 个并发、两次请求至少间隔 0.5 秒
+  python tools/link_checker.py -f data/urls.txt --per-host-limit 2 --host-delay 0.5
+
+  # 不稳定的主机最多重试 4 次，首次退避 1 秒
+  python tools/link_checker.py -f data/urls.txt --retries 4 --retry-backoff 1
+
+  # 主机数量很多时先并发预解析 DNS，不存在的域名直接失败
+  python tools/link_checker.py -f data/urls.txt --dns-prefetch
+
+  # 不支持 HEAD 的站点用 GET 检查，只请求首字节，最多读 4 KB 响应体
+  python tools/link_checker.py -f data/urls.txt -m GET --range-probe --max-body-bytes 4096
+
+  # 自适应并发：从 20 起步，按对端承受能力自动调整，最多 2000 个在途检查
+  python tools/link_checker.py -f data/urls.txt --engine async --adaptive --max-concurrency 2000
+
+  # 内网单个服务：单主机不设上限，由自适应并发决定
+  python tools/link_checker.py -f data/intranet_urls.txt --adaptive --max-concurrency 200
+
+  # 长时间扫描：实时显示进度，并每 5 秒写一次 Prometheus 指标文件
+  python tools/link_checker.py -f data/urls.txt --stream --progress --progress-interval 5 --metrics-file data/link_checker.prom
+
+  # 爬取整站：从首页出发检查 3 层以内同域页面中的全部链接
+  python tools/link_checker.py https://example.com --crawl 3 --stream --output crawl.ndjson
+
+  # 分布式模式：链接按主机分片，由 8 个工作进程并行检查
+  python tools/link_checker.py -f data/urls.txt --workers 8 --output report.json
+
+  # 指定队列文件后，可在本机另开终端用 --worker 加入更多工作进程（队列文件须在本地磁盘）
+  python tools/link_checker.py -f data/urls.txt --workers 4 --queue-db data/queue.db
+  python tools/link_checker.py --worker data/queue.db
+
+  # 多台机器：协调者以 HTTP 提供队列，其他机器上的工作进程通过网络加入
+  python tools/link_checker.py -f data/urls.txt --workers 4 --queue-listen 0.0.0.0:8765 --queue-token s3cret
+  python tools/link_checker.py --worker http://10.0.0.5:8765 --queue-token s3cret
+
+  # 链接集中在少数域名时使用 HTTP/2 多路复用（需要 pip install 'httpx[http2]'）
+  python tools/link_checker.py -f data/urls.txt --engine http2 -c 100
+
+  # 大批量链接使用异步引擎，单主机最多 20 个并发连接
+  python tools/link_checker.py -f data/urls.txt --engine async -c 2000 --per-host-limit 20
         """,
     )
 
@@ -474,59 +3931,221 @@ def main() -> None:
     parser.add_argument("-u", "--url", action="append", dest="input_urls", help="待检查的 URL，可多次使用")
     parser.add_argument("-f", "--file", action="append", dest="files", help="从文件读取 URL，可多次使用")
     parser.add_argument("--stdin", action="store_true", help="从标准输入读取 URL 文本")
+    parser.add_argument("--extract-workers", type=int, default=0, help="提取文件链接的进程数，0 表示在主进程中提取，默认 0")
+    parser.add_argument("--mmap", action="store_true", help="使用内存映射读取输入文件")
+    parser.add_argument("--dedupe", choices=["exact", "fingerprint", "bloom"], default="exact", help="链接去重方式：exact 精确集合，fingerprint 64 位指纹表，bloom 布隆过滤器，默认 exact；上亿链接时请配合 --stream，非流式模式仍会在内存中保存全部结果")
+    parser.add_argument("--dedupe-capacity", type=int, default=1 << 20, help="预计链接数，用于预分配指纹表或布隆过滤器，默认 1048576")
+    parser.add_argument("--bloom-error-rate", type=float, default=0.001, help="布隆过滤器误判率，默认 0.001")
 
     parser.add_argument("-m", "--method", choices=["HEAD", "GET", "OPTIONS"], default="HEAD", help="检查时使用的 HTTP 方法，默认 HEAD")
-    parser.add_argument("-c", "--concurrency", type=int, default=20, help="并发数，默认 20")
+    parser.add_argument("-c", "--concurrency", type=int, default=20, help="并发数，--adaptive 模式下为初始并发数，默认 20")
+    parser.add_argument("--adaptive", action="store_true", help="自适应并发（AIMD）：耗时和错误率正常时逐步提高并发，出现超时、429、5xx 激增或耗时上升时回退，全局和每个主机分别调整；单主机并发不超过 --per-host-limit（默认不限制，仅受 --max-concurrency 约束）")
+    parser.add_argument("--max-concurrency", type=int, default=ADAPTIVE_MAX_CONCURRENCY, help=f"自适应并发的全局上限，单主机上限仍为 --per-host-limit，默认 {ADAPTIVE_MAX_CONCURRENCY}")
+    parser.add_argument("--engine", choices=["thread", "async", "http2"], default="thread", help="检查引擎：thread 使用线程池，async 使用 aiohttp，http2 使用 httpx 的 HTTP/2 多路复用，默认 thread")
+    parser.add_argument("--per-host-limit", type=int, default=0, help="单个主机的最大并发请求数，0 表示不限制（默认）")
+    parser.add_argument("--host-delay", type=float, default=0.0, help="同一主机两次请求之间的最小间隔（秒），默认 0")
+    parser.add_argument("--max-body-bytes", type=int, default=64 * 1024, help="GET 检查时最多读取的响应体字节数，超出即断开连接，0 表示读完响应头就断开，默认 65536")
+    parser.add_argument("--range-probe", action="store_true", help="GET 检查时附加 Range: bytes=0-0 只请求首字节，服务器返回 416 时去掉 Range 重试")
     parser.add_argument("-t", "--timeout", type=float, default=10.0, help="单个链接超时时间（秒），默认 10")
     parser.add_argument("-H", "--header", action="append", dest="header", help="请求头，格式: Key:Value，可多次使用")
+    parser.add_argument("--retries", type=int, default=2, help="超时、连接错误、429、5xx 的最大重试次数，0 表示不重试，默认 2")
+    parser.add_argument("--retry-backoff", type=float, default=0.5, help="首次重试前的退避时间（秒），之后指数增长并加入抖动，默认 0.5")
+    parser.add_argument("--retry-budget", type=float, default=0.2, help="全局重试预算，重试次数不超过已发请求数的该比例（另有 10 次保底），默认 0.2")
+    parser.add_argument("--dns-cache", action="store_true", help="启用进程内 DNS 缓存（含域名不存在的负缓存）")
+    parser.add_argument("--dns-prefetch", action="store_true", help="检查前并发解析全部主机名，隐含 --dns-cache")
+    parser.add_argument("--dns-ttl", type=float, default=300.0, help="DNS 缓存有效期（秒），默认 300")
+    parser.add_argument("--dns-negative-ttl", type=float, default=60.0, help="域名不存在的负缓存有效期（秒），默认 60")
     parser.add_argument("--valid-status", default="200-399", help="认为有效的状态码规则，支持 200,2xx,301-399,all，默认 200-399")
     parser.add_argument("--no-ssl-verify", action="store_true", help="忽略 SSL 证书验证")
     parser.add_argument("--trace-redirects", action=argparse.BooleanOptionalAction, default=True, help="重定向后继续追踪最终结果，默认开启")
     parser.add_argument("--no-redirect", action="store_false", dest="trace_redirects", help=argparse.SUPPRESS)
-    parser.add_argument("--output", metavar="FILE", help="将检查报告导出为 JSON 文件")
+    parser.add_argument("--redirect-chain", action=argparse.BooleanOptionalAction, default=True, help="在结果中保存完整跳转链，关闭后只保留最终地址以节省内存，默认开启")
+    parser.add_argument("--redirect-memo", action=argparse.BooleanOptionalAction, default=True, help="本次运行内记住每一跳重定向的最终结果，跳到已知地址时直接复用，默认开启")
+    parser.add_argument("--output", metavar="FILE", help="将检查报告导出为 JSON 文件（--stream 模式下为 NDJSON），以 .lcr 结尾时导出紧凑的列式二进制报告")
+    parser.add_argument("--stream", action="store_true", help="流式模式：边检查边输出结果，报告以 NDJSON 增量写入")
+    parser.add_argument("--ordered", action="store_true", help="流式模式下按输入顺序输出（使用有界重排缓冲区）")
+    parser.add_argument("--reorder-buffer", type=int, default=0, help="流式 --ordered 模式下重排缓冲区最多保存的结果数，默认并发数的 4 倍")
+    parser.add_argument("--lookahead", type=int, default=SCHEDULER_LOOKAHEAD, help=f"流式模式下主机调度器最多预读的待发送链接数，链接集中在少数主机时让空闲名额分给其他主机，默认 {SCHEDULER_LOOKAHEAD}")
+    parser.add_argument("--cache", metavar="DB", help="SQLite 缓存文件，TTL 内的有效结果直接复用，过期后发送条件请求重新验证")
+    parser.add_argument("--cache-ttl", type=float, default=86400.0, help="缓存有效期（秒），默认 86400")
+    parser.add_argument("--since", metavar="REPORT", help="增量模式：对比历史报告（JSON/NDJSON），只检查新增和上次无效的链接")
+    parser.add_argument("--crawl", type=int, metavar="DEPTH", help="爬取模式：从输入链接出发下载同域 HTML 页面，递归发现并检查页面中的链接，DEPTH 为最大爬取深度")
+    parser.add_argument("--crawl-workers", type=int, default=8, help="爬取模式下下载解析页面的线程数，默认 8")
+    parser.add_argument("--workers", type=int, default=0, help="分布式模式：启动的本机工作进程数，链接按主机分片后由各进程并行检查")
+    parser.add_argument("--queue-db", metavar="DB", help="分布式任务队列的 SQLite 文件，本机其他进程可用 --worker 加入；须在协调者本地磁盘，不能放在网络文件系统上；默认使用临时文件")
+    parser.add_argument("--queue-listen", metavar="HOST:PORT", help="分布式模式下以 HTTP 对外提供任务队列，其他机器用 --worker http://主机:端口 加入，如 0.0.0.0:8765")
+    parser.add_argument("--queue-token", help="队列服务的访问令牌，协调者和远程工作进程须使用相同的值")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARD_COUNT, help=f"分布式模式下的主机分片数，默认 {DEFAULT_SHARD_COUNT}")
+    parser.add_argument("--worker", metavar="QUEUE", help="作为工作进程加入已有的分布式任务队列：本机队列文件，或协调者的 http://主机:端口；检查参数取自协调者")
+    parser.add_argument("--worker-id", help=argparse.SUPPRESS)
+    parser.add_argument("--progress", action="store_true", help="在标准错误输出实时进度：检查速率、在途数、排队主机、p50/p95/p99 耗时")
+    parser.add_argument("--progress-interval", type=float, default=1.0, help="进度刷新和指标导出的间隔（秒），默认 1")
+    parser.add_argument("--metrics-file", metavar="FILE", help="按刷新间隔写入指标快照，.json 结尾写 JSON，否则写 Prometheus 文本格式")
     parser.add_argument("-v", "--verbose", action="store_true", help="显示更多信息")
 
+    return parser
+
+
+def main() -> None:
+    """命令行入口。"""
+
+    parser = build_parser()
     args = parser.parse_args()
 
+    if args.worker:
+        try:
+            run_queue_worker(args.worker, args.worker_id, token=args.queue_token)
+        except (OSError, ValueError, RuntimeError, sqlite3.Error) as exc:
+            print(f"{Colors.RED}✗ 工作进程退出: {exc}{Colors.RESET}")
+            sys.exit(1)
+        sys.exit(0)
+
+    distributed = args.workers > 0 or bool(args.queue_db) or bool(args.queue_listen)
+    if distributed and args.stream:
+        print(f"{Colors.RED}✗ 分布式模式（--workers/--queue-db/--queue-listen）暂不支持 --stream{Colors.RESET}")
+        sys.exit(1)
+    if args.queue_listen:
+        try:
+            parse_listen_address(args.queue_listen)
+        except ValueError as exc:
+            print(f"{Colors.RED}✗ {exc}{Colors.RESET}")
+            sys.exit(1)
+    if args.crawl is not None and (distributed or args.since):
+        print(f"{Colors.RED}✗ 爬取模式（--crawl）不能与分布式模式或 --since 同时使用{Colors.RESET}")
+        sys.exit(1)
+
+    try:
+        parse_status_spec(args.valid_status)
+    except ValueError as exc:
+        print(f"{Colors.RED}✗ {exc}{Colors.RESET}")
+        sys.exit(1)
+
     try:
-        valid_status_codes = parse_status_spec(args.valid_status)
+        deduplicator = create_deduplicator(args.dedupe, args.dedupe_capacity, args.bloom_error_rate)
     except ValueError as exc:
         print(f"{Colors.RED}✗ {exc}{Colors.RESET}")
         sys.exit(1)
 
-    input_urls = collect_urls(args.urls + (args.input_urls or []), args.files or [], args.stdin)
+    url_stream = iter_collect_urls(
+        args.urls + (args.input_urls or []),
+        args.files or [],
+        args.stdin,
+        workers=args.extract_workers,
+        use_mmap=args.mmap,
+        deduplicator=deduplicator,
+    )
+    # 流式模式下边提取边检查，不等待整个输入读完；其他模式需要完整列表。
+    streaming_input = args.stream and not args.since
+    first_url = next(url_stream, None)
 
-    if not input_urls:
+    if first_url is None:
         parser.print_help()
         sys.exit(1)
 
+    input_urls: Iterable[str] = itertools.chain([first_url], url_stream)
+    if not streaming_input and args.dedupe == "exact":
+        input_urls = list(input_urls)
+    elif not streaming_input:
+        # 紧凑去重时完整输入超出部分写入临时文件；检查结果和 JSON 报告仍在内存中，内存固定需要 --stream。
+        spilled_urls = SpillQueue()
+        for url in input_urls:
+            spilled_urls.append(url)
+        input_urls = spilled_urls
+
     headers = parse_key_value_pairs(args.header)
 
-    print(f"\n{Colors.BOLD}{Colors.CYAN}➜ 开始检查 {len(input_urls)} 个链接{Colors.RESET}")
+    plan: Optional[IncrementalPlan] = None
+    if args.since:
+        try:
+            plan = plan_incremental_check(input_urls, load_report_results(args.since), parse_status_spec(args.valid_status))
+        except (OSError, ValueError) as exc:
+            print(f"{Colors.RED}✗ 无法读取历史报告: {exc}{Colors.RESET}")
+            sys.exit(1)
+
+    if isinstance(input_urls, (list, SpillQueue)):
+        print(f"\n{Colors.BOLD}{Colors.CYAN}➜ 开始检查 {len(input_urls)} 个链接{Colors.RESET}")
+    else:
+        print(f"\n{Colors.BOLD}{Colors.CYAN}➜ 开始检查链接（边提取边检查）{Colors.RESET}")
+    if plan:
+        print(f"{Colors.GRAY}增量模式: 需检查 {len(plan.urls)} 个，沿用历史结果 {len(plan.reused)} 个{Colors.RESET}")
     if headers:
         print(f"{Colors.GRAY}请求头: {headers}{Colors.RESET}")
-    print(f"{Colors.GRAY}方法: {args.method}  并发: {args.concurrency}  超时: {args.timeout}s{Colors.RESET}")
-
-    checker = LinkChecker(
-        timeout=args.timeout,
-        verify_ssl=not args.no_ssl_verify,
-        follow_redirects=args.trace_redirects,
-        trace_redirects=args.trace_redirects,
-        method=args.method,
-        headers=headers,
-        valid_status_codes=valid_status_codes,
+    concurrency_label = f"自适应 {args.concurrency} 起，上限 {args.max_concurrency}" if args.adaptive else str(args.concurrency)
+    print(
+        f"{Colors.GRAY}方法: {args.method}  并发: {concurrency_label}  超时: {args.timeout}s  "
+        f"引擎: {args.engine}{Colors.RESET}"
     )
 
+    dns_cache: Optional[DnsCache] = None
+    if args.dns_cache or args.dns_prefetch:
+        dns_cache = DnsCache(ttl=args.dns_ttl, negative_ttl=args.dns_negative_ttl)
+
+    if dns_cache and args.dns_prefetch:
+        if isinstance(input_urls, (list, SpillQueue)):
+            prefetch_start = time.time()
+            hostnames = (url_hostname(url) for url in (plan.urls if plan else input_urls))
+            resolved, failed = dns_cache.prefetch(host for host in hostnames if host)
+            print(
+                f"{Colors.GRAY}DNS 预解析: 成功 {resolved} 个主机，失败 {failed} 个，"
+                f"耗时 {(time.time() - prefetch_start) * 1000:.2f} ms{Colors.RESET}"
+            )
+        else:
+            print(f"{Colors.YELLOW}流式输入无法预先得到全部主机，跳过 DNS 预解析{Colors.RESET}")
+
+    try:
+        checker = build_checker(args, dns_cache)
+    except RuntimeError as exc:
+        print(f"{Colors.RED}✗ {exc}{Colors.RESET}")
+        sys.exit(1)
+
+    crawler: Optional[Crawler] = None
+    if args.crawl is not None:
+        crawler = Crawler(checker, args.crawl, deduplicator=deduplicator, fetch_workers=args.crawl_workers)
+        print(f"{Colors.GRAY}爬取模式: 同域页面最大深度 {args.crawl}，页面下载线程 {args.crawl_workers}{Colors.RESET}")
+
     start_time = time.time()
-    results = checker.check_urls(input_urls, args.concurrency)
+
+    try:
+        if args.stream:
+            summary = stream_check(checker, input_urls, args, start_time, plan, crawler)
+            sys.exit(0 if summary.valid == summary.total else 1)
+
+        def check(urls: Sequence[str]) -> List[LinkResult]:
+            if distributed:
+                return distributed_check(urls, args)
+            if crawler:
+                return sorted(crawler.crawl(urls, args.concurrency), key=lambda result: result.index)
+            return checker.check_urls(urls, args.concurrency)
+
+        if plan:
+            checked = [plan.restore_index(result) for result in check(plan.urls)]
+            results = sorted(plan.reused + checked, key=lambda result: result.index)
+        else:
+            results = check(input_urls)
+    except RuntimeError as exc:
+        print(f"{Colors.RED}✗ {exc}{Colors.RESET}")
+        sys.exit(1)
+    finally:
+        checker.close()
+        if checker.cache:
+            checker.cache.close()
+
     elapsed_ms = (time.time() - start_time) * 1000
 
     for result in results:
         ResultPrinter.print_result(result, verbose=args.verbose)
 
     ResultPrinter.print_summary(results, elapsed_ms)
+    if checker.adaptive and not distributed:
+        ResultPrinter.print_adaptive(checker.adaptive)
 
-    if args.output:
+    if args.output and Path(args.output).suffix.lower() == COLUMNAR_REPORT_SUFFIX:
+        writer = ColumnarReportWriter(args.output, args)
+        for result in results:
+            writer.write_result(result)
+        writer.close(ResultSummary.from_results(results), elapsed_ms)
+        print(f"{Colors.GREEN}✓ 列式报告已保存到: {writer.path}{Colors.RESET}")
+    elif args.output:
         report = build_report(results, args, input_urls, elapsed_ms)
         output_path = Path(args.output)
         output_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
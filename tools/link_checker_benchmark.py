@@ -0,0 +1,493 @@
+#!/usr/bin/env python3
+"""
+链接检查基准测试工具
+
+启动本地合成服务器（可配置延迟、错误率、重定向深度和主机数量），
+在不同引擎和并发数下运行 link_checker，统计吞吐量、峰值内存和尾延迟，
+结果写入 JSON 文件，并可与基线结果对比发现性能回退。
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlencode
+
+from aiohttp import web
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，无法统计峰值内存。
+    resource = None
+
+TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TOOLS_DIR))
+
+import link_checker  # noqa: E402
+
+Colors = link_checker.Colors
+ENGINES = {
+    "thread": link_checker.LinkChecker,
+    "async": link_checker.AsyncLinkChecker,
+    "http2": link_checker.Http2LinkChecker,
+}
+
+
+@dataclass
+class ServerProfile:
+    """合成服务器和测试链接的参数。"""
+
+    urls: int = 2000
+    hosts: int = 4
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    error_rate: float = 0.05
+    redirect_rate: float = 0.2
+    redirect_depth: int = 1
+    seed: int = 42
+
+
+class SyntheticServer:
+    """在后台线程运行的 aiohttp 合成服务器，每个“主机”监听一个独立端口。
+
+    请求参数控制响应：delay 为延迟毫秒数（每一跳都会延迟），hops 为剩余重定向次数，
+    status 为最终状态码。
+    """
+
+    def __init__(self, hosts: int = 1):
+        self.hosts = max(1, hosts)
+        self.requests = 0
+        self.base_urls: List[str] = []
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._runner: Optional[web.AppRunner] = None
+
+    def start(self) -> List[str]:
+        """启动服务器，返回各主机的基础地址。"""
+
+        self._thread.start()
+        self.base_urls = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self.base_urls
+
+    def stop(self) -> None:
+        if self._runner:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _start(self) -> List[str]:
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        base_urls = []
+        for _ in range(self.hosts):
+            site = web.TCPSite(self._runner, "127.0.0.1", 0, backlog=4096)
+            await site.start()
+            port = site._server.sockets[0].getsockname()[1]
+            base_urls.append(f"http://127.0.0.1:{port}")
+        return base_urls
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        query = request.query
+        delay = float(query.get("delay", 0))
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        hops = int(query.get("hops", 0))
+        if hops > 0:
+            location = f"{request.path}?{urlencode({**query, 'hops': hops - 1})}"
+            return web.Response(status=302, headers={"Location": location})
+
+        return web.Response(status=int(query.get("status", 200)), text="ok")
+
+
+def generate_urls(base_urls: Sequence[str], profile: ServerProfile) -> List[str]:
+    """按配置生成测试链接，同一个 seed 生成的链接完全相同。"""
+
+    rng = random.Random(profile.seed)
+    urls = []
+    for index in range(profile.urls):
+        params: Dict[str, Any] = {}
+        delay = profile.latency_ms + rng.uniform(-profile.jitter_ms, profile.jitter_ms)
+        if delay > 0:
+            params["delay"] = round(delay, 1)
+        if rng.random() < profile.redirect_rate and profile.redirect_depth > 0:
+            params["hops"] = profile.redirect_depth
+        if rng.random() < profile.error_rate:
+            params["status"] = 500
+        query = f"?{urlencode(params)}" if params else ""
+        urls.append(f"{base_urls[index % len(base_urls)]}/page/{index}{query}")
+    return urls
+
+
+def percentile(sorted_values: Sequence[float], percent: float) -> Optional[float]:
+    """最近秩法计算百分位数。"""
+
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前进程的峰值常驻内存（MB）。"""
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位。
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """在当前进程中运行一个测试用例并返回指标，由子进程调用以便单独统计峰值内存。"""
+
+    urls = Path(case["urls_file"]).read_text(encoding="utf-8").splitlines()
+    adaptive = link_checker.AdaptiveConcurrency(max_limit=case["adaptive"]) if case.get("adaptive") else None
+    checker = ENGINES[case["engine"]](
+        timeout=case["timeout"],
+        per_host_limit=case["per_host_limit"],
+        retry_policy=link_checker.RetryPolicy(max_retries=case["retries"]),
+        adaptive=adaptive,
+    )
+    rss_before = peak_rss_mb()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    try:
+        results = checker.check_urls(urls, case["concurrency"])
+        wall = time.perf_counter() - start
+    finally:
+        checker.close()
+
+    latencies = sorted(result.elapsed_ms for result in results)
+    summary = link_checker.ResultSummary.from_results(results)
+    return {
+        "engine": case["engine"],
+        "concurrency": case["concurrency"],
+        "adaptive": case.get("adaptive", 0),
+        "final_concurrency": adaptive.limit if adaptive else case["concurrency"],
+        "peak_concurrency": adaptive.peak_limit if adaptive else case["concurrency"],
+        "urls": len(urls),
+        "wall_seconds": round(wall, 4),
+        "urls_per_sec": round(len(urls) / wall, 2) if wall else None,
+        "cpu_seconds": round(time.process_time() - cpu_start, 4),
+        "latency_ms": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "valid": summary.valid,
+        "invalid": summary.invalid,
+        "failed": summary.failed,
+        "peak_rss_mb": peak_rss_mb(),
+        "baseline_rss_mb": rss_before,
+    }
+
+
+def measure_result_memory(count: int) -> Dict[str, Any]:
+    """测量保留 count 条检查结果的内存占用，结果经由检查器的 _build_result 构造。
+
+    每条结果都使用新建的字符串模拟真实响应，其中 10% 带一次重定向，2% 为请求失败。
+    url_bytes 为输入 URL 字符串本身的占用，per_result_bytes 含 URL，overhead_bytes 不含。
+    """
+
+    checker = link_checker.LinkChecker()
+    headers: Dict[str, str] = {}
+    start_time = time.time()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results = []
+    url_bytes = 0
+    for index in range(count):
+        url = f"https://example{index % 1000}.com/articles/{index}"
+        url_bytes += sys.getsizeof(url)
+        if index % 50 == 0:
+            results.append(
+                checker._build_error_result(index + 1, url, url, "".join(["HE", "AD"]), start_time, "".join(["Time", "out"]), "请求超时")
+            )
+            continue
+
+        history = [url] if index % 10 == 0 else []
+        final_url = f"{url}/" if history else "".join([url])
+        response = link_checker.ResponseInfo(
+            200, "".join(["O", "K"]), final_url, history, bool(history), headers, "".join(["HTTP/", "1.1"])
+        )
+        results.append(checker._build_result(index + 1, url, url, "".join(["HE", "AD"]), start_time, response))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "results": count,
+        "total_mb": round(used / 1024 / 1024, 2),
+        "per_result_bytes": round(used / count, 1),
+        "url_bytes": round(url_bytes / count, 1),
+        "overhead_bytes": round((used - url_bytes) / count, 1),
+    }
+
+
+def run_case_subprocess(case: Dict[str, Any]) -> Dict[str, Any]:
+    """在独立子进程中运行测试用例，避免各用例的内存峰值互相影响。"""
+
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--run-case", json.dumps(case)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"用例 {case['engine']}/{case['concurrency']} 运行失败: {completed.stderr.strip()[-500:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare_with_baseline(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """与基线结果逐个用例对比，返回吞吐量下降或 p99 上升超过容差的用例说明。"""
+
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    baseline_cases = {
+        (item["engine"], item["concurrency"], item.get("adaptive", 0)): item for item in baseline.get("results", [])
+    }
+    regressions = []
+
+    for result in results:
+        old = baseline_cases.get((result["engine"], result["concurrency"], result.get("adaptive", 0)))
+        if old is None:
+            continue
+
+        name = f"{result['engine']}/c={result['concurrency']}"
+        if old.get("urls_per_sec") and result["urls_per_sec"] < old["urls_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name} 吞吐量 {old['urls_per_sec']:.1f} -> {result['urls_per_sec']:.1f} URL/s")
+        old_p99, new_p99 = old["latency_ms"].get("p99"), result["latency_ms"].get("p99")
+        if old_p99 and new_p99 and new_p99 > old_p99 * (1 + tolerance):
+            regressions.append(f"{name} p99 {old_p99:.1f} -> {new_p99:.1f} ms")
+    return regressions
+
+
+def run_benchmark(
+    profile: ServerProfile,
+    engines: Sequence[str],
+    concurrency_levels: Sequence[int],
+    timeout: float = 10.0,
+    per_host_limit: int = 0,
+    retries: int = 0,
+    repeat: int = 1,
+    adaptive: int = 0,
+) -> Dict[str, Any]:
+    """启动合成服务器，依次运行各引擎、各并发数的用例，返回完整的基准测试报告。
+
+    adaptive 大于 0 时各用例使用自适应并发，并发数为初始值，adaptive 为上限。
+    """
+
+    server = SyntheticServer(profile.hosts)
+    base_urls = server.start()
+    results: List[Dict[str, Any]] = []
+    skipped: List[Dict[str, str]] = []
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="link_checker_bench_") as temp_dir:
+            urls_file = Path(temp_dir) / "urls.txt"
+            urls_file.write_text("\n".join(generate_urls(base_urls, profile)), encoding="utf-8")
+
+            for engine in engines:
+                for concurrency in concurrency_levels:
+                    case = {
+                        "engine": engine,
+                        "concurrency": concurrency,
+                        "urls_file": str(urls_file),
+                        "timeout": timeout,
+                        "per_host_limit": per_host_limit,
+                        "retries": retries,
+                        "adaptive": adaptive,
+                    }
+                    runs = []
+                    for _ in range(max(1, repeat)):
+                        server.requests = 0
+                        try:
+                            run = run_case_subprocess(case)
+                        except RuntimeError as exc:
+                            skipped.append({"engine": engine, "concurrency": str(concurrency), "reason": str(exc)})
+                            break
+                        run["server_requests"] = server.requests
+                        runs.append(run)
+
+                    if runs:
+                        # 多次运行时取吞吐量的中位数那一次，减少偶然抖动。
+                        runs.sort(key=lambda item: item["urls_per_sec"] or 0)
+                        best = runs[len(runs) // 2]
+                        best["runs"] = len(runs)
+                        results.append(best)
+                        print_case(best)
+    finally:
+        server.stop()
+
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "profile": asdict(profile),
+        "options": {"timeout": timeout, "per_host_limit": per_host_limit, "retries": retries, "repeat": repeat},
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def print_case(result: Dict[str, Any]) -> None:
+    """打印单个用例的结果。"""
+
+    latency = result["latency_ms"]
+    rss = f"{result['peak_rss_mb']:.1f} MB" if result["peak_rss_mb"] is not None else "-"
+    print(
+        f"{Colors.BOLD}{result['engine']:>6}{Colors.RESET} c={result['concurrency']:<5} "
+        f"{Colors.GREEN}{result['urls_per_sec']:>9.1f} URL/s{Colors.RESET}  "
+        f"p50/p95/p99 {latency['p50']:.1f}/{latency['p95']:.1f}/{latency['p99']:.1f} ms  "
+        f"峰值内存 {rss}  CPU {result['cpu_seconds']:.2f}s  服务器请求 {result['server_requests']}"
+    )
+    if result.get("adaptive"):
+        print(f"{Colors.GRAY}       自适应并发: 最终 {result['final_concurrency']}，峰值 {result['peak_concurrency']}{Colors.RESET}")
+
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    """命令行入口。"""
+
+    parser = argparse.ArgumentParser(
+        description="链接检查基准测试工具 - 本地合成服务器上测量 link_checker 的吞吐量、内存和尾延迟",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+使用示例:
+  # 默认配置：2000 个链接、4 个主机，对比 thread/async 引擎在不同并发下的表现
+  python tools/link_checker_benchmark.py
+
+  # 高延迟、高错误率、多级重定向，并发 50/200/1000
+  python tools/link_checker_benchmark.py -n 20000 --latency-ms 200 --error-rate 0.2 --redirect-depth 3 -c 50,200,1000
+
+  # 自适应并发从 10 起步、上限 1000，与固定并发对比
+  python tools/link_checker_benchmark.py -e async -c 10 --adaptive 1000
+
+  # 测量保留 100 万条检查结果的内存占用
+  python tools/link_checker_benchmark.py --memory 1000000
+
+  # 每个用例跑 3 次，与基线对比，吞吐量下降或 p99 上升超过 10% 时以非 0 状态退出
+  python tools/link_checker_benchmark.py --repeat 3 --baseline data/benchmark_reports/baseline.json --tolerance 0.1
+        """,
+    )
+    parser.add_argument("-n", "--urls", type=int, default=2000, help="测试链接数，默认 2000")
+    parser.add_argument("--hosts", type=int, default=4, help="合成主机数（每个主机一个端口），默认 4")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="每次响应的平均延迟（毫秒），默认 20")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="延迟的随机波动范围（毫秒），默认 10")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="返回 500 的链接比例，默认 0.05")
+    parser.add_argument("--redirect-rate", type=float, default=0.2, help="带重定向的链接比例，默认 0.2")
+    parser.add_argument("--redirect-depth", type=int, default=1, help="重定向链接的跳转次数，默认 1")
+    parser.add_argument("--seed", type=int, default=42, help="生成链接的随机种子，默认 42")
+    parser.add_argument("-e", "--engines", default="thread,async", help="参与测试的引擎，逗号分隔，可选 thread,async,http2，默认 thread,async")
+    parser.add_argument("-c", "--concurrency", type=parse_int_list, default=[10, 50, 200], help="并发数列表，逗号分隔，默认 10,50,200")
+    parser.add_argument("-t", "--timeout", type=float, default=10.0, help="单个链接超时时间（秒），默认 10")
+    parser.add_argument("--per-host-limit", type=int, default=0, help="单主机并发上限，0 表示不限制，默认 0")
+    parser.add_argument("--retries", type=int, default=0, help="失败重试次数，默认 0（只测单次请求）")
+    parser.add_argument("--repeat", type=int, default=1, help="每个用例重复次数，取吞吐量中位数，默认 1")
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，默认写入 data/benchmark_reports/")
+    parser.add_argument("--baseline", metavar="FILE", help="基线结果 JSON，用于对比发现性能回退")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="对比基线时允许的相对波动，默认 0.15")
+    parser.add_argument("--adaptive", type=int, default=0, metavar="MAX", help="使用自适应并发，-c 为初始并发数，MAX 为上限")
+    parser.add_argument("--memory", type=int, metavar="N", help="只测量保留 N 条检查结果的内存占用，不启动服务器")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return
+
+    if args.memory:
+        print(f"\n{Colors.BOLD}{Colors.CYAN}➜ 测量 {args.memory} 条检查结果的内存占用{Colors.RESET}")
+        memory = measure_result_memory(args.memory)
+        print(
+            f"总计 {memory['total_mb']} MB，每条 {memory['per_result_bytes']} 字节"
+            f"（其中 URL 字符串 {memory['url_bytes']} 字节，结果对象 {memory['overhead_bytes']} 字节）"
+        )
+        if args.output:
+            report = {
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "environment": {"python": platform.python_version(), "platform": platform.platform()},
+                "memory": memory,
+            }
+            Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"{Colors.GREEN}✓ 结果已保存到: {args.output}{Colors.RESET}")
+        return
+
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        print(f"{Colors.RED}✗ 未知引擎: {', '.join(unknown)}{Colors.RESET}")
+        sys.exit(1)
+
+    profile = ServerProfile(
+        urls=args.urls,
+        hosts=args.hosts,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        redirect_rate=args.redirect_rate,
+        redirect_depth=args.redirect_depth,
+        seed=args.seed,
+    )
+    print(
+        f"\n{Colors.BOLD}{Colors.CYAN}➜ 基准测试: {profile.urls} 个链接，{profile.hosts} 个主机，"
+        f"延迟 {profile.latency_ms}±{profile.jitter_ms} ms，错误率 {profile.error_rate}，"
+        f"重定向 {profile.redirect_rate}×{profile.redirect_depth} 跳{Colors.RESET}"
+    )
+
+    report = run_benchmark(
+        profile,
+        engines,
+        args.concurrency,
+        timeout=args.timeout,
+        per_host_limit=args.per_host_limit,
+        retries=args.retries,
+        repeat=args.repeat,
+        adaptive=args.adaptive,
+    )
+    for item in report["skipped"]:
+        print(f"{Colors.YELLOW}跳过 {item['engine']}/c={item['concurrency']}: {item['reason']}{Colors.RESET}")
+
+    if args.output:
+        output_path = Path(args.output)
+    else:
+        output_path = Path("data/benchmark_reports") / f"link_checker_benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"{Colors.GREEN}✓ 基准测试结果已保存到: {output_path}{Colors.RESET}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(report["results"], args.baseline, args.tolerance)
+        if regressions:
+            print(f"{Colors.RED}✗ 发现性能回退（容差 {args.tolerance:.0%}）:{Colors.RESET}")
+            for line in regressions:
+                print(f"  {Colors.RED}{line}{Colors.RESET}")
+            sys.exit(1)
+        print(f"{Colors.GREEN}✓ 与基线相比没有超过容差的回退{Colors.RESET}")
+
+
+if __name__ == "__main__":
+    main()